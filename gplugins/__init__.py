@@ -4,8 +4,13 @@ __version__ = "1.1.2"
 
 import pathlib
 
-from gplugins.common.utils import plot, port_symmetries
-from gplugins.common.utils.get_effective_indices import get_effective_indices
+from gplugins.common.utils.lazy_loader import attach
+
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    submodules=[".common.utils.plot", ".common.utils.port_symmetries"],
+    submod_attrs={".common.utils.get_effective_indices": ["get_effective_indices"]},
+)
 
 home = pathlib.Path.home()
 cwd = pathlib.Path.cwd()
@@ -19,5 +24,3 @@ class Paths:
 
 
 PATH = Paths()
-
-__all__ = ["plot", "get_effective_indices", "port_symmetries"]
@@ -8,11 +8,14 @@ from gdsfactory.technology import LayerLevel, LayerStack
 from pydantic import (
     BaseModel,
     ConfigDict,
+    Field,
     NonNegativeFloat,
     computed_field,
 )
 from shapely import MultiPolygon, Polygon
 
+from gplugins.common.utils.get_sparameters_path import get_component_hash
+from gplugins.common.utils.result_store import ResultStore
 from gplugins.gmsh.parse_gds import cleanup_component
 
 from ..types import AnyShapelyPolygon, GFComponent
@@ -37,11 +40,19 @@ class LayeredComponentBase(BaseModel):
     pad_z_outer: NonNegativeFloat = 0.0
     wafer_layer: tuple[int, int] = (999, 0)
     slice_stack: tuple[int, int | None] = (0, None)
+    polygons_store: ResultStore | None = Field(default=None, exclude=True)
 
     def __hash__(self):
         if not hasattr(self, "_hash"):
-            dump = str.encode(self.model_dump_json())
-            self._hash = int(md5(dump).hexdigest()[:15], 16)
+            # hash the geometry instead of serializing the component and polygons
+            h = md5(get_component_hash(self.component).encode())
+            h.update(self.layer_stack.model_dump_json().encode())
+            h.update(
+                self.model_dump_json(
+                    exclude={"component", "layer_stack", "polygons"}
+                ).encode()
+            )
+            self._hash = int(h.hexdigest()[:15], 16)
         return self._hash
 
     @property
@@ -101,7 +112,11 @@ class LayeredComponentBase(BaseModel):
     @cached_property
     def polygons(self) -> dict[str, AnyShapelyPolygon]:
         return cleanup_component(
-            self.gds_component, self.layer_stack, round_tol=3, simplify_tol=1e-3
+            self.gds_component,
+            self.layer_stack,
+            round_tol=3,
+            simplify_tol=1e-3,
+            store=self.polygons_store,
         )
 
     @cached_property
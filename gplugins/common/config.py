@@ -19,6 +19,8 @@ class Path:
     module = module_path
     repo = repo_path
     results_tidy3d = home / ".tidy3d"
+    results = home / ".gplugins" / "results"
+    cache = home / ".gplugins" / "cache"
     test_data = repo / "test-data"
     sparameters_repo = test_data / "sp"
     klayout = module_path / "klayout"
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 import asyncio
+import codecs
 import io
 import sys
+import time
+from collections import deque
 from collections.abc import Awaitable, Coroutine
 from contextlib import nullcontext
 from pathlib import Path
@@ -10,31 +13,65 @@ from typing import Any, TypeVar
 
 T = TypeVar("T")
 
+CHUNK_SIZE = 2**16
+
 
 async def handle_return(
     in_stream: asyncio.streams.StreamReader,
     out_stream: io.TextIOWrapper | None = None,
     log_file: Path | None = None,
     append: bool = False,
+    tail: deque[str] | None = None,
+    chunk_size: int = CHUNK_SIZE,
+    echo_interval: float = 0.0,
 ) -> None:
-    """Reads through a :class:`StreamReader` and tees content to ``out_stream`` and ``log_file``."""
+    """Reads through a :class:`StreamReader` and tees content to ``out_stream`` and ``log_file``.
+
+    The stream is read in chunks of up to ``chunk_size`` bytes and written in
+    batches instead of line by line, which keeps the overhead low for chatty solvers.
+
+    Args:
+        in_stream: stream to read.
+        out_stream: stream to echo to. None to disable the echo.
+        log_file: file to write to.
+        append: append to ``log_file`` instead of overwriting it.
+        tail: filled with the last lines of the stream, bounded by its ``maxlen``.
+        chunk_size: maximum number of bytes read at once.
+        echo_interval: minimum time in seconds between writes to ``out_stream``.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    partial_line = ""
+    echo_buffer: list[str] = []
+    last_echo = 0.0
+
     with (
-        open(log_file, "a" if append else "w", encoding="utf-8", buffering=1)
+        open(log_file, "a" if append else "w", encoding="utf-8")
         if log_file
         else nullcontext(None) as f
     ):
         while True:
-            # Without this sleep, the program won't exit
-            await asyncio.sleep(0)
-            data = await in_stream.readline()
-            if data:
-                line = data.decode("utf-8").rstrip()
-                if out_stream:
-                    print(line, file=out_stream)
+            data = await in_stream.read(chunk_size)
+            text = decoder.decode(data, final=not data)
+            if text:
                 if f:
-                    f.write(line + "\n")
-            else:
+                    f.write(text)
+                if tail is not None:
+                    *lines, partial_line = (partial_line + text).split("\n")
+                    tail.extend(lines[-tail.maxlen :] if tail.maxlen else lines)
+                    partial_line = partial_line[-chunk_size:]
+                if out_stream:
+                    echo_buffer.append(text)
+            if out_stream and echo_buffer:
+                now = time.monotonic()
+                if not data or now - last_echo >= echo_interval:
+                    out_stream.write("".join(echo_buffer))
+                    out_stream.flush()
+                    echo_buffer.clear()
+                    last_echo = now
+            if not data:
                 break
+    if tail is not None and partial_line:
+        tail.append(partial_line)
 
 
 async def execute_and_stream_output(
@@ -46,6 +83,9 @@ async def execute_and_stream_output(
     log_file_str: str | None = None,
     stream_stdout: io.TextIOWrapper | None = sys.stdout,
     stream_stderr: io.TextIOWrapper | None = sys.stderr,
+    stdout_tail: deque[str] | None = None,
+    stderr_tail: deque[str] | None = None,
+    echo_interval: float = 0.0,
     **kwargs,
 ) -> asyncio.subprocess.Process:
     """Run a command asynchronously and stream *stdout* and *stderr* to given IO and a log file
@@ -59,6 +99,9 @@ async def execute_and_stream_output(
         log_file_str: Log file name. Will be expanded to ``f'{log_file_str}_out.log'`` and ``f'{log_file_str}_err.log'``.
         stream_stdout: Stream to write stdout to. Defaults to ``sys.stdout``.
         stream_stderr: Stream to write stderr to. Defaults to ``sys.stderr``.
+        stdout_tail: Filled with the last lines of stdout, bounded by its ``maxlen``.
+        stderr_tail: Filled with the last lines of stderr, bounded by its ``maxlen``.
+        echo_interval: Minimum time in seconds between writes to the streams.
 
     ``*args`` and ``**kwargs`` are passed to :func:`~create_subprocess_shell` or :func:`create_subprocess_exec`,
     which in turn passes them to :class:`subprocess.Popen`.
@@ -79,28 +122,48 @@ async def execute_and_stream_output(
         stderr=asyncio.subprocess.PIPE,
         **kwargs,
     )
-    asyncio.create_task(
-        handle_return(
-            proc.stdout,
-            out_stream=stream_stdout,
-            log_file=log_file_dir / f"{log_file_str}_out.log",
-            append=append,
-        )
-    )
-    asyncio.create_task(
-        handle_return(
-            proc.stderr,
-            out_stream=stream_stderr,
-            log_file=log_file_dir / f"{log_file_str}_err.log",
-            append=append,
+    try:
+        await asyncio.gather(
+            handle_return(
+                proc.stdout,
+                out_stream=stream_stdout,
+                log_file=log_file_dir / f"{log_file_str}_out.log",
+                append=append,
+                tail=stdout_tail,
+                echo_interval=echo_interval,
+            ),
+            handle_return(
+                proc.stderr,
+                out_stream=stream_stderr,
+                log_file=log_file_dir / f"{log_file_str}_err.log",
+                append=append,
+                tail=stderr_tail,
+                echo_interval=echo_interval,
+            ),
         )
-    )
-
-    # This needs to also handle the "wait_to_finish" flag
-    await proc.wait()
+        await proc.wait()
+    except asyncio.CancelledError:
+        await terminate_process(proc)
+        raise
     return proc
 
 
+async def terminate_process(
+    proc: asyncio.subprocess.Process, timeout: float = 5.0
+) -> None:
+    """Terminates ``proc`` and kills it if it is still running after ``timeout`` seconds."""
+    if proc.returncode is not None:
+        return
+    try:
+        proc.terminate()
+        await asyncio.wait_for(proc.wait(), timeout)
+    except ProcessLookupError:
+        pass
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+
+
 def run_async_with_event_loop(coroutine: Coroutine[Any, Any, T] | Awaitable[T]) -> T:
     """Run a coroutine within an asyncio event loop, either by adding it to the
     existing running event loop or by creating a new event loop. Returns the result.
@@ -1,39 +1,170 @@
-import os
+import functools
+import hashlib
+import inspect
+import json
+import pathlib
 import pickle
+import time
 from collections.abc import Callable
-from typing import Any
+from dataclasses import dataclass
+from typing import Any, Literal
 
+import numpy as np
+import pydantic
+from gdsfactory.serialization import clean_value_json
 
-def disk_memoize(filename: str, overwrite: bool = False) -> Callable:
-    # Check if cache file exists and load it, otherwise start with an empty cache
-    if os.path.exists(filename):
-        with open(filename, "rb") as f:
-            cache: dict[tuple[Any] | frozenset[tuple[str, Any]], Any] = pickle.load(f)
-    else:
-        cache = {}
+from gplugins.common.config import PATH
+from gplugins.common.utils.result_store import ResultStore
+
+PICKLE_PROTOCOL = 4
+
+
+@dataclass
+class CacheInfo:
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+
+
+def _normalize(value: Any) -> Any:
+    """Returns a JSON serializable form of a function argument for cache keys.
+
+    Unlike ``clean_value_json`` floats are not rounded, so close values get their
+    own entries. Objects without a JSON form are hashed from their pickle.
+    """
+    if value is None or isinstance(value, bool | str):
+        return value
+    elif isinstance(value, int | np.integer):
+        return int(value)
+    elif isinstance(value, float | np.floating):
+        return float(value)
+    elif isinstance(value, complex | np.complexfloating):
+        return {"complex": [value.real, value.imag]}
+    elif isinstance(value, np.ndarray) and value.dtype != object:
+        data = np.ascontiguousarray(value).tobytes()
+        return {
+            "ndarray": [str(value.dtype), value.shape, hashlib.md5(data).hexdigest()]
+        }
+    elif isinstance(value, np.ndarray):
+        return [_normalize(v) for v in value.tolist()]
+    elif isinstance(value, pathlib.Path):
+        return str(value)
+    elif isinstance(value, dict):
+        return {_dumps(_normalize(k)): _normalize(v) for k, v in value.items()}
+    elif isinstance(value, list | tuple):
+        return [_normalize(v) for v in value]
+    elif isinstance(value, set | frozenset):
+        return sorted(_dumps(_normalize(v)) for v in value)
+    elif (
+        isinstance(value, pydantic.BaseModel)
+        or hasattr(value, "get_component_spec")
+        or callable(value)
+    ):
+        return clean_value_json(value)
+    data = pickle.dumps(value, PICKLE_PROTOCOL)
+    return {type(value).__qualname__: hashlib.md5(data).hexdigest()}
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, sort_keys=True)
+
+
+def disk_cache(
+    dirpath: str | pathlib.Path = PATH.cache,
+    version: str = "",
+    ttl: float | None = None,
+    max_size_bytes: float | None = None,
+    backend: Literal["directory", "sqlite"] = "sqlite",
+    overwrite: bool = False,
+) -> Callable:
+    """Memoizes a function on disk, one entry per call signature.
+
+    Calls are keyed by their arguments bound to the function signature with
+    defaults applied, so ``f(1)``, ``f(x=1)`` and ``f(1, y=default)`` share one
+    entry, and dictionaries are keyed independently of their order.
+
+    Entries are written atomically into a :class:`ResultStore`, so several
+    processes can share the same cache directory without overwriting each other.
+    Each function has its own store in a subdirectory named after the function.
+
+    Args:
+        dirpath: cache directory.
+        version: included in every key. Bump it to invalidate the results of an
+            older implementation.
+        ttl: time to live in seconds. Older entries are removed when read and
+            recomputed.
+        max_size_bytes: evicts least recently used entries above this size.
+        backend: "sqlite" (WAL index) or "directory".
+        overwrite: always recompute and overwrite the cached results.
+
+    The decorated function has ``cache_info()`` returning hit/miss counters of
+    this process, ``cache_clear()`` and ``store`` attributes.
+    """
 
     def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        name = f"{func.__module__}.{func.__qualname__}"
+        store = ResultStore(
+            pathlib.Path(dirpath) / name,
+            backend=backend,
+            max_size_bytes=max_size_bytes,
+        )
+        info = CacheInfo()
+        try:
+            signature = inspect.signature(func)
+        except (TypeError, ValueError):
+            signature = None
+
+        def call_key(args: tuple, kwargs: dict) -> str:
+            """Returns the same key for all spellings of a call, defaults included."""
+            if signature is None:
+                return _dumps(_normalize({"args": args, "kwargs": kwargs}))
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return _dumps(_normalize(bound.arguments))
+
+        @functools.wraps(func)
         def memoized_function(*args: Any, **kwargs: Any) -> Any:
-            key = (args, frozenset(kwargs.items()))
-            if key not in cache or overwrite:
-                result = func(*args, **kwargs)
-                cache[key] = result
-                with open(filename, "wb") as f:
-                    pickle.dump(cache, f)
-                return result
-            return cache[key]
+            key = store.key(name, version, call_key(args, kwargs))
+
+            if not overwrite and (data := store.get_bytes(key)) is not None:
+                created, result = pickle.loads(data)
+                if ttl is None or time.time() - created <= ttl:
+                    info.hits += 1
+                    return result
+                info.expired += 1
+                store.remove(key)
 
+            info.misses += 1
+            result = func(*args, **kwargs)
+            store.put_bytes(key, pickle.dumps((time.time(), result), PICKLE_PROTOCOL))
+            return result
+
+        memoized_function.cache_info = lambda: CacheInfo(**vars(info))
+        memoized_function.cache_clear = store.clear
+        memoized_function.store = store
         return memoized_function
 
     return decorator
 
 
+def disk_memoize(filename: str, overwrite: bool = False) -> Callable:
+    """Memoizes a function on disk under ``filename`` (without suffix) as cache directory.
+
+    Kept for backwards compatibility, see :func:`disk_cache`.
+    """
+    return disk_cache(
+        dirpath=pathlib.Path(filename).with_suffix(""), overwrite=overwrite
+    )
+
+
 if __name__ == "__main__":
     import numpy as np
 
-    @disk_memoize("fibonacci_cache3.pkl")
+    @disk_cache("fibonacci_cache3", version="v1")
     def fibonacci(n, version="v1"):
         print(f"computing fibonacci({n})")
         return np.arange(n) if version == "v1" else np.arange(n) ** 2
 
     print(fibonacci(4))
+    print(fibonacci(4))
+    print(fibonacci.cache_info())
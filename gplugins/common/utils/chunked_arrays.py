@@ -0,0 +1,235 @@
+"""Uncompressed, chunked on-disk arrays that are memory-mapped on load.
+
+``np.savez_compressed`` files have to be decompressed completely on every load.
+Here each array is split along its first axis (usually wavelength) into chunks
+stored as plain ``.npy`` files in a directory::
+
+    mmi1x2.chunks/
+        index.json
+        wavelengths.0.npy
+        s.0.npy
+        s.1.npy
+        port_modes.0.npy
+
+Loading maps the chunks lazily with :func:`numpy.load` ``mmap_mode``, so slicing
+a wavelength range only reads the pages of the chunks it touches. Chunks can be
+appended while a sweep is running with :func:`append_chunks`.
+
+Example:
+    save_chunked("mmi1x2.chunks", wavelengths=wavelengths, s=s)
+    arrays = load_chunked("mmi1x2.chunks")
+    s = arrays["s"][100:200]  # reads 100 wavelengths only
+"""
+
+from __future__ import annotations
+
+import json
+import pathlib
+import shutil
+from collections.abc import Iterator, Mapping
+from typing import Any
+
+import numpy as np
+
+from gplugins.common.utils.result_store import _atomic_write
+
+PathType = str | pathlib.Path
+
+CHUNK_SIZE = 256
+INDEX = "index.json"
+
+
+def _read_index(dirpath: pathlib.Path) -> dict[str, Any]:
+    return json.loads((dirpath / INDEX).read_text())
+
+
+def _write_index(dirpath: pathlib.Path, index: dict[str, Any]) -> None:
+    _atomic_write(dirpath / INDEX, json.dumps(index, indent=2).encode())
+
+
+def append_chunks(dirpath: PathType, **arrays: np.ndarray) -> pathlib.Path:
+    """Appends one chunk to each array in ``dirpath``, creating arrays as needed.
+
+    Appending a wider dtype of the same kind (longer strings, float64 to float32
+    chunks) widens the stored dtype.
+
+    Args:
+        dirpath: directory of the chunked arrays.
+        arrays: arrays to append along the first axis.
+    """
+    dirpath = pathlib.Path(dirpath)
+    dirpath.mkdir(parents=True, exist_ok=True)
+    index = _read_index(dirpath) if (dirpath / INDEX).exists() else {}
+
+    for name, array in arrays.items():
+        array = np.asarray(array)
+        if array.dtype.hasobject:
+            raise ValueError(f"{name!r} has object dtype and cannot be memory-mapped")
+        array = np.atleast_1d(array)
+        meta = index.setdefault(
+            name,
+            {"dtype": array.dtype.str, "shape": [0, *array.shape[1:]], "chunks": []},
+        )
+        if list(array.shape[1:]) != meta["shape"][1:]:
+            raise ValueError(
+                f"Cannot append {name!r} of shape {array.shape} "
+                f"to chunks of shape {meta['shape']}"
+            )
+        dtype = np.dtype(meta["dtype"])
+        if array.dtype.kind != dtype.kind:
+            raise ValueError(
+                f"Cannot append {name!r} of dtype {array.dtype} to {meta['dtype']}"
+            )
+        if not np.can_cast(array.dtype, dtype):
+            # widen instead of cutting longer strings or wider numbers,
+            # earlier chunks are cast when read
+            dtype = np.promote_types(dtype, array.dtype)
+            meta["dtype"] = dtype.str
+        chunk = len(meta["chunks"])
+        np.save(dirpath / f"{name}.{chunk}.npy", array.astype(dtype))
+        meta["chunks"].append(len(array))
+        meta["shape"][0] += len(array)
+
+    _write_index(dirpath, index)
+    return dirpath
+
+
+def save_chunked(
+    dirpath: PathType, chunk_size: int = CHUNK_SIZE, **arrays: np.ndarray
+) -> pathlib.Path:
+    """Saves arrays uncompressed, split in chunks of ``chunk_size`` along the first axis.
+
+    Overwrites existing arrays in ``dirpath``.
+    """
+    dirpath = pathlib.Path(dirpath)
+    if dirpath.exists():
+        shutil.rmtree(dirpath)
+    dirpath.mkdir(parents=True)
+    for name, array in arrays.items():
+        array = np.atleast_1d(np.asarray(array))
+        for start in range(0, max(len(array), 1), chunk_size):
+            append_chunks(dirpath, **{name: array[start : start + chunk_size]})
+    return dirpath
+
+
+class ChunkedArray:
+    """Read-only array over memory-mapped chunks along the first axis.
+
+    Indexing with an integer or slice along the first axis only maps the chunks
+    involved and returns a view of the mapped file if it lies within one chunk.
+    ``np.asarray(chunked_array)`` loads everything.
+    """
+
+    def __init__(
+        self,
+        paths: list[pathlib.Path],
+        lengths: list[int],
+        shape: tuple[int, ...],
+        dtype: np.dtype,
+        mmap_mode: str = "r",
+    ) -> None:
+        self._paths = paths
+        self._offsets = np.cumsum([0, *lengths])
+        self._chunks: list[np.ndarray | None] = [None] * len(paths)
+        self._mmap_mode = mmap_mode
+        self.shape = shape
+        self.dtype = dtype
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(shape={self.shape}, dtype={self.dtype}, chunks={len(self._paths)})"
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    def _chunk(self, k: int) -> np.ndarray:
+        if self._chunks[k] is None:
+            self._chunks[k] = np.load(self._paths[k], mmap_mode=self._mmap_mode)
+        return self._chunks[k]
+
+    def _rows(self, start: int, stop: int) -> np.ndarray:
+        """Returns rows ``start:stop``, a view if they lie within one chunk."""
+        if stop <= start:
+            return np.empty((0, *self.shape[1:]), dtype=self.dtype)
+        first = int(np.searchsorted(self._offsets, start, side="right")) - 1
+        last = int(np.searchsorted(self._offsets, stop, side="left")) - 1
+        parts = [
+            self._chunk(k)[max(start - self._offsets[k], 0) : stop - self._offsets[k]]
+            for k in range(first, last + 1)
+        ]
+        rows = parts[0] if len(parts) == 1 else np.concatenate(parts)
+        return rows.astype(self.dtype, copy=False)
+
+    def __getitem__(self, key: Any) -> np.ndarray:
+        first, rest = (key[0], key[1:]) if isinstance(key, tuple) else (key, ())
+        if isinstance(first, int | np.integer):
+            i = int(first) + len(self) if first < 0 else int(first)
+            if not 0 <= i < len(self):
+                raise IndexError(f"index {first} out of range for length {len(self)}")
+            return self._rows(i, i + 1)[(0, *rest)]
+        if isinstance(first, slice) and first.step in (None, 1):
+            start, stop, _ = first.indices(len(self))
+            rows = self._rows(start, stop)
+        else:
+            rows = self._rows(0, len(self))[first]
+        return rows[(slice(None), *rest)] if rest else rows
+
+    def __array__(self, dtype: Any = None, copy: Any = None) -> np.ndarray:
+        array = np.array(self[:]) if copy else np.asarray(self[:])
+        return array if dtype is None else array.astype(dtype)
+
+
+class ChunkedArrays(Mapping[str, ChunkedArray]):
+    """Lazy mapping of the chunked arrays stored in ``dirpath``."""
+
+    def __init__(self, dirpath: PathType, mmap_mode: str = "r") -> None:
+        self.dirpath = pathlib.Path(dirpath)
+        self._index = _read_index(self.dirpath)
+        self._mmap_mode = mmap_mode
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({str(self.dirpath)!r}, keys={list(self)})"
+
+    def __getitem__(self, name: str) -> ChunkedArray:
+        meta = self._index[name]
+        return ChunkedArray(
+            paths=[
+                self.dirpath / f"{name}.{k}.npy" for k in range(len(meta["chunks"]))
+            ],
+            lengths=meta["chunks"],
+            shape=tuple(meta["shape"]),
+            dtype=np.dtype(meta["dtype"]),
+            mmap_mode=self._mmap_mode,
+        )
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+def load_chunked(dirpath: PathType, mmap_mode: str = "r") -> ChunkedArrays:
+    """Returns the arrays in ``dirpath`` as a lazy mapping of memory-mapped arrays."""
+    return ChunkedArrays(dirpath, mmap_mode=mmap_mode)
+
+
+def is_chunked(path: PathType) -> bool:
+    """Returns True if ``path`` is a directory of chunked arrays."""
+    return (pathlib.Path(path) / INDEX).exists()
+
+
+if __name__ == "__main__":
+    wavelengths = np.linspace(1.5, 1.6, 1000)
+    save_chunked(
+        "example.chunks",
+        chunk_size=300,
+        wavelengths=wavelengths,
+        s=np.exp(1j * wavelengths)[:, None, None] * np.ones((1, 4, 4)),
+    )
+    arrays = load_chunked("example.chunks")
+    print(arrays, arrays["s"], arrays["s"][290:310].shape)
+    shutil.rmtree("example.chunks")
@@ -6,6 +6,7 @@ from functools import partial
 from pathlib import Path
 
 import gdsfactory as gf
+import klayout.db as kdb
 import numpy as np
 from gdsfactory.config import GDSDIR_TEMP, PATH
 from gdsfactory.name import clean_value
@@ -19,13 +20,147 @@ def get_kwargs_hash(**kwargs) -> str:
     return hashlib.md5(kwargs_string.encode()).hexdigest()
 
 
-def get_component_hash(component: gf.Component) -> str:
-    gdspath = pathlib.Path(component.write_gds())
-    h = hashlib.md5(gdspath.read_bytes()).hexdigest()
-    gdspath.unlink()
+def _locked_cell_hashes(layout: kdb.Layout) -> dict[tuple[int, str, tuple], str]:
+    """Returns the hashes of locked cells memoized on the layout itself.
+
+    KLayout does not clear weak references when it destroys a layout, so the memo
+    is an attribute of the layout and goes away with it.
+    """
+    try:
+        return layout._gplugins_locked_cell_hashes
+    except AttributeError:
+        layout._gplugins_locked_cell_hashes = {}
+        return layout._gplugins_locked_cell_hashes
+
+
+def _get_cell_hash(
+    layout: kdb.Layout,
+    cell_index: int,
+    layers: list[tuple[int, str]],
+    memo: dict[int, str],
+) -> str:
+    """Returns the geometry hash of a cell, hashing each child cell once.
+
+    The hash only depends on the shapes per layer and on the child instances
+    (child hash, transformation and array vectors), not on cell names or on the
+    order in which shapes were inserted.
+    """
+    if cell_index in memo:
+        return memo[cell_index]
+
+    cell = layout.cell(cell_index)
+    locked_hashes = _locked_cell_hashes(layout)
+    locked_key = (cell_index, cell.name, tuple(layers))
+    if cell.is_locked() and locked_key in locked_hashes:
+        memo[cell_index] = locked_hashes[locked_key]
+        return memo[cell_index]
+
+    h = hashlib.md5()
+    for layer_index, layer_name in layers:
+        shapes = cell.shapes(layer_index)
+        if shapes.is_empty():
+            continue
+        h.update(layer_name.encode())
+        for shape in sorted(shape.to_s() for shape in shapes.each()):
+            h.update(shape.encode())
+
+    instances = []
+    for inst in cell.each_inst():
+        child_hash = _get_cell_hash(layout, inst.cell_index, layers, memo)
+        array = (
+            f"{inst.a} {inst.b} {inst.na} {inst.nb}" if inst.is_regular_array() else ""
+        )
+        instances.append(f"{child_hash} {inst.cplx_trans} {array}")
+    for inst in sorted(instances):
+        h.update(inst.encode())
+
+    memo[cell_index] = h.hexdigest()
+    if cell.is_locked():
+        locked_hashes[locked_key] = memo[cell_index]
+    return memo[cell_index]
+
+
+def _hash_layers(layout: kdb.Layout) -> list[tuple[int, str]]:
+    layers = []
+    for layer_index in layout.layer_indexes():
+        info = layout.get_info(layer_index)
+        name = f"{info.layer}/{info.datatype}" if info.layer >= 0 else info.name
+        layers.append((layer_index, name))
+    layers.sort(key=lambda layer: layer[1])
+    return layers
+
+
+def _hash_cell(cell: kdb.Cell) -> hashlib._Hash:
+    layout = cell.layout()
+    layers = _hash_layers(layout)
+    h = hashlib.md5(_get_cell_hash(layout, cell.cell_index(), layers, memo={}).encode())
+    h.update(str(layout.dbu).encode())
     return h
 
 
+def get_cell_hash(cell: kdb.Cell) -> str:
+    """Returns a geometry hash of a KLayout cell with its children and the dbu.
+
+    Args:
+        cell: cell to hash.
+    """
+    return _hash_cell(cell).hexdigest()
+
+
+def get_called_cell_hashes(cell: kdb.Cell) -> dict[str, str]:
+    """Returns the names of all cells below a KLayout cell to their geometry hashes.
+
+    :func:`get_cell_hash` ignores cell names. Combine both when the names matter,
+    for example in an extracted netlist.
+
+    Args:
+        cell: parent cell.
+    """
+    layout = cell.layout()
+    layers = _hash_layers(layout)
+    memo: dict[int, str] = {}
+    return {
+        layout.cell(i).name: _get_cell_hash(layout, i, layers, memo)
+        for i in cell.called_cells()
+    }
+
+
+def get_component_hash(component: gf.Component) -> str:
+    """Returns a geometry hash of a component computed from the KLayout cell hierarchy.
+
+    No GDS is written: shapes and instances are hashed in memory, shared subcells
+    are hashed once and hashes of locked cells are memoized across calls.
+
+    Args:
+        component: component to hash.
+    """
+    cell = component._kdb_cell
+    layout = cell.layout()
+    h = _hash_cell(cell)
+    for port in sorted(
+        f"{p.name} {p.dcplx_trans} {p.width} {layout.get_info(p.layer)} {p.port_type}"
+        for p in component.ports
+    ):
+        h.update(port.encode())
+    return h.hexdigest()
+
+
+def get_sparameters_key(component: ComponentSpec, **kwargs) -> str:
+    """Returns a content address for the Sparameters of a component.
+
+    Combines the component geometry hash with the simulation settings hash.
+    Use it as key for :class:`gplugins.common.utils.result_store.ResultStore`.
+
+    Args:
+        component: component or component factory.
+        kwargs: simulation settings.
+    """
+    component = gf.get_component(component)
+    component_hash = get_component_hash(component)
+    kwargs_hash = get_kwargs_hash(**kwargs)
+    return hashlib.md5((component_hash + kwargs_hash).encode()).hexdigest()
+
+
 def _get_sparameters_path(
     component: ComponentSpec,
     dirpath: PathType | None = PATH.sparameters,
@@ -52,9 +187,7 @@ def _get_sparameters_path(
         else dirpath
     )
 
-    component_hash = get_component_hash(component)
-    kwargs_hash = get_kwargs_hash(**kwargs)
-    simulation_hash = hashlib.md5((component_hash + kwargs_hash).encode()).hexdigest()
+    simulation_hash = get_sparameters_key(component, **kwargs)
 
     dirpath.mkdir(exist_ok=True, parents=True)
     return dirpath / f"{component.name}_{simulation_hash}.npz"
@@ -79,6 +212,10 @@ get_sparameters_path_meep = partial(_get_sparameters_path, tool="meep")
 get_sparameters_path_lumerical = partial(_get_sparameters_path, tool="lumerical")
 get_sparameters_path_tidy3d = partial(_get_sparameters_path, tool="tidy3d")
 
+get_sparameters_key_meow = partial(get_sparameters_key, tool="meow")
+get_sparameters_key_meep = partial(get_sparameters_key, tool="meep")
+get_sparameters_key_tidy3d = partial(get_sparameters_key, tool="tidy3d")
+
 get_sparameters_data_meep = partial(_get_sparameters_data, tool="meep")
 get_sparameters_data_lumerical = partial(_get_sparameters_data, tool="lumerical")
 get_sparameters_data_tidy3d = partial(_get_sparameters_data, tool="tidy3d")
@@ -0,0 +1,221 @@
+"""Run local solver subprocesses concurrently under a core budget."""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import io
+import os
+import subprocess
+import sys
+import threading
+from collections import deque
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from gplugins.common.utils.async_helpers import execute_and_stream_output
+
+
+@dataclass(frozen=True)
+class Command:
+    """A subprocess call of a job.
+
+    Args:
+        args: program and arguments, or a shell string.
+        log_file_str: log file name, see :func:`execute_and_stream_output`.
+        append: append to the log file instead of overwriting it.
+    """
+
+    args: Sequence[str] | str
+    log_file_str: str | None = None
+    append: bool = False
+
+
+class JobScheduler:
+    """Runs simulation jobs as subprocesses, keeping at most ``max_cores`` cores busy.
+
+    A job is a sequence of commands run one after the other (for example
+    ElmerGrid then ElmerSolver) that reserves ``cores`` cores while it runs.
+    Jobs run concurrently as long as their core budgets fit in ``max_cores``.
+    :meth:`submit` returns a :class:`concurrent.futures.Future` immediately.
+
+    The subprocesses are driven by an event loop in a background thread, so the
+    scheduler also works from Jupyter notebooks with a running event loop.
+
+    Args:
+        max_cores: total number of cores. Defaults to ``os.cpu_count()``.
+
+    Example:
+        with JobScheduler(max_cores=8) as scheduler:
+            futures = [
+                scheduler.submit(["ElmerSolver", sif], cores=2, cwd=folder)
+                for sif, folder in jobs
+            ]
+        results = [f.result() for f in futures]
+    """
+
+    def __init__(self, max_cores: int | None = None) -> None:
+        self.max_cores = max_cores or os.cpu_count() or 1
+        self._available = self.max_cores
+        self._condition: asyncio.Condition | None = None
+        self._futures: set[concurrent.futures.Future] = set()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="JobScheduler", daemon=True
+        )
+        self._thread.start()
+
+    def __enter__(self) -> JobScheduler:
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.shutdown(wait=True)
+
+    @property
+    def running_cores(self) -> int:
+        """Number of cores reserved by running jobs."""
+        return self.max_cores - self._available
+
+    def submit(
+        self,
+        *commands: Command | Sequence[str] | str,
+        cores: int = 1,
+        cwd: str | Path | None = None,
+        env: dict[str, str] | None = None,
+        log_file_dir: str | Path | None = None,
+        stream_stdout: io.TextIOWrapper | None = sys.stdout,
+        stream_stderr: io.TextIOWrapper | None = sys.stderr,
+        echo_interval: float = 0.0,
+        tail_lines: int = 50,
+        callback: Callable[[], Any] | None = None,
+    ) -> concurrent.futures.Future:
+        """Schedules a job and returns a future for its result.
+
+        Args:
+            commands: commands run one after the other. Strings run in a shell.
+            cores: cores reserved for the job, clipped to ``max_cores``.
+            cwd: working directory of the commands.
+            env: environment variables of the commands.
+            log_file_dir: directory for the log files. Defaults to ``cwd``.
+            stream_stdout: stream to echo stdout to.
+            stream_stderr: stream to echo stderr to.
+            echo_interval: minimum time in seconds between echoes to the streams.
+            tail_lines: number of last output lines kept for error reporting.
+            callback: called in a worker thread after the last command succeeded.
+                Its return value is the result of the future. Use it to read results.
+
+        The future raises :class:`subprocess.CalledProcessError` if a command fails,
+        with the last ``tail_lines`` lines of its stdout and stderr as ``output`` and
+        ``stderr``. The full output is in the log files.
+        """
+        if not self._thread.is_alive():
+            raise RuntimeError("cannot submit jobs after shutdown")
+        job = self._run(
+            [c if isinstance(c, Command) else Command(c) for c in commands],
+            cores=min(max(cores, 1), self.max_cores),
+            cwd=cwd,
+            env=env,
+            log_file_dir=Path(log_file_dir or cwd or Path.cwd()),
+            stream_stdout=stream_stdout,
+            stream_stderr=stream_stderr,
+            echo_interval=echo_interval,
+            tail_lines=tail_lines,
+            callback=callback,
+        )
+        future = asyncio.run_coroutine_threadsafe(job, self._loop)
+        self._futures.add(future)
+        future.add_done_callback(self._futures.discard)
+        return future
+
+    async def _run(
+        self,
+        commands: list[Command],
+        cores: int,
+        cwd: str | Path | None,
+        env: dict[str, str] | None,
+        log_file_dir: Path,
+        stream_stdout: io.TextIOWrapper | None,
+        stream_stderr: io.TextIOWrapper | None,
+        echo_interval: float,
+        tail_lines: int,
+        callback: Callable[[], Any] | None,
+    ) -> Any:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._available >= cores)
+            self._available -= cores
+        try:
+            for command in commands:
+                shell = isinstance(command.args, str)
+                stdout_tail = deque(maxlen=tail_lines)
+                stderr_tail = deque(maxlen=tail_lines)
+                proc = await execute_and_stream_output(
+                    command.args if shell else [str(arg) for arg in command.args],
+                    shell=shell,
+                    append=command.append,
+                    log_file_dir=log_file_dir,
+                    log_file_str=command.log_file_str,
+                    stream_stdout=stream_stdout,
+                    stream_stderr=stream_stderr,
+                    stdout_tail=stdout_tail,
+                    stderr_tail=stderr_tail,
+                    echo_interval=echo_interval,
+                    cwd=cwd,
+                    env=env,
+                )
+                if proc.returncode:
+                    raise subprocess.CalledProcessError(
+                        proc.returncode,
+                        command.args,
+                        output="\n".join(stdout_tail),
+                        stderr="\n".join(stderr_tail),
+                    )
+        finally:
+            async with self._condition:
+                self._available += cores
+                self._condition.notify_all()
+
+        if callback is not None:
+            return await asyncio.get_running_loop().run_in_executor(None, callback)
+        return None
+
+    async def _cancel(self) -> None:
+        tasks = asyncio.all_tasks() - {asyncio.current_task()}
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def wait(self) -> None:
+        """Blocks until all submitted jobs are done."""
+        concurrent.futures.wait(list(self._futures))
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stops the scheduler.
+
+        Unless ``wait``, pending jobs are cancelled and the subprocesses of
+        running jobs are terminated.
+        """
+        if wait:
+            self.wait()
+        elif self._thread.is_alive():
+            asyncio.run_coroutine_threadsafe(self._cancel(), self._loop).result()
+        if self._thread.is_alive():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+
+
+if __name__ == "__main__":
+    with JobScheduler(max_cores=2) as scheduler:
+        futures = [
+            scheduler.submit(
+                [sys.executable, "-c", f"import time; time.sleep(1); print({i})"],
+                callback=lambda i=i: i,
+            )
+            for i in range(4)
+        ]
+    print([f.result() for f in futures])
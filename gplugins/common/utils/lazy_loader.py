@@ -0,0 +1,80 @@
+"""Lazy attribute loading for packages (PEP 562).
+
+Plugin packages re-export functions from their submodules, which pulls in heavy
+solver dependencies as soon as the package is imported. With :func:`attach`
+submodules are only imported when one of their attributes is first accessed.
+
+Example:
+    __getattr__, __dir__, __all__ = attach(
+        __name__,
+        submodules=[".read"],
+        submod_attrs={".plot_model": ["plot_model"]},
+    )
+"""
+
+from __future__ import annotations
+
+import importlib
+import sys
+from collections.abc import Callable, Iterable
+from types import ModuleType
+from typing import Any
+
+
+class LazyModule(ModuleType):
+    """Package whose re-exported names are not shadowed by submodules of the same name.
+
+    Importing ``package.name`` sets the ``name`` attribute of the package to the
+    submodule. Eager ``from .name import name`` imports override it right away,
+    lazy packages skip it so ``package.name`` still resolves to the re-export.
+    """
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if (
+            isinstance(value, ModuleType)
+            and name in self.__dict__.get("__lazy_attrs__", ())
+            and value.__name__ == f"{self.__name__}.{name}"
+        ):
+            return
+        super().__setattr__(name, value)
+
+
+def attach(
+    package_name: str,
+    submodules: Iterable[str] = (),
+    submod_attrs: dict[str, Iterable[str]] | None = None,
+) -> tuple[Callable[[str], Any], Callable[[], list[str]], list[str]]:
+    """Returns ``__getattr__``, ``__dir__`` and ``__all__`` for a lazily loaded package.
+
+    Args:
+        package_name: ``__name__`` of the package.
+        submodules: modules exposed as attributes under their last name component.
+        submod_attrs: maps modules to the names they export.
+
+    Module names are absolute or, starting with a dot, relative to the package
+    as in :func:`importlib.import_module`.
+    """
+    submodules = {module.rsplit(".", 1)[-1]: module for module in submodules}
+    attr_to_module = {
+        attr: module for module, attrs in (submod_attrs or {}).items() for attr in attrs
+    }
+    __all__ = sorted(submodules.keys() | attr_to_module.keys())
+
+    package = sys.modules[package_name]
+    package.__lazy_attrs__ = frozenset(attr_to_module)
+    package.__class__ = LazyModule
+
+    def __getattr__(name: str) -> Any:
+        if name in submodules:
+            return importlib.import_module(submodules[name], package_name)
+        if name in attr_to_module:
+            module = importlib.import_module(attr_to_module[name], package_name)
+            value = getattr(module, name)
+            setattr(package, name, value)
+            return value
+        raise AttributeError(f"module {package_name!r} has no attribute {name!r}")
+
+    def __dir__() -> list[str]:
+        return sorted(set(vars(package)) | set(__all__))
+
+    return __getattr__, __dir__, __all__
@@ -0,0 +1,391 @@
+"""Content-addressed store for simulation results.
+
+Results are stored as one blob file per key in a sharded directory tree
+``dirpath / key[:2] / key``. Blobs are written atomically (temporary file +
+``os.replace``) so concurrent writers never leave half written files behind and
+readers never see them.
+
+Two index backends are available:
+
+- ``directory``: no index, the filesystem is the index. Access time is tracked
+  through the blob modification time.
+- ``sqlite``: a SQLite index (WAL mode) next to the blobs that keeps sizes and
+  access times, so stats, listing and eviction do not need to walk the tree.
+
+Example:
+    store = ResultStore(PATH.sparameters / "store", backend="sqlite", max_size_bytes=10e9)
+    key = store.key(component_hash, kwargs_hash)
+    sp = store.load_arrays(key)
+    if sp is None:
+        sp = run_simulation()
+        store.save_arrays(key, **sp)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import pathlib
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import Literal
+
+import numpy as np
+
+from gplugins.common.config import PATH
+
+PathType = str | pathlib.Path
+
+
+@dataclass(frozen=True)
+class StoreEntry:
+    key: str
+    size: int
+    accessed: float
+
+
+@dataclass(frozen=True)
+class StoreStats:
+    entries: int
+    size_bytes: int
+    max_size_bytes: int | None
+    hits: int
+    misses: int
+    evictions: int
+
+
+def _atomic_write(filepath: pathlib.Path, data: bytes) -> None:
+    """Writes ``data`` to ``filepath`` so that readers see either nothing or the full file."""
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=filepath.parent, prefix=".tmp_")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, filepath)
+    except BaseException:
+        pathlib.Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+class StoreBackend(ABC):
+    """Index of the blobs stored under ``dirpath``."""
+
+    def __init__(self, dirpath: PathType) -> None:
+        self.dirpath = pathlib.Path(dirpath)
+        self.dirpath.mkdir(parents=True, exist_ok=True)
+
+    def path(self, key: str) -> pathlib.Path:
+        return self.dirpath / key[:2] / key
+
+    @abstractmethod
+    def record(self, key: str, size: int) -> None:
+        """Registers a freshly written blob."""
+
+    @abstractmethod
+    def touch(self, key: str) -> None:
+        """Marks ``key`` as recently used."""
+
+    @abstractmethod
+    def forget(self, key: str) -> None:
+        """Removes ``key`` from the index, before its blob is deleted."""
+
+    @abstractmethod
+    def entries(self) -> Iterator[StoreEntry]:
+        """Yields all entries, least recently used first."""
+
+    @abstractmethod
+    def size_bytes(self) -> int:
+        """Returns the total size of all blobs."""
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.entries())
+
+
+class DirectoryBackend(StoreBackend):
+    """Uses the blob files themselves as index."""
+
+    def __init__(self, dirpath: PathType) -> None:
+        super().__init__(dirpath)
+        self._size: int | None = None
+
+    def _scan(self) -> list[StoreEntry]:
+        entries = []
+        for shard in os.scandir(self.dirpath):
+            if not shard.is_dir() or len(shard.name) != 2:
+                continue
+            for blob in os.scandir(shard.path):
+                if blob.name.startswith(".tmp_"):
+                    continue
+                try:
+                    st = blob.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append(StoreEntry(blob.name, st.st_size, st.st_mtime))
+        entries.sort(key=lambda e: e.accessed)
+        self._size = sum(e.size for e in entries)
+        return entries
+
+    def record(self, key: str, size: int) -> None:
+        if self._size is not None:
+            self._size += size
+
+    def touch(self, key: str) -> None:
+        try:
+            os.utime(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def forget(self, key: str) -> None:
+        if self._size is None:
+            return
+        try:
+            self._size -= self.path(key).stat().st_size
+        except FileNotFoundError:
+            pass
+
+    def entries(self) -> Iterator[StoreEntry]:
+        yield from self._scan()
+
+    def size_bytes(self) -> int:
+        if self._size is None:
+            self._scan()
+        return self._size
+
+
+class SQLiteBackend(StoreBackend):
+    """Keeps sizes and access times in a SQLite index (WAL mode)."""
+
+    def __init__(self, dirpath: PathType, filename: str = "index.sqlite") -> None:
+        super().__init__(dirpath)
+        self.filepath = self.dirpath / filename
+        self._lock = threading.Lock()
+        self._pid: int | None = None
+        self._conn: sqlite3.Connection | None = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # connections must not be shared across forked processes
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(
+                self.filepath, timeout=60, isolation_level=None, check_same_thread=False
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries "
+                "(key TEXT PRIMARY KEY, size INTEGER, accessed REAL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)"
+            )
+            self._pid = os.getpid()
+        return self._conn
+
+    def _execute(self, sql: str, params: tuple = ()) -> list[tuple]:
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def record(self, key: str, size: int) -> None:
+        self._execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?)", (key, size, time.time())
+        )
+
+    def touch(self, key: str) -> None:
+        self._execute("UPDATE entries SET accessed=? WHERE key=?", (time.time(), key))
+
+    def forget(self, key: str) -> None:
+        self._execute("DELETE FROM entries WHERE key=?", (key,))
+
+    def entries(self) -> Iterator[StoreEntry]:
+        rows = self._execute(
+            "SELECT key, size, accessed FROM entries ORDER BY accessed"
+        )
+        for row in rows:
+            yield StoreEntry(*row)
+
+    def size_bytes(self) -> int:
+        return self._execute("SELECT COALESCE(SUM(size), 0) FROM entries")[0][0]
+
+    def __len__(self) -> int:
+        return self._execute("SELECT COUNT(*) FROM entries")[0][0]
+
+
+backends: dict[str, type[StoreBackend]] = {
+    "directory": DirectoryBackend,
+    "sqlite": SQLiteBackend,
+}
+
+
+class ResultStore:
+    """Content-addressed blob store with size-capped LRU eviction.
+
+    Args:
+        dirpath: directory holding the blobs (and the index for the sqlite backend).
+        backend: "directory", "sqlite" or a :class:`StoreBackend` instance.
+        max_size_bytes: evicts least recently used entries when the store grows
+            beyond this size. None for unbounded.
+    """
+
+    def __init__(
+        self,
+        dirpath: PathType = PATH.results,
+        backend: Literal["directory", "sqlite"] | StoreBackend = "directory",
+        max_size_bytes: float | None = None,
+    ) -> None:
+        self.backend = (
+            backend if isinstance(backend, StoreBackend) else backends[backend](dirpath)
+        )
+        self.dirpath = self.backend.dirpath
+        self.max_size_bytes = int(max_size_bytes) if max_size_bytes else None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({str(self.dirpath)!r}, backend={type(self.backend).__name__})"
+
+    @staticmethod
+    def key(*parts: str | bytes) -> str:
+        """Returns the content address for a sequence of strings or bytes."""
+        h = hashlib.sha256()
+        for part in parts:
+            h.update(part if isinstance(part, bytes) else part.encode())
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def path(self, key: str) -> pathlib.Path:
+        """Returns the blob path for ``key``, whether it exists or not."""
+        return self.backend.path(key)
+
+    def __contains__(self, key: str) -> bool:
+        return self.path(key).exists()
+
+    def get_path(self, key: str) -> pathlib.Path | None:
+        """Returns the blob path for ``key`` or None on a miss."""
+        filepath = self.path(key)
+        if not filepath.exists():
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.backend.touch(key)
+        return filepath
+
+    def get_bytes(self, key: str) -> bytes | None:
+        filepath = self.get_path(key)
+        if filepath is None:
+            return None
+        try:
+            return filepath.read_bytes()
+        except FileNotFoundError:  # evicted by another process
+            self.hits -= 1
+            self.misses += 1
+            return None
+
+    def put_bytes(self, key: str, data: bytes) -> pathlib.Path:
+        filepath = self.path(key)
+        if filepath.exists():  # replaced blobs no longer count in the size
+            self.backend.forget(key)
+        _atomic_write(filepath, data)
+        self.backend.record(key, len(data))
+        if self.max_size_bytes is not None:
+            self.prune(max_size_bytes=self.max_size_bytes, keep=(key,))
+        return filepath
+
+    def load_arrays(self, key: str) -> dict[str, np.ndarray] | None:
+        """Returns the arrays saved under ``key`` or None on a miss."""
+        data = self.get_bytes(key)
+        if data is None:
+            return None
+        return dict(np.load(io.BytesIO(data)))
+
+    def save_arrays(
+        self, key: str, compressed: bool = True, **arrays: np.ndarray
+    ) -> pathlib.Path:
+        """Saves arrays as npz under ``key`` and returns the blob path."""
+        buffer = io.BytesIO()
+        (np.savez_compressed if compressed else np.savez)(buffer, **arrays)
+        return self.put_bytes(key, buffer.getvalue())
+
+    def remove(self, key: str) -> bool:
+        """Removes ``key``. Returns True if it existed."""
+        filepath = self.path(key)
+        self.backend.forget(key)
+        try:
+            filepath.unlink()
+        except FileNotFoundError:
+            return False
+        return True
+
+    def keys(self) -> list[str]:
+        """Returns all keys, least recently used first."""
+        return [e.key for e in self.backend.entries()]
+
+    def __len__(self) -> int:
+        return len(self.backend)
+
+    def stats(self) -> StoreStats:
+        return StoreStats(
+            entries=len(self.backend),
+            size_bytes=self.backend.size_bytes(),
+            max_size_bytes=self.max_size_bytes,
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+        )
+
+    def prune(
+        self,
+        max_size_bytes: float | None = None,
+        max_age_seconds: float | None = None,
+        keep: tuple[str, ...] = (),
+    ) -> int:
+        """Evicts entries and returns how many were removed.
+
+        Args:
+            max_size_bytes: removes least recently used entries until the store fits.
+            max_age_seconds: removes entries not accessed within this time.
+            keep: keys that are never evicted.
+        """
+        # entries are only listed when there is something to evict
+        too_big = (
+            max_size_bytes is not None and self.backend.size_bytes() > max_size_bytes
+        )
+        if not too_big and max_age_seconds is None:
+            return 0
+
+        entries = list(self.backend.entries())
+        size = sum(e.size for e in entries)
+        now = time.time()
+        removed = 0
+        for e in entries:
+            if e.key in keep:
+                continue
+            expired = max_age_seconds is not None and now - e.accessed > max_age_seconds
+            too_big = max_size_bytes is not None and size > max_size_bytes
+            if not (expired or too_big):
+                if max_age_seconds is None:
+                    break
+                continue
+            if self.remove(e.key):
+                removed += 1
+            size -= e.size
+        self.evictions += removed
+        return removed
+
+    def clear(self) -> int:
+        """Removes all entries."""
+        return self.prune(max_size_bytes=0)
+
+
+if __name__ == "__main__":
+    store = ResultStore(PATH.results / "example", backend="sqlite")
+    key = store.key("mmi1x2", "wavelength=1.55")
+    store.save_arrays(key, wavelengths=np.linspace(1.5, 1.6, 3))
+    print(store.load_arrays(key))
+    print(store.stats())
@@ -0,0 +1,307 @@
+"""Dense S-parameter container shared across solvers.
+
+Solvers write S-parameters as dicts of ``"port_in@mode_in,port_out@mode_out"``
+keys to arrays over wavelength plus a ``wavelengths`` entry. :class:`SParameters`
+holds the same data as one ``(n_wl, N, N)`` complex array with a port/mode index
+map, where ``s[:, i, j]`` is the ``f"{port_modes[i]},{port_modes[j]}"`` entry.
+
+Example:
+    sp = SParameters.from_npz("mmi1x2.npz")
+    sp["o1@0,o2@0"]  # view into sp.s
+    sp.interp(np.linspace(1.5, 1.6, 1001)).save_npz("mmi1x2_dense.npz")
+
+For large results :meth:`SParameters.save_chunked` and
+:meth:`SParameters.from_chunked` store the array uncompressed and memory-map it.
+"""
+
+from __future__ import annotations
+
+import pathlib
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+
+import numpy as np
+
+from gplugins.common.utils.chunked_arrays import CHUNK_SIZE, load_chunked, save_chunked
+
+PathType = str | pathlib.Path
+
+
+def _port_mode(name: str) -> str:
+    """Returns ``port@mode``, defaulting to the fundamental mode."""
+    return name if "@" in name else f"{name}@0"
+
+
+@dataclass(eq=False)
+class SParameters:
+    """S-parameters as a dense ``(n_wl, N, N)`` complex array.
+
+    Args:
+        wavelengths: (n_wl,) wavelengths in um.
+        s: (n_wl, N, N) complex S-parameters. ``s[:, i, j]`` goes from
+            ``port_modes[i]`` to ``port_modes[j]``.
+        port_modes: N names as ``port@mode``.
+    """
+
+    wavelengths: np.ndarray
+    s: np.ndarray
+    port_modes: tuple[str, ...]
+
+    def __post_init__(self) -> None:
+        self.wavelengths = np.asarray(self.wavelengths, dtype=float)
+        self.s = np.asarray(self.s)
+        self.port_modes = tuple(_port_mode(str(p)) for p in self.port_modes)
+        n = len(self.port_modes)
+        if self.s.shape != (len(self.wavelengths), n, n):
+            raise ValueError(
+                f"s has shape {self.s.shape}, expected "
+                f"{(len(self.wavelengths), n, n)} for {len(self.wavelengths)} "
+                f"wavelengths and {n} port modes"
+            )
+        self.index = {p: i for i, p in enumerate(self.port_modes)}
+        if len(self.index) != n:
+            raise ValueError(f"Duplicated port modes in {self.port_modes}")
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(n_wavelengths={len(self.wavelengths)}, "
+            f"port_modes={list(self.port_modes)})"
+        )
+
+    def __len__(self) -> int:
+        return len(self.port_modes)
+
+    @property
+    def ports(self) -> list[str]:
+        """Port names without modes, in order of first appearance."""
+        return list(dict.fromkeys(p.split("@")[0] for p in self.port_modes))
+
+    def _indices(self, key: str | tuple[str, str]) -> tuple[int, int]:
+        port_in, port_out = key.split(",") if isinstance(key, str) else key
+        return self.index[_port_mode(port_in)], self.index[_port_mode(port_out)]
+
+    def __getitem__(self, key: str | tuple[str, str]) -> np.ndarray:
+        """Returns a view of ``"o1@0,o2@0"`` or ``("o1", "o2")`` over wavelength."""
+        i, j = self._indices(key)
+        return self.s[:, i, j]
+
+    def __contains__(self, key: str | tuple[str, str]) -> bool:
+        try:
+            self._indices(key)
+        except (KeyError, ValueError):
+            return False
+        return True
+
+    # Selection
+
+    def sel(
+        self,
+        wavelength_min: float | None = None,
+        wavelength_max: float | None = None,
+    ) -> SParameters:
+        """Returns the wavelength range as a view. Wavelengths must be sorted."""
+        start = (
+            None
+            if wavelength_min is None
+            else np.searchsorted(self.wavelengths, wavelength_min, side="left")
+        )
+        stop = (
+            None
+            if wavelength_max is None
+            else np.searchsorted(self.wavelengths, wavelength_max, side="right")
+        )
+        return SParameters(
+            self.wavelengths[start:stop], self.s[start:stop], self.port_modes
+        )
+
+    def subset(self, port_modes: Iterable[str]) -> SParameters:
+        """Returns the S-parameters between ``port_modes`` only (copy)."""
+        port_modes = [_port_mode(p) for p in port_modes]
+        idx = [self.index[p] for p in port_modes]
+        return SParameters(self.wavelengths, self.s[:, idx][:, :, idx], port_modes)
+
+    def sorted(self) -> SParameters:
+        """Returns the S-parameters sorted by increasing wavelength."""
+        order = np.argsort(self.wavelengths, kind="stable")
+        if np.all(order[1:] > order[:-1]):
+            return self
+        return SParameters(self.wavelengths[order], self.s[order], self.port_modes)
+
+    def interp(self, wavelengths: np.ndarray) -> SParameters:
+        """Linearly interpolates all entries at once, as :func:`numpy.interp` does for one.
+
+        Outside the wavelength range the values at the edges are repeated.
+        Wavelengths must be sorted.
+        """
+        wavelengths = np.atleast_1d(np.asarray(wavelengths, dtype=float))
+        x = self.wavelengths
+        if len(x) == 1:
+            s = np.broadcast_to(self.s, (len(wavelengths), *self.s.shape[1:])).copy()
+            return SParameters(wavelengths, s, self.port_modes)
+
+        i = np.clip(np.searchsorted(x, wavelengths), 1, len(x) - 1)
+        t = np.clip((wavelengths - x[i - 1]) / (x[i] - x[i - 1]), 0, 1)
+        t = t[:, None, None]
+        s = self.s[i - 1] * (1 - t) + self.s[i] * t
+        return SParameters(wavelengths, s, self.port_modes)
+
+    # Conversion to and from the dict format
+
+    @classmethod
+    def from_dict(
+        cls, sp: Mapping[str, np.ndarray], xkey: str = "wavelengths"
+    ) -> SParameters:
+        """Returns S-parameters from a ``{"o1@0,o2@0": array, xkey: wavelengths}`` dict.
+
+        Missing entries are zero.
+        """
+        if xkey not in sp:
+            raise ValueError(f"{xkey!r} not in {list(sp.keys())}")
+        keys = [k for k in sp.keys() if "," in k]
+        pairs = [tuple(_port_mode(p) for p in k.split(",")) for k in keys]
+        port_modes = list(dict.fromkeys(p for pair in pairs for p in pair))
+        index = {p: i for i, p in enumerate(port_modes)}
+
+        wavelengths = np.asarray(sp[xkey])
+        n = len(port_modes)
+        s = np.zeros((len(wavelengths), n, n), dtype=complex)
+        if keys:
+            i, j = np.array([(index[a], index[b]) for a, b in pairs]).T
+            s[:, i, j] = np.stack([np.asarray(sp[k]) for k in keys], axis=-1)
+        return cls(wavelengths, s, port_modes)
+
+    def to_dict(self, xkey: str = "wavelengths") -> dict[str, np.ndarray]:
+        """Returns the ``{"o1@0,o2@0": array, xkey: wavelengths}`` dict of views into ``s``."""
+        sp = {
+            f"{p1},{p2}": self.s[:, i, j]
+            for i, p1 in enumerate(self.port_modes)
+            for j, p2 in enumerate(self.port_modes)
+        }
+        sp[xkey] = self.wavelengths
+        return sp
+
+    @classmethod
+    def from_sdense(
+        cls, sdense: tuple[np.ndarray, Mapping[str, int]], wavelengths: np.ndarray
+    ) -> SParameters:
+        """Returns S-parameters from a sax ``SDense`` ``(S, port_map)`` tuple."""
+        S, port_map = sdense
+        S = np.asarray(S)
+        if S.ndim == 2:
+            S = S[None]
+        port_modes = sorted(port_map, key=port_map.__getitem__)
+        idx = [port_map[p] for p in port_modes]
+        if idx != list(range(S.shape[-1])):
+            S = S[..., idx, :][..., idx]
+        return cls(wavelengths, S, port_modes)
+
+    def to_sdense(self) -> tuple[np.ndarray, dict[str, int]]:
+        """Returns a sax ``SDense`` ``(S, port_map)`` tuple without copying ``s``.
+
+        Ports are named ``port@mode`` unless all of them are fundamental modes.
+        """
+        names = (
+            [p.split("@")[0] for p in self.port_modes]
+            if all(p.endswith("@0") for p in self.port_modes)
+            else self.port_modes
+        )
+        return self.s, {name: i for i, name in enumerate(names)}
+
+    # Files
+
+    def save_npz(self, filepath: PathType, compressed: bool = True) -> pathlib.Path:
+        """Saves ``wavelengths``, ``s`` and ``port_modes`` arrays to a npz file."""
+        filepath = pathlib.Path(filepath)
+        (np.savez_compressed if compressed else np.savez)(
+            filepath,
+            wavelengths=self.wavelengths,
+            s=self.s,
+            port_modes=np.array(self.port_modes),
+        )
+        return filepath
+
+    @classmethod
+    def from_npz(cls, filepath: PathType, xkey: str = "wavelengths") -> SParameters:
+        """Loads S-parameters saved by :meth:`save_npz` or written as a dict by the solvers."""
+        with np.load(filepath) as data:
+            if "s" in data and "port_modes" in data:
+                return cls(data[xkey], data["s"], tuple(data["port_modes"]))
+            return cls.from_dict(dict(data), xkey=xkey)
+
+    def save_chunked(
+        self, dirpath: PathType, chunk_size: int = CHUNK_SIZE
+    ) -> pathlib.Path:
+        """Saves S-parameters uncompressed in wavelength chunks, see :func:`save_chunked`."""
+        return save_chunked(
+            dirpath,
+            chunk_size=chunk_size,
+            wavelengths=self.wavelengths,
+            s=self.s,
+            port_modes=np.array(self.port_modes),
+        )
+
+    @classmethod
+    def from_chunked(
+        cls,
+        dirpath: PathType,
+        wavelength_min: float | None = None,
+        wavelength_max: float | None = None,
+    ) -> SParameters:
+        """Memory-maps S-parameters saved by :meth:`save_chunked`.
+
+        Only the chunks of the sorted wavelength range
+        ``[wavelength_min, wavelength_max]`` are read.
+        """
+        arrays = load_chunked(dirpath)
+        wavelengths = np.asarray(arrays["wavelengths"])
+        start = (
+            None
+            if wavelength_min is None
+            else np.searchsorted(wavelengths, wavelength_min, side="left")
+        )
+        stop = (
+            None
+            if wavelength_max is None
+            else np.searchsorted(wavelengths, wavelength_max, side="right")
+        )
+        return cls(
+            wavelengths[start:stop],
+            arrays["s"][start:stop],
+            tuple(np.asarray(arrays["port_modes"])),
+        )
+
+    def save_hdf5(self, filepath: PathType) -> pathlib.Path:
+        """Saves S-parameters to an HDF5 file (requires h5py)."""
+        import h5py
+
+        filepath = pathlib.Path(filepath)
+        with h5py.File(filepath, "w") as f:
+            f.create_dataset("wavelengths", data=self.wavelengths)
+            f.create_dataset("s", data=self.s, chunks=True)
+            f.attrs["port_modes"] = list(self.port_modes)
+        return filepath
+
+    @classmethod
+    def from_hdf5(cls, filepath: PathType) -> SParameters:
+        """Loads S-parameters saved by :meth:`save_hdf5` (requires h5py)."""
+        import h5py
+
+        with h5py.File(filepath, "r") as f:
+            return cls(
+                f["wavelengths"][()],
+                f["s"][()],
+                tuple(str(p) for p in f.attrs["port_modes"]),
+            )
+
+
+if __name__ == "__main__":
+    wavelengths = np.linspace(1.5, 1.6, 3)
+    sp = SParameters.from_dict(
+        {
+            "o1@0,o2@0": np.exp(1j * wavelengths),
+            "o2@0,o1@0": np.exp(1j * wavelengths),
+            "wavelengths": wavelengths,
+        }
+    )
+    print(sp, sp["o1,o2"])
+    print(sp.interp(np.linspace(1.5, 1.6, 5))["o2@0,o1@0"])
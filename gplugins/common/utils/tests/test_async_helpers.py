@@ -0,0 +1,31 @@
+import asyncio
+import io
+import sys
+from collections import deque
+
+from gplugins.common.utils.async_helpers import execute_and_stream_output
+
+
+def test_execute_and_stream_output(tmp_path) -> None:
+    script = "for i in range(20000): print(f'line {i}', 'é' * (i % 3))"
+    out = io.StringIO()
+    tail = deque(maxlen=3)
+
+    proc = asyncio.run(
+        execute_and_stream_output(
+            [sys.executable, "-c", script],
+            shell=False,
+            log_file_dir=tmp_path,
+            log_file_str="chatty",
+            stream_stdout=out,
+            stdout_tail=tail,
+            echo_interval=0.05,
+        )
+    )
+    assert proc.returncode == 0
+
+    lines = (tmp_path / "chatty_out.log").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 20000
+    assert lines[-1] == "line 19999 é"
+    assert out.getvalue().splitlines() == lines
+    assert list(tail) == ["line 19997 éé", "line 19998 ", "line 19999 é"]
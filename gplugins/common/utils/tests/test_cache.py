@@ -0,0 +1,119 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from gplugins.common.utils.cache import disk_cache
+
+
+def _square(dirpath, n):
+    @disk_cache(dirpath)
+    def square(n):
+        return n**2
+
+    return square(n)
+
+
+def test_disk_cache(tmp_path) -> None:
+    calls = []
+
+    @disk_cache(tmp_path)
+    def arange(n, power=1):
+        calls.append(n)
+        return np.arange(n) ** power
+
+    np.testing.assert_array_equal(arange(4), np.arange(4))
+    np.testing.assert_array_equal(arange(4), np.arange(4))
+    np.testing.assert_array_equal(arange(4, power=2), np.arange(4) ** 2)
+    assert calls == [4, 4]
+
+    info = arange.cache_info()
+    assert (info.hits, info.misses) == (1, 2)
+    assert len(arange.store) == 2
+
+
+def test_disk_cache_version_and_ttl(tmp_path) -> None:
+    calls = []
+
+    def get_function(version, ttl=None):
+        @disk_cache(tmp_path, version=version, ttl=ttl)
+        def f(x):
+            calls.append(version)
+            return version
+
+        return f
+
+    assert get_function("v1")(1) == "v1"
+    assert get_function("v1")(1) == "v1"
+    assert get_function("v2")(1) == "v2"
+    assert calls == ["v1", "v2"]
+
+    f = get_function("v2", ttl=-1)
+    assert f(1) == "v2"
+    assert f.cache_info().expired == 1
+    assert calls == ["v1", "v2", "v2"]
+
+
+def test_disk_cache_removes_expired(tmp_path) -> None:
+    def get_function(ttl=None):
+        @disk_cache(tmp_path, ttl=ttl)
+        def f(x):
+            if ttl is not None:
+                raise ValueError("expired")
+            return x
+
+        return f
+
+    assert get_function()(1) == 1
+    f = get_function(ttl=-1)
+    assert len(f.store) == 1
+    with pytest.raises(ValueError, match="expired"):
+        f(1)
+    assert len(f.store) == 0
+
+
+def test_disk_cache_per_function(tmp_path) -> None:
+    @disk_cache(tmp_path)
+    def f(x):
+        return x
+
+    @disk_cache(tmp_path)
+    def g(x):
+        return -x
+
+    assert (f(1), g(1)) == (1, -1)
+    assert f.store.dirpath != g.store.dirpath
+    f.cache_clear()
+    assert len(f.store) == 0
+    assert len(g.store) == 1
+    assert g(1) == -1
+    assert g.cache_info().hits == 1
+
+
+def test_disk_cache_processes(tmp_path) -> None:
+    with multiprocessing.get_context("spawn").Pool(2) as pool:
+        results = pool.starmap(_square, [(tmp_path, n % 8) for n in range(32)])
+    assert results == [(n % 8) ** 2 for n in range(32)]
+    assert len(list(tmp_path.glob("*/*/*"))) == 8
+
+
+def test_disk_cache_canonical_key(tmp_path) -> None:
+    calls = []
+
+    @disk_cache(tmp_path)
+    def f(n, options=None, scale=1.0):
+        calls.append(n)
+        return n
+
+    f(4, {"a": 1, "b": 2})
+    f(n=4, options={"b": 2, "a": 1})
+    f(4, options={"a": 1, "b": 2}, scale=1.0)
+    f(np.int64(4), {"a": np.int64(1), "b": 2}, np.float64(1.0))
+    assert len(calls) == 1
+
+    # floats are not rounded
+    f(4, {"a": 1, "b": 2}, scale=1.0001)
+    f(4, {"a": 1, "b": 2}, scale=np.arange(3))
+    f(4, {"a": 1, "b": 2}, scale=np.arange(3.0))
+    assert len(calls) == 4
+    assert len(f.store) == 4
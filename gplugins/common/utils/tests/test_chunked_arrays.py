@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from gplugins.common.utils.chunked_arrays import (
+    append_chunks,
+    is_chunked,
+    load_chunked,
+    save_chunked,
+)
+from gplugins.common.utils.sparameters import SParameters
+
+
+def test_chunked_arrays(tmp_path) -> None:
+    rng = np.random.default_rng(0)
+    s = rng.normal(size=(100, 3, 3)) + 1j
+    dirpath = save_chunked(
+        tmp_path / "sp", chunk_size=30, s=s, ports=np.array(["o1", "o2", "o3"])
+    )
+    assert is_chunked(dirpath)
+
+    arrays = load_chunked(dirpath)
+    assert set(arrays) == {"s", "ports"}
+    chunked = arrays["s"]
+    assert chunked.shape == s.shape and chunked.dtype == s.dtype
+
+    view = chunked[31:59]
+    assert isinstance(view.base, np.memmap)  # within one chunk, no copy
+    np.testing.assert_array_equal(view, s[31:59])
+    np.testing.assert_array_equal(chunked[25:95, 1], s[25:95, 1])
+    np.testing.assert_array_equal(chunked[-1], s[-1])
+    np.testing.assert_array_equal(chunked[::7], s[::7])
+    np.testing.assert_array_equal(np.asarray(chunked), s)
+    assert list(np.asarray(arrays["ports"])) == ["o1", "o2", "o3"]
+    with pytest.raises(IndexError):
+        chunked[100]
+
+
+def test_append_chunks(tmp_path) -> None:
+    for start in range(0, 10, 4):
+        append_chunks(tmp_path, wavelengths=np.arange(start, min(start + 4, 10)))
+    np.testing.assert_array_equal(
+        np.asarray(load_chunked(tmp_path)["wavelengths"]), np.arange(10)
+    )
+    with pytest.raises(ValueError):
+        append_chunks(tmp_path, wavelengths=np.zeros((2, 2)))
+    with pytest.raises(ValueError):
+        append_chunks(tmp_path, wavelengths=np.array(["o1"]))
+
+
+def test_append_chunks_widens_dtype(tmp_path) -> None:
+    append_chunks(tmp_path, ports=np.array(["o1", "o2"]), s=np.ones(2, np.float32))
+    append_chunks(tmp_path, ports=np.array(["o10"]), s=np.array([1 + 1e-9]))
+    arrays = load_chunked(tmp_path)
+    assert arrays["ports"].dtype == np.dtype("<U3")
+    assert list(np.asarray(arrays["ports"])) == ["o1", "o2", "o10"]
+    assert arrays["ports"][0:2].dtype == np.dtype("<U3")
+    assert arrays["s"].dtype == np.float64
+    assert arrays["s"][2] == 1 + 1e-9
+
+
+def test_sparameters_chunked(tmp_path) -> None:
+    wavelengths = np.linspace(1.5, 1.6, 101)
+    sp = SParameters.from_dict(
+        {
+            "o1@0,o2@0": np.exp(1j * wavelengths),
+            "o2@0,o1@0": np.exp(2j * wavelengths),
+            "wavelengths": wavelengths,
+        }
+    )
+    sp.save_chunked(tmp_path / "sp", chunk_size=16)
+
+    window = SParameters.from_chunked(tmp_path / "sp", 1.55, 1.56)
+    assert window.port_modes == sp.port_modes
+    np.testing.assert_allclose(window.wavelengths, wavelengths[50:61])
+    np.testing.assert_array_equal(window.s, sp.s[50:61])
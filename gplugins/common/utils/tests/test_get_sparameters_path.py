@@ -0,0 +1,58 @@
+import gdsfactory as gf
+import klayout.db as kdb
+
+from gplugins.common.utils.get_sparameters_path import (
+    _locked_cell_hashes,
+    get_cell_hash,
+    get_component_hash,
+)
+
+
+def test_component_hash_is_deterministic() -> None:
+    h = get_component_hash(gf.components.mzi())
+    assert h == get_component_hash(gf.components.mzi())
+    assert h != get_component_hash(gf.components.mzi(delta_length=11))
+
+
+def test_component_hash_ignores_names_and_shape_order() -> None:
+    c1 = gf.Component()
+    c1.add_polygon([(0, 0), (1, 0), (1, 1)], layer=(1, 0))
+    c1.add_polygon([(5, 5), (6, 5), (6, 6)], layer=(1, 0))
+    c1.add_port(name="o1", center=(0, 0.5), width=0.5, orientation=180, layer=(1, 0))
+
+    c2 = gf.Component()
+    c2.add_polygon([(5, 5), (6, 5), (6, 6)], layer=(1, 0))
+    c2.add_polygon([(0, 0), (1, 0), (1, 1)], layer=(1, 0))
+    c2.add_port(name="o1", center=(0, 0.5), width=0.5, orientation=180, layer=(1, 0))
+    assert get_component_hash(c1) == get_component_hash(c2)
+
+    c2.add_polygon([(0, 0), (1, 0), (1, 1)], layer=(2, 0))
+    assert get_component_hash(c1) != get_component_hash(c2)
+
+
+def test_component_hash_includes_instances() -> None:
+    child = gf.components.rectangle(size=(1, 1), layer=(1, 0))
+    c1 = gf.Component()
+    c1.add_ref(child)
+    c2 = gf.Component()
+    c2.add_ref(child).dmovex(1)
+    assert get_component_hash(c1) != get_component_hash(c2)
+
+
+def test_locked_cell_hashes_follow_their_layout() -> None:
+    def locked_layout(size: int) -> kdb.Layout:
+        layout = kdb.Layout()
+        cell = layout.create_cell("TOP")
+        cell.shapes(layout.layer(1, 0)).insert(kdb.Box(size))
+        cell.locked = True
+        return layout
+
+    layout = locked_layout(10)
+    h = get_cell_hash(layout.top_cell())
+    assert get_cell_hash(layout.top_cell()) == h
+    assert len(_locked_cell_hashes(layout)) == 1
+
+    # another layout with the same cell index and name keeps its own hash
+    other = locked_layout(20)
+    assert get_cell_hash(other.top_cell()) != h
+    assert get_cell_hash(layout.top_cell()) == h
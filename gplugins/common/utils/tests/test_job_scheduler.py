@@ -0,0 +1,82 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from gplugins.common.utils.job_scheduler import Command, JobScheduler
+
+
+def _sleep(seconds: float) -> list[str]:
+    return [sys.executable, "-c", f"import time; time.sleep({seconds})"]
+
+
+def test_job_scheduler_core_budget(tmp_path) -> None:
+    script = (
+        "import sys, time; t0 = time.time(); time.sleep(0.2); "
+        "open(sys.argv[1], 'w').write(f'{t0} {time.time()}')"
+    )
+    with JobScheduler(max_cores=3) as scheduler:
+        futures = [
+            scheduler.submit(
+                [sys.executable, "-c", script, f"{i}.txt"],
+                cores=2,
+                cwd=tmp_path,
+                callback=lambda i=i: (tmp_path / f"{i}.txt").read_text().split(),
+            )
+            for i in range(3)
+        ]
+    intervals = sorted(tuple(map(float, f.result())) for f in futures)
+    # jobs of 2 cores never overlap on 3 cores
+    for (_, end), (start, _) in zip(intervals, intervals[1:]):
+        assert end <= start
+    assert scheduler.running_cores == 0
+
+
+def test_job_scheduler_runs_commands_in_order(tmp_path) -> None:
+    script = "import sys; open('out.txt', 'a').write(sys.argv[1])"
+    with JobScheduler(max_cores=1) as scheduler:
+        future = scheduler.submit(
+            [sys.executable, "-c", script, "a"],
+            Command([sys.executable, "-c", script, "b"], log_file_str="second"),
+            cwd=tmp_path,
+            callback=lambda: (tmp_path / "out.txt").read_text(),
+            stream_stdout=None,
+        )
+        assert future.result() == "ab"
+    assert (tmp_path / "second_out.log").exists()
+
+
+def test_job_scheduler_failure(tmp_path) -> None:
+    with JobScheduler(max_cores=2) as scheduler:
+        failing = scheduler.submit(
+            [sys.executable, "-c", "import sys; sys.exit('solver diverged')"],
+            cwd=tmp_path,
+            stream_stderr=None,
+        )
+        passing = scheduler.submit(_sleep(0), cwd=tmp_path, callback=lambda: "done")
+    with pytest.raises(subprocess.CalledProcessError) as excinfo:
+        failing.result()
+    assert excinfo.value.stderr == "solver diverged"
+    assert passing.result() == "done"
+
+    with pytest.raises(RuntimeError):
+        scheduler.submit(_sleep(0))
+
+
+def test_job_scheduler_shutdown_terminates(tmp_path) -> None:
+    script = "import os, time; open('pid', 'w').write(str(os.getpid())); time.sleep(60)"
+    scheduler = JobScheduler(max_cores=1)
+    running = scheduler.submit([sys.executable, "-c", script], cwd=tmp_path)
+    pending = scheduler.submit(_sleep(60), cwd=tmp_path)
+    pidfile = tmp_path / "pid"
+    while not pidfile.exists() or not pidfile.read_text():
+        time.sleep(0.01)
+
+    start = time.time()
+    scheduler.shutdown(wait=False)
+    assert time.time() - start < 5
+    assert running.cancelled() and pending.cancelled()
+    with pytest.raises(ProcessLookupError):
+        os.kill(int(pidfile.read_text()), 0)
@@ -0,0 +1,80 @@
+import subprocess
+import sys
+
+import pytest
+
+lazy_packages = [
+    "gplugins",
+    "gplugins.elmer",
+    "gplugins.fdtdz",
+    "gplugins.femwell",
+    "gplugins.gfviz",
+    "gplugins.gmsh",
+    "gplugins.klayout.dataprep",
+    "gplugins.lumerical",
+    "gplugins.meow",
+    "gplugins.modes",
+    "gplugins.palace",
+    "gplugins.path_length_analysis",
+    "gplugins.sax",
+    "gplugins.tidy3d",
+    "gplugins.vlsir",
+]
+heavy_modules = ["gdsfactory", "jax", "matplotlib", "meow", "sax", "tidy3d"]
+
+# cold import of all lazy packages, measured with `python -X importtime`
+import_time_budget_seconds = 0.5
+
+
+def _run(code: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def test_import_time() -> None:
+    imports = "; ".join(f"import {package}" for package in lazy_packages)
+    p = _run(f"{imports}; import sys; print(*sys.modules)")
+
+    loaded = {module.split(".")[0] for module in p.stdout.split()}
+    assert not loaded & set(heavy_modules)
+
+    cumulative_us = sum(
+        int(line.split("|")[1])
+        for line in p.stderr.splitlines()
+        if line.startswith("import time:")
+        and line.split("|")[2].strip() in lazy_packages
+    )
+    assert cumulative_us / 1e6 < import_time_budget_seconds
+
+
+def test_lazy_attributes() -> None:
+    p = _run(
+        "import sys, gplugins.klayout.dataprep as d;"
+        "assert 'gplugins.klayout.dataprep.regions' not in sys.modules;"
+        "print(d.RegionCollection.__module__)"
+    )
+    assert p.stdout.strip() == "gplugins.klayout.dataprep.regions"
+
+
+def test_reexport_not_shadowed_by_submodule(tmp_path, monkeypatch) -> None:
+    package = tmp_path / "lazy_package"
+    package.mkdir()
+    (package / "__init__.py").write_text(
+        "from gplugins.common.utils.lazy_loader import attach\n"
+        "__getattr__, __dir__, __all__ = attach(__name__, submod_attrs={'.f': ['f']})\n"
+    )
+    (package / "f.py").write_text("def f():\n    return 1\n")
+    (package / "g.py").write_text("from lazy_package.f import f\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    import lazy_package
+    import lazy_package.g  # noqa: F401
+
+    assert lazy_package.f() == 1
+    assert "f" in dir(lazy_package)
+    with pytest.raises(AttributeError):
+        lazy_package.g2
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from gplugins.common.utils.result_store import ResultStore
+
+backends = ["directory", "sqlite"]
+
+
+@pytest.mark.parametrize("backend", backends)
+def test_save_load_arrays(tmp_path, backend) -> None:
+    store = ResultStore(tmp_path, backend=backend)
+    key = store.key("component", "settings")
+    assert store.load_arrays(key) is None
+
+    wavelengths = np.linspace(1.5, 1.6, 11)
+    s21 = np.exp(1j * wavelengths)
+    store.save_arrays(key, wavelengths=wavelengths, **{"o1@0,o2@0": s21})
+
+    sp = store.load_arrays(key)
+    np.testing.assert_allclose(sp["wavelengths"], wavelengths)
+    np.testing.assert_allclose(sp["o1@0,o2@0"], s21)
+    assert key in store
+    assert store.path(key).parent.name == key[:2]
+
+    stats = store.stats()
+    assert stats.entries == 1
+    assert stats.hits == 1
+    assert stats.misses == 1
+    assert not list(store.path(key).parent.glob(".tmp_*"))
+
+
+@pytest.mark.parametrize("backend", backends)
+def test_lru_eviction(tmp_path, backend) -> None:
+    store = ResultStore(tmp_path, backend=backend, max_size_bytes=2500)
+    keys = [store.key(str(i)) for i in range(3)]
+    store.put_bytes(keys[0], b"0" * 1000)
+    store.put_bytes(keys[1], b"1" * 1000)
+    store.get_bytes(keys[0])  # keys[1] is now least recently used
+    store.put_bytes(keys[2], b"2" * 1000)
+
+    assert keys[0] in store
+    assert keys[1] not in store
+    assert keys[2] in store
+    assert store.stats().evictions == 1
+    assert store.stats().size_bytes == 2000
+
+
+@pytest.mark.parametrize("backend", backends)
+def test_prune(tmp_path, backend) -> None:
+    store = ResultStore(tmp_path, backend=backend)
+    for i in range(5):
+        store.put_bytes(store.key(str(i)), b"x" * 10)
+    assert len(store) == 5
+    assert store.prune(max_size_bytes=20) == 3
+    assert len(store) == 2
+    assert store.prune(max_age_seconds=-1) == 2
+    assert len(store) == 0
+
+
+@pytest.mark.parametrize("backend", ["directory", "sqlite"])
+def test_size_tracking(tmp_path, backend, monkeypatch) -> None:
+    store = ResultStore(tmp_path, backend=backend, max_size_bytes=250)
+    for i in range(5):
+        store.put_bytes(f"{i:02d}", b"x" * 100)
+    assert store.stats().size_bytes == 200
+    store.put_bytes("04", b"x" * 50)
+    assert store.stats().size_bytes == 150
+
+    # writes that fit do not list the entries
+    def entries():
+        raise AssertionError("entries listed under the size cap")
+
+    monkeypatch.setattr(store.backend, "entries", entries)
+    store.put_bytes("05", b"x" * 50)
+    assert store.backend.size_bytes() == 200
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from gplugins.common.utils.sparameters import SParameters
+
+wavelengths = np.linspace(1.5, 1.6, 5)
+
+
+def _sp_dict() -> dict[str, np.ndarray]:
+    rng = np.random.default_rng(0)
+    port_modes = ["o1@0", "o1@1", "o2@0"]
+    sp = {
+        f"{p1},{p2}": rng.normal(size=5) + 1j * rng.normal(size=5)
+        for p1 in port_modes
+        for p2 in port_modes
+    }
+    sp["wavelengths"] = wavelengths
+    return sp
+
+
+def test_sparameters_dict_round_trip() -> None:
+    sp_dict = _sp_dict()
+    sp = SParameters.from_dict(sp_dict)
+
+    assert sp.s.shape == (5, 3, 3)
+    assert sp.port_modes == ("o1@0", "o1@1", "o2@0")
+    assert sp.ports == ["o1", "o2"]
+    np.testing.assert_array_equal(sp["o1,o2"], sp_dict["o1@0,o2@0"])
+    np.testing.assert_array_equal(sp["o1@1", "o2@0"], sp_dict["o1@1,o2@0"])
+    assert np.shares_memory(sp["o1@0,o2@0"], sp.s)
+    assert "o2,o1" in sp and "o3,o1" not in sp
+
+    for key, value in sp.to_dict().items():
+        np.testing.assert_array_equal(value, sp_dict[key])
+
+
+def test_sparameters_missing_entries_are_zero() -> None:
+    sp = SParameters.from_dict({"o1@0,o2@0": np.ones(5), "wavelengths": wavelengths})
+    np.testing.assert_array_equal(sp["o2,o1"], np.zeros(5))
+    with pytest.raises(ValueError):
+        SParameters.from_dict({"o1@0,o2@0": np.ones(5)})
+
+
+def test_sparameters_files(tmp_path) -> None:
+    sp = SParameters.from_dict(_sp_dict())
+
+    for loaded in (
+        SParameters.from_npz(sp.save_npz(tmp_path / "dense.npz")),
+        SParameters.from_hdf5(sp.save_hdf5(tmp_path / "dense.h5")),
+    ):
+        assert loaded.port_modes == sp.port_modes
+        np.testing.assert_array_equal(loaded.s, sp.s)
+        np.testing.assert_array_equal(loaded.wavelengths, sp.wavelengths)
+
+    np.savez(tmp_path / "legacy.npz", **_sp_dict())
+    np.testing.assert_array_equal(SParameters.from_npz(tmp_path / "legacy.npz").s, sp.s)
+
+
+def test_sparameters_interp_and_sel() -> None:
+    sp = SParameters.from_dict(_sp_dict())
+    wl = np.linspace(1.45, 1.65, 33)
+    s = sp.interp(wl)
+    for key, value in sp.to_dict().items():
+        if key != "wavelengths":
+            np.testing.assert_allclose(s[key], np.interp(wl, wavelengths, value))
+
+    window = sp.sel(1.52, 1.58)
+    np.testing.assert_array_equal(window.wavelengths, wavelengths[1:4])
+    assert np.shares_memory(window.s, sp.s)
+
+    subset = sp.subset(["o2", "o1"])
+    np.testing.assert_array_equal(subset["o2,o1"], sp["o2,o1"])
+    assert len(subset) == 2
+
+
+def test_sparameters_sdense() -> None:
+    sp = SParameters.from_dict(_sp_dict()).subset(["o1", "o2"])
+    S, port_map = sp.to_sdense()
+    assert port_map == {"o1": 0, "o2": 1}
+    assert S is sp.s
+
+    sp2 = SParameters.from_sdense((S, port_map), wavelengths)
+    np.testing.assert_array_equal(sp2["o1,o2"], sp["o1,o2"])
@@ -3,25 +3,23 @@ from __future__ import annotations
 import devsim as tcad
 from gdsfactory import logger
 
-from gplugins.devsim.get_simulation_xsection import (
-    PINWaveguide,
-    alpha_to_k,
-    clear_devsim_cache,
-    dalpha_carriers,
-    dn_carriers,
-    k_to_alpha,
+from gplugins.common.utils.lazy_loader import attach
+
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    submod_attrs={
+        ".get_simulation_xsection": [
+            "PINWaveguide",
+            "alpha_to_k",
+            "clear_devsim_cache",
+            "dalpha_carriers",
+            "dn_carriers",
+            "k_to_alpha",
+        ],
+        ".get_solver": ["DDComponent"],
+    },
 )
-from gplugins.devsim.get_solver import DDComponent
 
 logger.info(f"DEVSIM {tcad.__version__!r} installed at {tcad.__path__!r}")
 
-__all__ = [
-    "dn_carriers",
-    "dalpha_carriers",
-    "alpha_to_k",
-    "k_to_alpha",
-    "PINWaveguide",
-    "DDComponent",
-    "clear_devsim_cache",
-]
 __version__ = "0.0.1"
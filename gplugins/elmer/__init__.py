@@ -1,5 +1,6 @@
-from gplugins.elmer.get_capacitance import run_capacitive_simulation_elmer
+from gplugins.common.utils.lazy_loader import attach
 
-__all__ = [
-    "run_capacitive_simulation_elmer",
-]
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    submod_attrs={".get_capacitance": ["run_capacitive_simulation_elmer"]},
+)
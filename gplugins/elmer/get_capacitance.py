@@ -4,6 +4,7 @@ import inspect
 import itertools
 import shutil
 from collections.abc import Iterable, Mapping, Sequence
+from concurrent.futures import Future
 from math import inf
 from pathlib import Path
 from tempfile import TemporaryDirectory
@@ -19,10 +20,7 @@ from pandas import read_csv
 
 from gplugins.common.base_models.simulation import ElectrostaticResults
 from gplugins.common.types import RFMaterialSpec
-from gplugins.common.utils.async_helpers import (
-    execute_and_stream_output,
-    run_async_with_event_loop,
-)
+from gplugins.common.utils.job_scheduler import Command, JobScheduler
 from gplugins.gmsh import get_mesh
 
 ELECTROSTATIC_SIF = "electrostatic.sif"
@@ -61,25 +59,22 @@ def _generate_sif(
         fp.write(output)
 
 
-def _elmergrid(simulation_folder: Path, name: str, n_processes: int = 1):
-    """Run ElmerGrid for converting gmsh mesh to Elmer format."""
+def _elmergrid(
+    simulation_folder: Path, name: str, n_processes: int = 1
+) -> list[Command]:
+    """ElmerGrid commands for converting gmsh mesh to Elmer format."""
     elmergrid = shutil.which("ElmerGrid")
     if elmergrid is None:
         raise RuntimeError(
             "`ElmerGrid` not found. Make sure it is available in your PATH."
         )
-    run_async_with_event_loop(
-        execute_and_stream_output(
-            [elmergrid, "14", "2", name, "-autoclean"],
-            shell=False,
-            log_file_dir=simulation_folder,
-            log_file_str=Path(name).stem + "_ElmerGrid",
-            cwd=simulation_folder,
-        )
-    )
+    log_file_str = Path(name).stem + "_ElmerGrid"
+    commands = [
+        Command([elmergrid, "14", "2", name, "-autoclean"], log_file_str=log_file_str)
+    ]
     if n_processes > 1:
-        run_async_with_event_loop(
-            execute_and_stream_output(
+        commands.append(
+            Command(
                 [
                     elmergrid,
                     "2",
@@ -90,17 +85,15 @@ def _elmergrid(simulation_folder: Path, name: str, n_processes: int = 1):
                     "4",
                     "-removeunused",
                 ],
-                shell=False,
+                log_file_str=log_file_str,
                 append=True,
-                log_file_dir=simulation_folder,
-                log_file_str=Path(name).stem + "_ElmerGrid",
-                cwd=simulation_folder,
             )
         )
+    return commands
 
 
-def _elmersolver(simulation_folder: Path, name: str, n_processes: int = 1):
-    """Run simulations with ElmerFEM."""
+def _elmersolver(simulation_folder: Path, name: str, n_processes: int = 1) -> Command:
+    """ElmerSolver command for running simulations with ElmerFEM."""
     elmersolver_name = (
         "ElmerSolver" if (no_mpi := n_processes == 1) else "ElmerSolver_mpi"
     )
@@ -110,16 +103,11 @@ def _elmersolver(simulation_folder: Path, name: str, n_processes: int = 1):
             f"`{elmersolver_name}` not found. Make sure it is available in your PATH."
         )
     sif_file = str(simulation_folder / f"{Path(name).stem}.sif")
-    run_async_with_event_loop(
-        execute_and_stream_output(
-            [elmersolver, sif_file]
-            if no_mpi
-            else ["mpiexec", "-np", str(n_processes), elmersolver, sif_file],
-            shell=False,
-            log_file_dir=simulation_folder,
-            log_file_str=Path(name).stem + "_ElmerSolver",
-            cwd=simulation_folder,
-        )
+    return Command(
+        [elmersolver, sif_file]
+        if no_mpi
+        else ["mpiexec", "-np", str(n_processes), elmersolver, sif_file],
+        log_file_str=Path(name).stem + "_ElmerSolver",
     )
 
 
@@ -169,7 +157,8 @@ def run_capacitive_simulation_elmer(
     simulator_params: Mapping[str, Any] | None = None,
     mesh_parameters: dict[str, Any] | None = None,
     mesh_file: Path | str | None = None,
-) -> ElectrostaticResults:
+    scheduler: JobScheduler | None = None,
+) -> ElectrostaticResults | Future[ElectrostaticResults]:
     """Run electrostatic finite element method simulations using
     `Elmer`_.     Returns the field solution and resulting capacitance matrix.
 
@@ -190,6 +179,9 @@ def run_capacitive_simulation_elmer(
         mesh_parameters: Keyword arguments to provide to :func:`get_mesh`.
         mesh_file: Path to a ready mesh to use. Useful for reusing one mesh file.
             By default a mesh is generated according to ``mesh_parameters``.
+        scheduler: Runs the solver as a job of ``n_processes`` cores on this
+            :class:`~JobScheduler` and returns a future of the results right after
+            meshing. Use it to run several simulations concurrently.
 
     .. _Elmer: https://github.com/ElmerCSC/elmerfem
     """
@@ -283,14 +275,32 @@ def run_capacitive_simulation_elmer(
         background_tag,
         simulator_params,
     )
-    _elmergrid(simulation_folder, filename, n_processes)
-    _elmersolver(simulation_folder, filename, n_processes)
-    results = _read_elmer_results(
-        simulation_folder,
-        filename,
-        n_processes,
-        component.ports,
-        is_temporary=str(simulation_folder) == temp_dir.name,
-    )
-    temp_dir.cleanup()
-    return results
+    commands = [
+        *_elmergrid(simulation_folder, filename, n_processes),
+        _elmersolver(simulation_folder, filename, n_processes),
+    ]
+
+    def read_results() -> ElectrostaticResults:
+        return _read_elmer_results(
+            simulation_folder,
+            filename,
+            n_processes,
+            component.ports,
+            is_temporary=str(simulation_folder) == temp_dir.name,
+        )
+
+    def submit(scheduler: JobScheduler) -> Future[ElectrostaticResults]:
+        future = scheduler.submit(
+            *commands,
+            cores=n_processes,
+            cwd=simulation_folder,
+            callback=read_results,
+        )
+        # also clean up when the solver fails or the job is cancelled
+        future.add_done_callback(lambda _: temp_dir.cleanup())
+        return future
+
+    if scheduler is not None:
+        return submit(scheduler)
+    with JobScheduler(max_cores=n_processes) as scheduler:
+        return submit(scheduler).result()
@@ -1,29 +1,17 @@
-from gplugins.fdtdz.get_epsilon_fdtdz import (
-    add_plot_labels,
-    component_to_epsilon_femwell,
-    component_to_epsilon_pjz,
-    create_physical_grid,
-    material_name_to_fdtdz,
-    plot_epsilon,
-)
-from gplugins.fdtdz.get_ports_fdtdz import (
-    get_epsilon_port,
-    get_mode_port,
-    plot_mode,
-)
-from gplugins.fdtdz.get_sparameters_fdtdz import (
-    get_sparameters_fdtdz,
-)
+from gplugins.common.utils.lazy_loader import attach
 
-__all__ = [
-    "add_plot_labels",
-    "component_to_epsilon_femwell",
-    "component_to_epsilon_pjz",
-    "create_physical_grid",
-    "get_epsilon_port",
-    "get_mode_port",
-    "get_sparameters_fdtdz",
-    "material_name_to_fdtdz",
-    "plot_epsilon",
-    "plot_mode",
-]
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    submod_attrs={
+        ".get_epsilon_fdtdz": [
+            "add_plot_labels",
+            "component_to_epsilon_femwell",
+            "component_to_epsilon_pjz",
+            "create_physical_grid",
+            "material_name_to_fdtdz",
+            "plot_epsilon",
+        ],
+        ".get_ports_fdtdz": ["get_epsilon_port", "get_mode_port", "plot_mode"],
+        ".get_sparameters_fdtdz": ["get_sparameters_fdtdz"],
+    },
+)
@@ -1,5 +1,10 @@
 from __future__ import annotations
 
-from .mode_solver import compute_component_slice_modes, compute_cross_section_modes
+from gplugins.common.utils.lazy_loader import attach
 
-__all__ = ("compute_cross_section_modes", "compute_component_slice_modes")
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    submod_attrs={
+        ".mode_solver": ["compute_cross_section_modes", "compute_component_slice_modes"]
+    },
+)
@@ -1,4 +1,6 @@
 __author__ = "Floris Laporte"
 __version__ = "0.0.0"
 
-from .gfviz import show as show
+from gplugins.common.utils.lazy_loader import attach
+
+__getattr__, __dir__, __all__ = attach(__name__, submod_attrs={".gfviz": ["show"]})
@@ -23,9 +23,13 @@ from gdsfactory.typings import ComponentSpec, PathType, Port, PortSymmetries
 from tqdm.auto import tqdm
 
 from gplugins.common.utils import port_symmetries
+from gplugins.common.utils.get_sparameters_path import (
+    get_sparameters_key_meep as get_sparameters_key,
+)
 from gplugins.common.utils.get_sparameters_path import (
     get_sparameters_path_meep as get_sparameters_path,
 )
+from gplugins.common.utils.result_store import ResultStore
 from gplugins.gmeep.get_simulation import (
     get_simulation,
     settings_get_simulation,
@@ -151,6 +155,7 @@ def write_sparameters_meep(
     plot_args: dict | None = None,
     only_return_filepath_sim_settings=False,
     verbosity: int = 0,
+    store: ResultStore | None = None,
     **settings,
 ) -> dict[str, np.ndarray]:
     r"""Returns Sparameters and writes them to npz filepath.
@@ -250,6 +255,9 @@ def write_sparameters_meep(
         z: for 2D plot.
         plot_args: if animate or not run, customization keyword arguments passed to
           `plot2D()` (i.e. `labels`, `eps_parameters`, `boundary_parameters`, `field_parameters`, etc.)
+        verbosity: meep verbosity level.
+        store: optional result store. If given, Sparameters are cached in the store
+            instead of dirpath/filepath. Cannot be combined with filepath.
 
     keyword Args:
         extend_ports_length: to extend ports beyond the PML (um).
@@ -316,6 +324,15 @@ def write_sparameters_meep(
         **settings,
     )
 
+    if store is not None:
+        if filepath is not None:
+            raise ValueError(
+                f"Pass either filepath={str(filepath)!r} or store, results go to one of them"
+            )
+        store_key = get_sparameters_key(
+            component=component, layer_stack=layer_stack, **sim_settings
+        )
+        filepath = store.path(store_key)
     filepath = filepath or get_sparameters_path(
         component=component,
         dirpath=dirpath,
@@ -328,6 +345,9 @@ def write_sparameters_meep(
     sim_settings["component"] = component.to_dict()
     filepath = pathlib.Path(filepath)
     filepath_sim_settings = filepath.with_suffix(".yml")
+    if store is not None:
+        sim_settings_key = ResultStore.key(store_key, "sim_settings")
+        filepath_sim_settings = store.path(sim_settings_key)
 
     # FIXME: Ideally, we should split sim settings generation from doing the
     #        simulation... this is a hack.
@@ -391,7 +411,11 @@ def write_sparameters_meep(
             sim.plot2D(plot_eps_flag=True, **plot_args)
         return sim
 
-    if filepath.exists():
+    if store is not None:
+        if not overwrite and (cached := store.load_arrays(store_key)) is not None:
+            logger.info(f"Simulation loaded from {filepath!r}")
+            return cached
+    elif filepath.exists():
         if not overwrite:
             logger.info(f"Simulation loaded from {filepath!r}")
             return dict(np.load(filepath))
@@ -546,9 +570,18 @@ def write_sparameters_meep(
             sp["wavelengths"] = np.linspace(
                 wavelength_start, wavelength_stop, wavelength_points
             )
-            np.savez_compressed(filepath, **sp)
+            if store is not None:
+                store.save_arrays(store_key, **sp)
+                store.put_bytes(
+                    sim_settings_key,
+                    yaml.dump(clean_value_json(sim_settings)).encode(),
+                )
+            else:
+                np.savez_compressed(filepath, **sp)
+                filepath_sim_settings.write_text(
+                    yaml.dump(clean_value_json(sim_settings))
+                )
             logger.info(f"Write simulation results to {filepath!r}")
-            filepath_sim_settings.write_text(yaml.dump(clean_value_json(sim_settings)))
             logger.info(f"Write simulation settings to {filepath_sim_settings!r}")
             return sp
         else:
@@ -574,13 +607,16 @@ def write_sparameters_meep(
         sp["wavelengths"] = np.linspace(
             wavelength_start, wavelength_stop, wavelength_points
         )
-        np.savez_compressed(filepath, **sp)
-
         end = time.time()
         sim_settings.update(compute_time_seconds=end - start)
         sim_settings.update(compute_time_minutes=(end - start) / 60)
+        if store is not None:
+            store.save_arrays(store_key, **sp)
+            store.put_bytes(sim_settings_key, yaml.dump(sim_settings).encode())
+        else:
+            np.savez_compressed(filepath, **sp)
+            filepath_sim_settings.write_text(yaml.dump(sim_settings))
         logger.info(f"Write simulation results to {filepath!r}")
-        filepath_sim_settings.write_text(yaml.dump(sim_settings))
         logger.info(f"Write simulation settings to {filepath_sim_settings!r}")
         return sp
 
@@ -5,24 +5,22 @@ from __future__ import annotations
 import multiprocessing
 import pathlib
 import shutil
-import time
 from functools import partial
 from pathlib import Path
 from pprint import pprint
 
 import gdsfactory as gf
-import numpy as np
 from gdsfactory import logger
 from gdsfactory.component import Component
 from gdsfactory.config import sparameters_path
 from gdsfactory.pdk import get_layer_stack
 from gdsfactory.technology import LayerStack
-from tqdm.auto import tqdm
 
 from gplugins.common.utils import port_symmetries
 from gplugins.common.utils.get_sparameters_path import (
     get_sparameters_path_meep as get_sparameters_path,
 )
+from gplugins.common.utils.job_scheduler import JobScheduler
 from gplugins.gmeep.write_sparameters_meep import remove_simulation_kwargs
 from gplugins.gmeep.write_sparameters_meep_mpi import (
     write_sparameters_meep_mpi,
@@ -47,7 +45,8 @@ def write_sparameters_meep_batch(
 
     Given a list of write_sparameters_meep keyword arguments `jobs` launches them in
     different cores using MPI where each simulation runs with `cores_per_run` cores.
-    If there are more simulations than cores each batch runs sequentially.
+    If there are more simulations than cores, the next simulation starts as soon
+    as a running one finishes.
 
 
     Args
@@ -139,27 +138,15 @@ def write_sparameters_meep_batch(
 
     jobs = jobs_to_run
 
-    batches = int(np.ceil(cores_per_run * len(jobs) / total_cores))
-    jobs_per_batch = int(np.floor(total_cores / cores_per_run))
     njobs = len(jobs)
     logger.info(f"Running {njobs} simulations")
     logger.info(f"total_cores = {total_cores} with cores_per_run = {cores_per_run}")
-    logger.info(f"Running {batches} batches with up to {jobs_per_batch} jobs each.")
-
-    i = 0
-    # For each batch in the pool
-    for j in tqdm(range(batches)):
-        filepaths = []
-
-        # For each job in the batch
-        for k in range(jobs_per_batch):
-            if i >= njobs:
-                continue
-            logger.info(f"Task {k} of batch {j} is job {i}")
-
-            # Obtain current job
-            simulations_settings = jobs[i]
 
+    # start a new job as soon as enough cores are free
+    filepaths = []
+    with JobScheduler(max_cores=total_cores) as scheduler:
+        for i, simulations_settings in enumerate(jobs):
+            logger.info(f"Submitting job {i}")
             pprint(simulations_settings)
 
             filepath = write_sparameters_meep_mpi(
@@ -167,24 +154,11 @@ def write_sparameters_meep_batch(
                 temp_dir=temp_dir,
                 temp_file_str=f"write_sparameters_meep_mpi_{i}",
                 wait_to_finish=False,
+                scheduler=scheduler,
                 **simulations_settings,
             )
             filepaths.append(filepath)
 
-            # Increment task number
-            i += 1
-
-        # Wait for batch to end
-        done = False
-        num_pool_jobs = len(filepaths)
-        while not done:
-            # Check if all jobs finished
-            jobs_done = sum(1 for filepath in filepaths if filepath.exists())
-            if jobs_done == num_pool_jobs:
-                done = True
-            else:
-                time.sleep(1)
-
     temp_dir = pathlib.Path(temp_dir)
     if temp_dir.exists() and delete_temp_files:
         shutil.rmtree(temp_dir)
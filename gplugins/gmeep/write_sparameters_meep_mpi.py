@@ -9,6 +9,7 @@ import shlex
 import subprocess
 import sys
 import time
+from concurrent.futures import Future
 from functools import partial
 from pathlib import Path
 
@@ -24,6 +25,7 @@ from gplugins.common.utils import port_symmetries
 from gplugins.common.utils.get_sparameters_path import (
     get_sparameters_path_meep as get_sparameters_path,
 )
+from gplugins.common.utils.job_scheduler import JobScheduler
 from gplugins.gmeep.write_sparameters_meep import (
     remove_simulation_kwargs,
     settings_write_sparameters_meep,
@@ -50,6 +52,7 @@ def write_sparameters_meep_mpi(
     live_output: bool = False,
     overwrite: bool = False,
     wait_to_finish: bool = True,
+    scheduler: JobScheduler | None = None,
     **kwargs,
 ) -> Path:
     """Write Sparameters using multiple cores and MPI and returns Sparameters filepath.
@@ -83,6 +86,8 @@ def write_sparameters_meep_mpi(
             (meep verbosity still needs to be set separately).
         overwrite: overwrites stored simulation results.
         wait_to_finish: if True makes the function call blocking.
+        scheduler: runs mpirun as a job of ``cores`` cores on this
+            :class:`~JobScheduler`. Logs go to ``temp_dir``.
 
     Keyword Args:
         resolution: in pixels/um (30: for coarse, 100: for fine).
@@ -194,7 +199,23 @@ def write_sparameters_meep_mpi(
     logger.info(command)
     logger.info(str(filepath))
 
-    if live_output:
+    if scheduler is not None:
+        future = scheduler.submit(
+            command,
+            cores=cores,
+            log_file_dir=temp_dir,
+            log_file_str=temp_file_str,
+            stream_stdout=sys.stdout if live_output else None,
+        )
+
+        def log_failure(future: Future) -> None:
+            if not future.cancelled() and future.exception():
+                logger.error(f"Simulation {filepath!r} failed: {future.exception()}")
+
+        future.add_done_callback(log_failure)
+        if wait_to_finish:
+            future.result()
+    elif live_output:
         import asyncio
 
         from gplugins.common.utils.async_helpers import execute_and_stream_output
@@ -1,33 +1,26 @@
 from __future__ import annotations
 
-from gplugins.common.utils.parse_layer_stack import (
-    get_layer_overlaps_z,
-    get_layers_at_z,
-    list_unique_layer_stack_z,
-    map_unique_layer_stack_z,
-    order_layer_stack,
-)
-from gplugins.gmsh.get_mesh import create_physical_mesh, get_mesh
-from gplugins.gmsh.uz_xsection_mesh import (
-    get_u_bounds_layers,
-    get_u_bounds_polygons,
-    get_uz_bounds_layers,
-    uz_xsection_mesh,
+from gplugins.common.utils.lazy_loader import attach
+
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    submod_attrs={
+        "gplugins.common.utils.parse_layer_stack": [
+            "get_layer_overlaps_z",
+            "get_layers_at_z",
+            "list_unique_layer_stack_z",
+            "map_unique_layer_stack_z",
+            "order_layer_stack",
+        ],
+        ".get_mesh": ["create_physical_mesh", "get_mesh"],
+        ".uz_xsection_mesh": [
+            "get_u_bounds_layers",
+            "get_u_bounds_polygons",
+            "get_uz_bounds_layers",
+            "uz_xsection_mesh",
+        ],
+        ".xy_xsection_mesh": ["xy_xsection_mesh"],
+    },
 )
-from gplugins.gmsh.xy_xsection_mesh import xy_xsection_mesh
 
-__all__ = [
-    "get_layer_overlaps_z",
-    "get_layers_at_z",
-    "get_u_bounds_layers",
-    "get_u_bounds_polygons",
-    "get_uz_bounds_layers",
-    "get_mesh",
-    "list_unique_layer_stack_z",
-    "map_unique_layer_stack_z",
-    "order_layer_stack",
-    "uz_xsection_mesh",
-    "xy_xsection_mesh",
-    "create_physical_mesh",
-]
 __version__ = "0.0.2"
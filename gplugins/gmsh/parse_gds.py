@@ -3,9 +3,26 @@
 from __future__ import annotations
 
 import gdsfactory as gf
+import numpy as np
 import shapely
 from shapely.geometry import LineString, MultiLineString, MultiPolygon, Polygon
 
+from gplugins.common.utils.get_sparameters_path import get_component_hash
+from gplugins.common.utils.result_store import ResultStore
+
+_polygons_store: ResultStore | None = None
+
+
+def set_polygons_store(store: ResultStore | None) -> None:
+    """Enables an on-disk cache for :func:`cleanup_component` results.
+
+    Cleaned polygons are stored as WKB keyed by component geometry hash, layer
+    stack and tolerances, so other processes and later runs reuse them.
+    Pass None to disable the cache.
+    """
+    global _polygons_store
+    _polygons_store = store
+
 
 def round_coordinates(geom, ndigits=4):
     """Round coordinates to n_digits to eliminate floating point errors."""
@@ -52,8 +69,49 @@ def fuse_polygons(component, layer, round_tol=4, simplify_tol=1e-4, offset_tol=N
     )
 
 
-def cleanup_component(component, layer_stack, round_tol=2, simplify_tol=1e-2):
-    """Process component polygons before meshing."""
+def cleanup_component(
+    component, layer_stack, round_tol=2, simplify_tol=1e-2, store=None
+):
+    """Process component polygons before meshing.
+
+    Args:
+        component: gdsfactory component.
+        layer_stack: gdsfactory LayerStack.
+        round_tol: number of decimals to round coordinates to.
+        simplify_tol: tolerance to simplify polygons.
+        store: optional ResultStore to cache results in.
+            Defaults to the store set with :func:`set_polygons_store`.
+    """
+    if store is None:
+        store = _polygons_store
+    if store is not None:
+        key = store.key(
+            "cleanup_component",
+            get_component_hash(component),
+            layer_stack.model_dump_json(),
+            f"{round_tol} {simplify_tol}",
+        )
+        if (wkbs := store.load_arrays(key)) is not None:
+            return {
+                layername: shapely.from_wkb(wkb.tobytes())
+                for layername, wkb in wkbs.items()
+            }
+
+    polygons = _cleanup_component(component, layer_stack, round_tol, simplify_tol)
+
+    if store is not None:
+        store.save_arrays(
+            key,
+            compressed=False,
+            **{
+                layername: np.frombuffer(shapely.to_wkb(polygon), dtype=np.uint8)
+                for layername, polygon in polygons.items()
+            },
+        )
+    return polygons
+
+
+def _cleanup_component(component, layer_stack, round_tol=2, simplify_tol=1e-2):
     layer_stack_dict = layer_stack.to_dict()
 
     return {
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import gdsfactory as gf
+from gdsfactory.generic_tech import LAYER_STACK
+
+from gplugins.common.base_models.component import LayeredComponentBase
+from gplugins.common.utils.result_store import ResultStore
+from gplugins.gmsh.parse_gds import cleanup_component
+
+
+def test_cleanup_component_store(tmp_path) -> None:
+    store = ResultStore(tmp_path)
+    c = gf.components.straight_heater_metal()
+
+    polygons = cleanup_component(c, LAYER_STACK, store=store)
+    assert len(store) == 1
+    cached = cleanup_component(c, LAYER_STACK, store=store)
+    assert store.stats().hits == 1
+
+    assert polygons.keys() == cached.keys()
+    for layername, polygon in polygons.items():
+        assert polygon.equals_exact(cached[layername], 0)
+
+    cleanup_component(c, LAYER_STACK, simplify_tol=1e-3, store=store)
+    assert len(store) == 2
+
+
+def test_layered_component_store(tmp_path) -> None:
+    store = ResultStore(tmp_path)
+    for _ in range(2):
+        c = LayeredComponentBase(
+            component=gf.components.straight(),
+            layer_stack=LAYER_STACK,
+            polygons_store=store,
+        )
+        assert c.polygons
+    assert len(store) == 1
+    assert store.stats().hits == 1
+
+
+def test_layered_component_hash(tmp_path) -> None:
+    def layered(length=10.0, layer_stack=LAYER_STACK, **kwargs):
+        return LayeredComponentBase(
+            component=gf.components.straight(length=length),
+            layer_stack=layer_stack,
+            **kwargs,
+        )
+
+    c = layered()
+    assert hash(c) == hash(layered())
+    assert hash(c) == hash(layered(polygons_store=ResultStore(tmp_path)))
+
+    thick = LAYER_STACK.model_copy()
+    thick.layers["core"].thickness += 0.1
+    assert hash(c) != hash(layered(length=11.0))
+    assert hash(c) != hash(layered(layer_stack=thick))
+    assert hash(c) != hash(layered(pad_xy_inner=1.0))
+    assert hash(c) != hash(layered(wafer_layer=(998, 0)))
@@ -1,19 +1,16 @@
-from gplugins.klayout.dataprep import regions
-from gplugins.klayout.dataprep.regions import (
-    Region,
-    RegionCollection,
-    boolean_not,
-    boolean_or,
-    copy,
-    size,
-)
+from gplugins.common.utils.lazy_loader import attach
 
-__all__ = [
-    "Region",
-    "RegionCollection",
-    "boolean_not",
-    "boolean_or",
-    "copy",
-    "regions",
-    "size",
-]
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    submodules=[".regions"],
+    submod_attrs={
+        ".regions": [
+            "Region",
+            "RegionCollection",
+            "boolean_not",
+            "boolean_or",
+            "copy",
+            "size",
+        ],
+    },
+)
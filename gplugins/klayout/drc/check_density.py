@@ -0,0 +1,226 @@
+"""Window based density checks.
+
+Foundry density rules bound the density of a layer in every window of a given
+size stepped across the chip, for example 50x50 um windows every 10 um.
+The layer density is computed once on tiles of the step size with
+:func:`~gplugins.klayout.get_density.calculate_density`. The density of every
+window is then read from a summed-area table (:class:`DensityIntegral`), so the
+check costs the same for any window size.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import klayout.db as kdb
+import klayout.rdb as rdb
+import numpy as np
+from gdsfactory.component import Component
+from gdsfactory.config import get_number_of_cores
+from gdsfactory.typings import Layer, PathType
+
+from gplugins.klayout.get_density import (
+    DensityIntegral,
+    _read_layout,
+    calculate_density,
+    get_gds_bbox,
+)
+
+
+def _window_edges(
+    vmin: float, vmax: float, size: float, step: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """Returns the start and end of the windows stepped over [vmin, vmax].
+
+    The last window is aligned to ``vmax`` if the steps do not end there. If the
+    range is smaller than the window there is a single window over the range.
+    """
+    eps = 1e-9
+    if vmax - vmin <= size + eps:
+        return np.array([vmin]), np.array([vmax])
+    starts = vmin + step * np.arange(
+        int(np.floor((vmax - vmin - size) / step + eps)) + 1
+    )
+    if starts[-1] + size < vmax - eps:
+        starts = np.append(starts, vmax - size)
+    return starts, starts + size
+
+
+@dataclass
+class DensityCheck:
+    """Density of every window of a density check.
+
+    Args:
+        layer: checked layer.
+        windows: (ny, nx, 2, 2) window bboxes ((xmin, ymin), (xmax, ymax)) in um.
+        density: (ny, nx) density of each window.
+        min_density: minimum allowed density. None for no minimum.
+        max_density: maximum allowed density. None for no maximum.
+        dbu: database unit of the checked layout in um.
+    """
+
+    layer: Layer
+    windows: np.ndarray
+    density: np.ndarray
+    min_density: float | None = None
+    max_density: float | None = None
+    dbu: float = 1e-3
+
+    @property
+    def too_low(self) -> np.ndarray:
+        """Mask of the windows below ``min_density``."""
+        if self.min_density is None:
+            return np.zeros(self.density.shape, dtype=bool)
+        return self.density < self.min_density
+
+    @property
+    def too_high(self) -> np.ndarray:
+        """Mask of the windows above ``max_density``."""
+        if self.max_density is None:
+            return np.zeros(self.density.shape, dtype=bool)
+        return self.density > self.max_density
+
+    def __len__(self) -> int:
+        """Returns the number of violating windows."""
+        return int(np.count_nonzero(self.too_low | self.too_high))
+
+    def to_region(self, dbu: float | None = None, merged: bool = True) -> kdb.Region:
+        """Returns the violating windows as a region in database units.
+
+        Args:
+            dbu: database unit in um. Defaults to the one of the checked layout.
+            merged: merge overlapping windows.
+        """
+        dbu = self.dbu if dbu is None else dbu
+        region = kdb.Region()
+        for (xmin, ymin), (xmax, ymax) in self.windows[self.too_low | self.too_high]:
+            region.insert(kdb.DBox(xmin, ymin, xmax, ymax).to_itype(dbu))
+        return region.merged() if merged else region
+
+    def to_rdb(
+        self,
+        filepath: PathType | None = None,
+        cellname: str = "TOP",
+        name: str = "density",
+    ) -> rdb.ReportDatabase:
+        """Returns a report database with one item per violating window.
+
+        Each item holds the window box and its density.
+
+        Args:
+            filepath: optional path to save the database to, usually ``.lyrdb``.
+            cellname: name of the checked cell.
+            name: name of the database.
+        """
+        db = rdb.ReportDatabase(name)
+        cell = db.create_cell(cellname)
+        layer = f"{self.layer[0]}/{self.layer[1]}"
+        for mask, description in (
+            (self.too_low, f"{layer}: density below threshold of {self.min_density}"),
+            (self.too_high, f"{layer}: density above threshold of {self.max_density}"),
+        ):
+            if not mask.any():
+                continue
+            category = db.create_category(description)
+            for ((xmin, ymin), (xmax, ymax)), density in zip(
+                self.windows[mask], self.density[mask]
+            ):
+                item = db.create_item(cell.rdb_id(), category.rdb_id())
+                item.add_value(kdb.DBox(xmin, ymin, xmax, ymax))
+                item.add_value(float(density))
+        if filepath:
+            db.save(str(filepath))
+        return db
+
+
+def check_density(
+    gdspath: PathType | Component | kdb.Layout,
+    layer: Layer = (1, 0),
+    min_density: float | None = 0.2,
+    max_density: float | None = 0.8,
+    window_size: tuple[float, float] = (50, 50),
+    step: tuple[float, float] = (10, 10),
+    layer_floorplan: Layer | None = None,
+    cellname: str | None = None,
+    tile_size: tuple[float, float] | None = None,
+    threads: int = get_number_of_cores(),
+) -> DensityCheck:
+    """Returns the density of ``layer`` in windows stepped across the floorplan.
+
+    Windows start at the lower-left corner of the floorplan. Where the steps do
+    not end at the floorplan edge, the last window is aligned to that edge.
+
+    Args:
+        gdspath: path to GDS, Component or loaded layout.
+        layer: tuple (int, int).
+        min_density: minimum density in each window. None for no minimum.
+        max_density: maximum density in each window. None for no maximum.
+        window_size: (width, height) of the windows in um.
+        step: window pitch along x and y in um.
+        layer_floorplan: layer whose bbox is the checked area.
+            Defaults to the bbox of the cell.
+        cellname: cell to check. Defaults to the top cell.
+        tile_size: size of the density tiles in um. Defaults to ``step``.
+            Windows not aligned to tiles assume uniform density within tiles.
+        threads: number of threads of the density calculation.
+
+    .. code::
+
+        result = check_density("chip.gds", layer=(1, 0), min_density=0.2)
+        if len(result):
+            result.to_rdb("chip_density.lyrdb")
+    """
+    if isinstance(gdspath, Component):
+        gdspath, cellname = gdspath.kcl.layout, gdspath.name
+    # without a floorplan layer the floorplan is the bbox of all layers
+    layers = None if layer_floorplan is None else [layer, layer_floorplan]
+    layout, cell = _read_layout(gdspath, cellname, layers=layers)
+
+    (xmin, ymin), (xmax, ymax) = get_gds_bbox(
+        layout, layer=layer_floorplan, cellname=cell.name
+    )
+    if xmax <= xmin or ymax <= ymin:
+        raise ValueError(f"Empty floorplan {layer_floorplan} in {cell.name!r}")
+
+    raster = calculate_density(
+        layout,
+        layer=layer,
+        cellname=cell.name,
+        tile_size=tile_size or step,
+        threads=threads,
+        bbox=((xmin, ymin), (xmax, ymax)),
+    )
+
+    # the last tiles extend beyond the floorplan and only measure the part inside:
+    # spread that area over the part inside
+    (_, _), (rx1, ry1) = raster.bbox
+    dx, dy = raster.pitch
+    raster.density[:, -1] *= dx / (dx - (rx1 - xmax))
+    raster.density[-1, :] *= dy / (dy - (ry1 - ymax))
+
+    x0, x1 = _window_edges(xmin, xmax, window_size[0], step[0])
+    y0, y1 = _window_edges(ymin, ymax, window_size[1], step[1])
+    windows = np.empty((len(y0), len(x0), 2, 2))
+    windows[..., 0, 0] = x0
+    windows[..., 1, 0] = x1
+    windows[..., 0, 1] = y0[:, None]
+    windows[..., 1, 1] = y1[:, None]
+
+    return DensityCheck(
+        layer=tuple(layer),
+        windows=windows,
+        density=np.clip(DensityIntegral(raster).mean_density(windows), 0, 1),
+        min_density=min_density,
+        max_density=max_density,
+        dbu=layout.dbu,
+    )
+
+
+if __name__ == "__main__":
+    import gdsfactory as gf
+
+    c = gf.Component()
+    c << gf.components.rectangle(size=(200, 200), layer=(99, 0))
+    c << gf.components.rectangle(size=(100, 200), layer=(1, 0))
+    result = check_density(c, layer=(1, 0), layer_floorplan=(99, 0))
+    print(f"{len(result)} violating windows", result.to_region())
@@ -0,0 +1,352 @@
+"""Evaluate many DRC checks on a layout loaded once.
+
+:func:`~gplugins.klayout.drc.check_width.check_width` and the other check
+helpers read the layout and build a flat region for every call. A
+:class:`DrcSession` reads the layout once, keeps one merged hierarchical region
+per layer and returns the violations of each check with their locations.
+
+.. code::
+
+    session = DrcSession("chip.gds", layers={"WG": (1, 0), "M1": (41, 0)})
+    width = session.width("WG", 0.2)
+    print(len(width), width.bboxes)
+    violations = session.run([check_space(layer="WG", value=0.2)])
+"""
+
+from __future__ import annotations
+
+import copy
+import threading
+import time
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass, is_dataclass
+from typing import Any
+
+import klayout.db as kdb
+import numpy as np
+from gdsfactory.component import Component
+from gdsfactory.config import get_number_of_cores
+from gdsfactory.typings import Layer, PathType
+
+from gplugins.klayout.drc.write_drc import Rule
+from gplugins.klayout.get_density import _read_layout
+
+valid_metrics = ["Euclidean", "Square", "Projection"]
+
+
+def _layer_map(layers: Any) -> dict[str, Layer]:
+    """Returns layer names to (layer, datatype) from a dict, dataclass or layer enum."""
+    layers = asdict(layers) if is_dataclass(layers) else layers
+    if isinstance(layers, dict):
+        return {str(name): tuple(layer) for name, layer in layers.items()}
+    return {str(layer): tuple(layer) for layer in layers}
+
+
+def _metrics(metrics: str) -> Any:
+    if metrics not in valid_metrics:
+        raise ValueError(f"metrics = {metrics!r} not in {valid_metrics}")
+    # KLayout spells it Euclidian
+    return getattr(kdb.Region, "Euclidian" if metrics == "Euclidean" else metrics)
+
+
+@dataclass
+class Violations:
+    """Violations of one check.
+
+    Args:
+        name: name of the check.
+        markers: edge pairs of the violations, or polygons for area checks, in dbu.
+        dbu: database unit in um.
+        runtime: time to evaluate the check in seconds.
+    """
+
+    name: str
+    markers: kdb.EdgePairs | kdb.Region
+    dbu: float
+    runtime: float = 0.0
+
+    def __len__(self) -> int:
+        return self.markers.count()
+
+    @property
+    def edge_pairs(self) -> list[kdb.DEdgePair]:
+        """Violating edge pairs in um. Empty for area checks."""
+        if isinstance(self.markers, kdb.Region):
+            return []
+        return [ep.to_dtype(self.dbu) for ep in self.markers.each()]
+
+    @property
+    def bboxes(self) -> np.ndarray:
+        """(n, 2, 2) bboxes ((xmin, ymin), (xmax, ymax)) of the violations in um."""
+        boxes = [marker.bbox() for marker in self.markers.each()]
+        return (
+            np.array(
+                [((b.left, b.bottom), (b.right, b.top)) for b in boxes], dtype=float
+            ).reshape(-1, 2, 2)
+            * self.dbu
+        )
+
+    def area(self) -> float:
+        """Returns the area of the violation markers in um2."""
+        polygons = (
+            self.markers
+            if isinstance(self.markers, kdb.Region)
+            else self.markers.polygons()
+        )
+        return polygons.area() * self.dbu**2
+
+
+class DrcSession:
+    """Layout loaded once with cached merged regions to evaluate many checks.
+
+    Distances are in um if float and dbu if int, as for the
+    :mod:`~gplugins.klayout.drc.write_drc` rules.
+
+    Args:
+        gdspath: path to GDS, Component or loaded layout.
+        layers: layer names to layers, as dict, dataclass or layer enum. If
+            given, only these layers are read from a file. Otherwise all layers
+            are read and checks take (layer, datatype) tuples.
+        cellname: cell to check. Defaults to the top cell.
+        threads: number of threads KLayout uses for every hierarchical operation.
+        deep: keep the hierarchy. Otherwise layers are flattened.
+    """
+
+    def __init__(
+        self,
+        gdspath: PathType | Component | kdb.Layout,
+        layers: Any = None,
+        cellname: str | None = None,
+        threads: int = get_number_of_cores(),
+        deep: bool = True,
+    ) -> None:
+        if isinstance(gdspath, Component):
+            gdspath, cellname = gdspath.kcl.layout, gdspath.name
+        self.layers = _layer_map(layers or {})
+        self.layout, self.cell = _read_layout(
+            gdspath, cellname, layers=list(self.layers.values()) or None
+        )
+        self.dbu = self.layout.dbu
+        self.threads = threads
+        self.deep = deep
+        self.dss = kdb.DeepShapeStore() if deep else None
+        if self.dss is not None:
+            self.dss.threads = threads
+        self.bbox: kdb.Box | None = None
+        self._regions: dict[Layer, kdb.Region] = {}
+        self._layer_locks: dict[Layer, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def window(self, bbox: kdb.Box) -> DrcSession:
+        """Returns a session on the same layout checking only the shapes touching ``bbox``.
+
+        Regions of the window are flat. Shapes are not clipped, but merged
+        polygons only include the shapes touching ``bbox``.
+
+        Args:
+            bbox: window in dbu.
+        """
+        session = copy.copy(self)
+        session.deep = False
+        session.dss = None
+        session.bbox = bbox
+        session._regions = {}
+        session._layer_locks = {}
+        session._lock = threading.Lock()
+        return session
+
+    def _layer(self, layer: str | Layer) -> Layer:
+        if isinstance(layer, str):
+            if layer not in self.layers:
+                raise ValueError(f"Layer {layer!r} not in {list(self.layers)}")
+            return self.layers[layer]
+        layer = tuple(layer)
+        if self.layers and layer not in self.layers.values():
+            raise ValueError(f"Layer {layer} not in {self.layers}")
+        return layer
+
+    def region(self, layer: str | Layer) -> kdb.Region:
+        """Returns the merged region of a layer, computed once."""
+        layer = self._layer(layer)
+        # one lock per layer, so regions of different layers are built concurrently
+        with self._lock:
+            lock = self._layer_locks.setdefault(layer, threading.Lock())
+        with lock:
+            if layer not in self._regions:
+                shapes = self.cell.begin_shapes_rec(self.layout.layer(*layer))
+                if self.bbox is not None:
+                    shapes.region = self.bbox
+                region = (
+                    kdb.Region(shapes, self.dss) if self.deep else kdb.Region(shapes)
+                )
+                region.threads = self.threads
+                merged = region.merged()
+                merged.threads = self.threads
+                # already merged, skip merging again in every check
+                merged.merged_semantics = False
+                self._regions[layer] = merged
+            return self._regions[layer]
+
+    def _distance(self, value: float | int) -> int:
+        return value if isinstance(value, int) else round(value / self.dbu)
+
+    def _area(self, value: float | int) -> int:
+        return value if isinstance(value, int) else round(value / self.dbu**2)
+
+    def _violations(self, name: str, check: Any, *args: Any) -> Violations:
+        t0 = time.perf_counter()
+        markers = check(*args)
+        return Violations(
+            name=name, markers=markers, dbu=self.dbu, runtime=time.perf_counter() - t0
+        )
+
+    def width(
+        self,
+        layer: str | Layer,
+        min_width: float | int,
+        angle_limit: float = 90.0,
+        metrics: str = "Euclidean",
+    ) -> Violations:
+        """Returns the edge pairs of ``layer`` narrower than ``min_width``."""
+        return self._violations(
+            f"{layer} width {min_width}",
+            self.region(layer).width_check,
+            self._distance(min_width),
+            False,
+            _metrics(metrics),
+            angle_limit,
+        )
+
+    def space(
+        self,
+        layer: str | Layer,
+        min_space: float | int,
+        angle_limit: float = 90.0,
+        metrics: str = "Euclidean",
+    ) -> Violations:
+        """Returns the edge pairs of ``layer`` closer than ``min_space``."""
+        return self._violations(
+            f"{layer} space {min_space}",
+            self.region(layer).space_check,
+            self._distance(min_space),
+            False,
+            _metrics(metrics),
+            angle_limit,
+        )
+
+    def separation(
+        self,
+        layer1: str | Layer,
+        layer2: str | Layer,
+        min_space: float | int,
+        angle_limit: float = 90.0,
+        metrics: str = "Euclidean",
+    ) -> Violations:
+        """Returns the edge pairs of ``layer1`` and ``layer2`` closer than ``min_space``."""
+        return self._violations(
+            f"min {layer1} {layer2} separation {min_space}",
+            self.region(layer1).separation_check,
+            self.region(layer2),
+            self._distance(min_space),
+            False,
+            _metrics(metrics),
+            angle_limit,
+        )
+
+    def enclosing(
+        self,
+        layer1: str | Layer,
+        layer2: str | Layer,
+        min_enclosure: float | int,
+        angle_limit: float = 90.0,
+        metrics: str = "Euclidean",
+    ) -> Violations:
+        """Returns the edge pairs where ``layer1`` encloses ``layer2`` by less than ``min_enclosure``."""
+        return self._violations(
+            f"{layer1} enclosing {layer2} by {min_enclosure}",
+            self.region(layer1).enclosing_check,
+            self.region(layer2),
+            self._distance(min_enclosure),
+            False,
+            _metrics(metrics),
+            angle_limit,
+        )
+
+    def inclusion(
+        self,
+        layer_in: str | Layer,
+        layer_out: str | Layer,
+        min_inclusion: float | int,
+        angle_limit: float = 90.0,
+        metrics: str = "Euclidean",
+    ) -> Violations:
+        """Returns the edge pairs where ``layer_out`` is inside ``layer_in`` by less than ``min_inclusion``."""
+        return self._violations(
+            f"{layer_out} inside {layer_in} by {min_inclusion}",
+            self.region(layer_out).inside_check,
+            self.region(layer_in),
+            self._distance(min_inclusion),
+            False,
+            _metrics(metrics),
+            angle_limit,
+        )
+
+    def area(self, layer: str | Layer, min_area_um2: float | int) -> Violations:
+        """Returns the polygons of ``layer`` smaller than ``min_area_um2``.
+
+        The area is in um2 if float and dbu2 if int.
+        """
+        return self._violations(
+            f"{layer} area < {min_area_um2} um2",
+            self.region(layer).with_area,
+            0,
+            self._area(min_area_um2),
+            False,
+        )
+
+    def evaluate(self, rule: Rule) -> Violations:
+        """Returns the violations of a :mod:`~gplugins.klayout.drc.write_drc` rule."""
+        angle_limit = rule.options.get("angle_limit", 90.0)
+        if rule.check == "width":
+            violations = self.width(*rule.layers, rule.value, angle_limit)
+        elif rule.check == "space":
+            violations = self.space(*rule.layers, rule.value, angle_limit)
+        elif rule.check == "separation":
+            violations = self.separation(*rule.layers, rule.value)
+        elif rule.check == "enclosing":
+            violations = self.enclosing(*rule.layers, rule.value, angle_limit)
+        elif rule.check == "area":
+            violations = self.area(*rule.layers, rule.value)
+        else:
+            raise ValueError(f"Unknown check {rule.check!r} of rule {rule.name!r}")
+        violations.name = rule.name
+        return violations
+
+    def run(self, rules: Iterable[str]) -> dict[str, Violations]:
+        """Evaluates rules one after the other and returns rule names to violations.
+
+        KLayout holds the GIL while it runs a check, so the rules are not run
+        concurrently. Every check uses all ``threads`` threads instead.
+
+        Args:
+            rules: rules returned by the :mod:`~gplugins.klayout.drc.write_drc` builders.
+                Their names must be unique.
+        """
+        rules = list(rules)
+        unsupported = [rule for rule in rules if not isinstance(rule, Rule)]
+        if unsupported:
+            raise ValueError(
+                f"Only check_width, check_space, check_separation, check_enclosing and "
+                f"check_area rules run in Python, got {unsupported}"
+            )
+        missing = {
+            layer for rule in rules for layer in rule.layers if layer not in self.layers
+        }
+        if missing:
+            raise ValueError(f"Layers {sorted(missing)} not in {list(self.layers)}")
+        names = [rule.name for rule in rules]
+        duplicated = sorted({name for name in names if names.count(name) > 1})
+        if duplicated:
+            raise ValueError(f"Rules {duplicated} have the same name, rename them")
+
+        return {violations.name: violations for violations in map(self.evaluate, rules)}
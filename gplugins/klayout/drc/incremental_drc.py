@@ -0,0 +1,344 @@
+"""Incremental DRC that only re-checks the areas of changed cells.
+
+The top cell is split into a fixed grid of tiles and the violations of every
+tile are cached on disk, as KLayout's tiled mode checks them: with the shapes
+within ``tile_border`` of the tile, keeping the markers centered in the tile.
+
+On the next run every cell is hashed with its children on the checked layers.
+Comparing the hashes with the previous run gives the boxes that changed, only
+descending into cells whose hash differs. Only tiles within ``tile_border`` of
+a change are checked again, the others are read from the cache, so an
+unchanged layout only costs reading and hashing it.
+
+.. code::
+
+    report = run_drc_incremental(
+        "chip.gds", rules=rules, layers=LAYER, cache_dir="build/drc_cache"
+    )
+    print(report.counts, f"{report.checked_tiles}/{report.total_tiles} tiles checked")
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import pathlib
+import shutil
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+import klayout.db as kdb
+import klayout.rdb as rdb
+from gdsfactory import logger
+from gdsfactory.component import Component
+from gdsfactory.config import get_number_of_cores
+from gdsfactory.typings import PathType
+
+from gplugins.common.utils.result_store import _atomic_write
+from gplugins.klayout.drc.drc_session import DrcSession
+from gplugins.klayout.drc.run_drc import DrcReport
+from gplugins.klayout.drc.write_drc import Rule
+
+CACHE_VERSION = 1
+INDEX = "index.json"
+
+
+def _to_list(box: kdb.Box) -> list[int] | None:
+    return None if box.empty() else [box.left, box.bottom, box.right, box.top]
+
+
+def _to_box(box: list[int] | None) -> kdb.Box:
+    return kdb.Box() if box is None else kdb.Box(*box)
+
+
+def _instance_key(inst: kdb.Instance) -> str:
+    return f"{inst.cplx_trans}|{inst.a}|{inst.b}|{inst.na}|{inst.nb}"
+
+
+def hash_cells(
+    layout: kdb.Layout, cell: kdb.Cell, layer_indexes: Iterable[int]
+) -> dict[str, dict[str, Any]]:
+    """Returns records of ``cell`` and the cells it calls, by cell name.
+
+    Each record holds the ``hash`` of the cell with its children, the hash and
+    ``bbox`` of its own ``shapes`` and its ``instances`` as
+    ``[child name, placement, bbox]``. Only ``layer_indexes`` are hashed.
+    """
+    layer_indexes = list(layer_indexes)
+    options = kdb.SaveLayoutOptions()
+    options.format = "GDS2"
+    options.gds2_write_timestamps = False
+    options.write_context_info = False
+    options.deselect_all_layers()
+    for li in layer_indexes:
+        options.add_layer(li, layout.get_info(li))
+
+    cells = {cell.cell_index(), *cell.called_cells()}
+    records = {}
+    for ci in layout.each_cell_bottom_up():
+        if ci not in cells:
+            continue
+        c = layout.cell(ci)
+        options.select_this_cell(ci)
+        shapes = hashlib.sha256(layout.write_bytes(options)).hexdigest()
+        bbox = kdb.Box()
+        for li in layer_indexes:
+            bbox += kdb.Region(c.shapes(li)).bbox()
+        instances = sorted(
+            [
+                layout.cell(inst.cell_index).name,
+                _instance_key(inst),
+                _to_list(inst.bbox()),
+            ]
+            for inst in c.each_inst()
+        )
+        h = hashlib.sha256(shapes.encode())
+        for child, key, _ in instances:
+            h.update(f"{records[child]['hash']}|{key}".encode())
+        records[c.name] = {
+            "hash": h.hexdigest(),
+            "shapes": shapes,
+            "bbox": _to_list(bbox),
+            "instances": instances,
+        }
+    return records
+
+
+def dirty_boxes(
+    layout: kdb.Layout,
+    cell: kdb.Cell,
+    records: dict[str, dict[str, Any]],
+    old_records: dict[str, dict[str, Any]],
+) -> list[kdb.Box]:
+    """Returns the boxes of ``cell`` that changed since ``old_records`` in dbu.
+
+    Changed own shapes mark their old and new bbox, added or removed instances
+    their bbox. Instances of changed cells are followed down the hierarchy.
+    """
+    memo: dict[str, list[kdb.Box]] = {}
+
+    def dirty(name: str) -> list[kdb.Box]:
+        if name in memo:
+            return memo[name]
+        new, old = records[name], old_records.get(name)
+        c = layout.cell(name)
+        if old is None:
+            boxes = [c.bbox()]
+        elif old["hash"] == new["hash"]:
+            boxes = []
+        else:
+            boxes = []
+            if old["shapes"] != new["shapes"]:
+                boxes += [_to_box(old["bbox"]), _to_box(new["bbox"])]
+            old_instances = Counter((child, key) for child, key, _ in old["instances"])
+            new_instances = Counter((child, key) for child, key, _ in new["instances"])
+            removed = old_instances - new_instances
+            added = new_instances - old_instances
+            boxes += [
+                _to_box(bbox)
+                for child, key, bbox in old["instances"]
+                if (child, key) in removed
+            ]
+            for inst in c.each_inst():
+                child = layout.cell(inst.cell_index).name
+                if (child, _instance_key(inst)) in added:
+                    boxes.append(inst.bbox())
+                    continue
+                child_boxes = dirty(child)
+                for trans in inst.cell_inst.each_cplx_trans():
+                    boxes += [box.transformed(trans) for box in child_boxes]
+        memo[name] = [box for box in boxes if not box.empty()]
+        return memo[name]
+
+    return dirty(cell.name)
+
+
+def _tile_range(vmin: int, vmax: int, tile: int) -> range:
+    return range(vmin // tile, max(vmin // tile, (vmax - 1) // tile) + 1)
+
+
+@dataclass
+class IncrementalDrcReport(DrcReport):
+    """Result of :func:`run_drc_incremental`.
+
+    Args:
+        checked_tiles: number of tiles checked in this run.
+        total_tiles: number of tiles of the top cell.
+        dirty_cells: cells added or changed since the previous run.
+    """
+
+    checked_tiles: int = 0
+    total_tiles: int = 0
+    dirty_cells: list[str] = field(default_factory=list)
+
+
+def run_drc_incremental(
+    gdspath: PathType | Component | kdb.Layout,
+    rules: Iterable[str],
+    layers: Any,
+    cache_dir: PathType,
+    cellname: str | None = None,
+    tile_size: float = 500.0,
+    tile_border: float | None = None,
+    threads: int = get_number_of_cores(),
+    filepath: PathType | None = None,
+) -> IncrementalDrcReport:
+    """Runs DRC rules, only checking the tiles near cells changed since the last run.
+
+    The cache is reset when the rules, layers, tiles or top cell change.
+
+    Args:
+        gdspath: path to GDS, Component or loaded layout.
+        rules: rules returned by the :mod:`~gplugins.klayout.drc.write_drc` builders.
+        layers: layer names to layers, as dict, dataclass or layer enum.
+        cache_dir: directory of the cached tile violations.
+        cellname: cell to check. Defaults to the top cell.
+        tile_size: tile size in um.
+        tile_border: context around each tile in um. Defaults to the largest rule
+            distance. Area checks only see polygons within the border of a tile.
+        threads: number of threads.
+        filepath: optional path to save the report database to (.lyrdb).
+    """
+    rules = list(rules)
+    unsupported = [rule for rule in rules if not isinstance(rule, Rule)]
+    if unsupported:
+        raise ValueError(
+            f"Only check_width, check_space, check_separation, check_enclosing and "
+            f"check_area rules run in Python, got {unsupported}"
+        )
+    session = DrcSession(gdspath, layers=layers, cellname=cellname, threads=threads)
+    layout, cell, dbu = session.layout, session.cell, session.dbu
+    used = sorted({layer for rule in rules for layer in rule.layers})
+    missing = set(used) - set(session.layers)
+    if missing:
+        raise ValueError(f"Layers {sorted(missing)} not in {list(session.layers)}")
+    layer_indexes = [layout.layer(*session.layers[name]) for name in used]
+
+    if tile_border is None:
+        tile_border = max(
+            (
+                rule.value * dbu if isinstance(rule.value, int) else rule.value
+                for rule in rules
+                if rule.check != "area"
+            ),
+            default=0.0,
+        )
+    tile = round(tile_size / dbu)
+    border = round(tile_border / dbu)
+
+    cache_dir = pathlib.Path(cache_dir)
+    key = hashlib.sha256(
+        json.dumps(
+            [
+                CACHE_VERSION,
+                [str(rule) for rule in rules],
+                sorted((name, session.layers[name]) for name in used),
+                tile,
+                border,
+                cell.name,
+            ]
+        ).encode()
+    ).hexdigest()
+    index = (
+        json.loads((cache_dir / INDEX).read_text())
+        if (cache_dir / INDEX).exists()
+        else {}
+    )
+    if index.get("key") != key:
+        shutil.rmtree(cache_dir / "tiles", ignore_errors=True)
+        index = {"key": key, "records": {}}
+    tiles_dir = cache_dir / "tiles"
+    tiles_dir.mkdir(parents=True, exist_ok=True)
+
+    records = hash_cells(layout, cell, layer_indexes)
+    old_records = index["records"]
+    dirty_cells = [
+        name
+        for name, record in records.items()
+        if old_records.get(name, {}).get("hash") != record["hash"]
+    ]
+
+    bbox = kdb.Box()
+    for li in layer_indexes:
+        bbox += cell.bbox_per_layer(li)
+    tiles = (
+        set()
+        if bbox.empty()
+        else {
+            (ix, iy)
+            for ix in _tile_range(bbox.left, bbox.right, tile)
+            for iy in _tile_range(bbox.bottom, bbox.top, tile)
+        }
+    )
+    dirty_tiles = set()
+    for box in dirty_boxes(layout, cell, records, old_records):
+        box = box.enlarged(border, border)
+        dirty_tiles |= {
+            (ix, iy)
+            for ix in range(box.left // tile, box.right // tile + 1)
+            for iy in range(box.bottom // tile, box.top // tile + 1)
+        }
+    cached = {
+        tuple(map(int, path.stem.split("_"))) for path in tiles_dir.glob("*.json")
+    }
+    for ix, iy in cached - tiles:
+        (tiles_dir / f"{ix}_{iy}.json").unlink()
+    to_check = tiles - (cached - dirty_tiles)
+
+    runtimes = {rule.name: 0.0 for rule in rules}
+    for ix, iy in sorted(to_check):
+        tile_box = kdb.Box(ix * tile, iy * tile, (ix + 1) * tile, (iy + 1) * tile)
+        violations = session.window(tile_box.enlarged(border, border)).run(rules)
+        markers = {}
+        for name, v in violations.items():
+            runtimes[name] += v.runtime
+            markers[name] = [
+                str(marker)
+                for marker in v.markers.each()
+                if tile_box.left
+                <= (center := marker.bbox().center()).x
+                < tile_box.right
+                and tile_box.bottom <= center.y < tile_box.top
+            ]
+        _atomic_write(tiles_dir / f"{ix}_{iy}.json", json.dumps(markers).encode())
+    _atomic_write(
+        cache_dir / INDEX, json.dumps({"key": key, "records": records}).encode()
+    )
+    logger.info(
+        f"Incremental DRC of {cell.name!r}: {len(dirty_cells)} dirty cells, "
+        f"checked {len(to_check)}/{len(tiles)} tiles"
+    )
+
+    results = {
+        rule.name: kdb.Region() if rule.check == "area" else kdb.EdgePairs()
+        for rule in rules
+    }
+    for ix, iy in tiles:
+        markers = json.loads((tiles_dir / f"{ix}_{iy}.json").read_text())
+        for name, collection in results.items():
+            parse = (
+                kdb.Polygon.from_s
+                if isinstance(collection, kdb.Region)
+                else kdb.EdgePair.from_s
+            )
+            for marker in markers[name]:
+                collection.insert(parse(marker))
+
+    db = rdb.ReportDatabase("DRC")
+    db.top_cell_name = cell.name
+    rdb_cell = db.create_cell(cell.name)
+    trans = kdb.CplxTrans(dbu)
+    for name, collection in results.items():
+        db.create_category(name).scan_collection(rdb_cell, trans, collection, True)
+    if filepath:
+        db.save(str(filepath))
+    return IncrementalDrcReport(
+        db=db,
+        runtimes=runtimes,
+        counts={name: collection.count() for name, collection in results.items()},
+        checked_tiles=len(to_check),
+        total_tiles=len(tiles),
+        dirty_cells=dirty_cells,
+    )
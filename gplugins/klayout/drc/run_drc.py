@@ -0,0 +1,117 @@
+"""Run DRC decks in Python without KLayout batch mode.
+
+The rules returned by the :mod:`~gplugins.klayout.drc.write_drc` builders
+(``check_width``, ``check_space``, ``check_separation``, ``check_enclosing`` and
+``check_area``) are evaluated with :class:`klayout.db.Region` checks on the
+hierarchical (deep) layout, and the violations are written to a
+:class:`klayout.rdb.ReportDatabase`.
+
+.. code::
+
+    from gdsfactory.generic_tech import LAYER
+    from gplugins.klayout.drc.write_drc import check_space, check_width
+
+    rules = [check_width(layer="WG", value=0.2), check_space(layer="WG", value=0.2)]
+    report = run_drc("chip.gds", rules=rules, layers=LAYER, filepath="chip.lyrdb")
+    print(report.counts, report.runtimes)
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any
+
+import klayout.db as kdb
+import klayout.rdb as rdb
+from gdsfactory import logger
+from gdsfactory.component import Component
+from gdsfactory.config import get_number_of_cores
+from gdsfactory.typings import PathType
+
+from gplugins.klayout.drc.drc_session import DrcSession
+
+
+@dataclass
+class DrcReport:
+    """Result of :func:`run_drc`.
+
+    Args:
+        db: report database with one category per rule.
+        runtimes: rule names to their runtime in seconds.
+        counts: rule names to their number of violations.
+    """
+
+    db: rdb.ReportDatabase
+    runtimes: dict[str, float]
+    counts: dict[str, int]
+
+    @property
+    def total(self) -> int:
+        """Total number of violations."""
+        return sum(self.counts.values())
+
+
+def run_drc(
+    gdspath: PathType | Component | kdb.Layout,
+    rules: Iterable[str],
+    layers: Any,
+    cellname: str | None = None,
+    threads: int = get_number_of_cores(),
+    deep: bool = True,
+    filepath: PathType | None = None,
+) -> DrcReport:
+    """Runs DRC rules in process and returns their violations.
+
+    Rules run one after the other, and every hierarchical operation uses
+    ``threads`` threads in KLayout.
+    See :class:`~gplugins.klayout.drc.drc_session.DrcSession` to run checks one
+    by one and get their locations.
+
+    Args:
+        gdspath: path to GDS, Component or loaded layout.
+        rules: rules returned by the :mod:`~gplugins.klayout.drc.write_drc` builders.
+        layers: layer names to layers, as dict, dataclass or layer enum.
+        cellname: cell to check. Defaults to the top cell.
+        threads: number of threads.
+        deep: keep the hierarchy. Otherwise layers are flattened.
+        filepath: optional path to save the report database to (.lyrdb).
+    """
+    session = DrcSession(
+        gdspath, layers=layers, cellname=cellname, threads=threads, deep=deep
+    )
+    results = session.run(rules)
+
+    db = rdb.ReportDatabase("DRC")
+    db.top_cell_name = session.cell.name
+    if not isinstance(gdspath, Component | kdb.Layout):
+        db.original_file = str(gdspath)
+    rdb_cell = db.create_cell(session.cell.name)
+    trans = kdb.CplxTrans(session.dbu)
+    runtimes = {}
+    counts = {}
+    for name, violations in results.items():
+        category = db.create_category(name)
+        category.scan_collection(rdb_cell, trans, violations.markers, not deep)
+        runtimes[name] = violations.runtime
+        counts[name] = len(violations)
+        logger.info(
+            f"DRC {name!r}: {counts[name]} violations in {violations.runtime:.3f} s"
+        )
+    if filepath:
+        db.save(str(filepath))
+    return DrcReport(db=db, runtimes=runtimes, counts=counts)
+
+
+if __name__ == "__main__":
+    import gdsfactory as gf
+
+    from gplugins.klayout.drc.write_drc import check_space, check_width
+
+    c = gf.components.straight_array(spacing=0.1)
+    report = run_drc(
+        c,
+        rules=[check_width(layer="WG", value=0.6), check_space(layer="WG", value=0.2)],
+        layers={"WG": (1, 0)},
+    )
+    print(report.counts, report.runtimes)
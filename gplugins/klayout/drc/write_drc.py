@@ -11,6 +11,7 @@ from __future__ import annotations
 
 import pathlib
 from dataclasses import asdict, is_dataclass
+from typing import Any
 
 import gdsfactory as gf
 from gdsfactory.install import get_klayout_path
@@ -30,6 +31,45 @@ valid_operations = {
 }
 
 
+class Rule(str):
+    """Script of a DRC rule that also keeps the rule parameters.
+
+    It is the script string, so rules can be joined into decks as before, and
+    :func:`~gplugins.klayout.drc.run_drc.run_drc` evaluates it in Python.
+
+    Args:
+        script: KLayout DRC script of the rule.
+        check: name of the check (width, space, separation, enclosing, area).
+        layers: names of the checked layers.
+        value: check value in um if float, dbu if int (area in um2).
+        name: category of the violations.
+        options: other check parameters, such as ``angle_limit``.
+    """
+
+    check: str
+    layers: tuple[str, ...]
+    value: float | int
+    name: str
+    options: dict[str, Any]
+
+    def __new__(
+        cls,
+        script: str,
+        check: str,
+        layers: tuple[str, ...],
+        value: float | int,
+        name: str,
+        **options: Any,
+    ) -> Rule:
+        rule = super().__new__(cls, script)
+        rule.check = check
+        rule.layers = layers
+        rule.value = value
+        rule.name = name
+        rule.options = options
+        return rule
+
+
 def get_drc_script_start(name, shortcut) -> str:
     return f"""<?xml version="1.0" encoding="utf-8"?>
 <klayout-macro>
@@ -133,7 +173,7 @@ def output_layer(layer: str, output: tuple[int, int]) -> str:
     return f"{layer}.output({output[0]},{output[1]})"
 
 
-def check_width(value: float | int, layer: str, angle_limit: float = 90.0) -> str:
+def check_width(value: float | int, layer: str, angle_limit: float = 90.0) -> Rule:
     """Min feature size.
 
     Args:
@@ -142,13 +182,18 @@ def check_width(value: float | int, layer: str, angle_limit: float = 90.0) -> st
     """
     category = "width"
     error = f"{layer} {category} {value}um"
-    return (
+    return Rule(
         f"{layer}.{category}({value}, angle_limit({angle_limit}))"
-        f".output({error!r}, {error!r})"
+        f".output({error!r}, {error!r})",
+        check=category,
+        layers=(layer,),
+        value=value,
+        name=error,
+        angle_limit=angle_limit,
     )
 
 
-def check_space(value: float | int, layer: str, angle_limit: float = 90.0) -> str:
+def check_space(value: float | int, layer: str, angle_limit: float = 90.0) -> Rule:
     """Min Space between shapes of layer.
 
     Args:
@@ -157,13 +202,18 @@ def check_space(value: float | int, layer: str, angle_limit: float = 90.0) -> st
     """
     category = "space"
     error = f"{layer} {category} {value}um"
-    return (
+    return Rule(
         f"{layer}.{category}({value}, angle_limit({angle_limit}))"
-        f".output({error!r}, {error!r})"
+        f".output({error!r}, {error!r})",
+        check=category,
+        layers=(layer,),
+        value=value,
+        name=error,
+        angle_limit=angle_limit,
     )
 
 
-def check_separation(value: float | int, layer1: str, layer2: str) -> str:
+def check_separation(value: float | int, layer1: str, layer2: str) -> Rule:
     """Min space between different layers.
 
     Args:
@@ -172,12 +222,18 @@ def check_separation(value: float | int, layer1: str, layer2: str) -> str:
         layer2: layer name.
     """
     error = f"min {layer1} {layer2} separation {value}um"
-    return f"{layer1}.separation({layer2}, {value}).output({error!r}, {error!r})"
+    return Rule(
+        f"{layer1}.separation({layer2}, {value}).output({error!r}, {error!r})",
+        check="separation",
+        layers=(layer1, layer2),
+        value=value,
+        name=error,
+    )
 
 
 def check_enclosing(
     value: float | int, layer1: str, layer2: str, angle_limit: float = 90.0
-) -> str:
+) -> Rule:
     """Checks if layer1 encloses (is bigger than) layer2 by value.
 
     Args:
@@ -188,13 +244,18 @@ def check_enclosing(
 
     """
     error = f"{layer1} enclosing {layer2} by {value}um"
-    return (
+    return Rule(
         f"{layer1}.enclosing({layer2}, angle_limit({angle_limit}), {value})"
-        f".output({error!r}, {error!r})"
+        f".output({error!r}, {error!r})",
+        check="enclosing",
+        layers=(layer1, layer2),
+        value=value,
+        name=error,
+        angle_limit=angle_limit,
     )
 
 
-def check_area(layer: str, min_area_um2: float | int = 2.0) -> str:
+def check_area(layer: str, min_area_um2: float | int = 2.0) -> Rule:
     """Return script for min area checking.
 
     Args:
@@ -202,12 +263,18 @@ def check_area(layer: str, min_area_um2: float | int = 2.0) -> str:
         min_area_um2: min area in um2. int if dbu, float if um.
 
     """
-    return f"""
+    return Rule(
+        f"""
 
 min_{layer}_a = {min_area_um2}.um2
 r_{layer}_a = {layer}.with_area(0, min_{layer}_a)
 r_{layer}_a.output("{layer.upper()}_A: {layer} area &lt; min_{layer}_a um2")
-"""
+""",
+        check="area",
+        layers=(layer,),
+        value=min_area_um2,
+        name=f"{layer.upper()}_A: {layer} area < {min_area_um2} um2",
+    )
 
 
 def check_density(
@@ -218,6 +285,10 @@ def check_density(
 ) -> str:
     """Return script to ensure density of layer is within min and max.
 
+    Checks a single global density over the floorplan. For window based density
+    rules use :func:`gplugins.klayout.drc.check_density.check_density`, which
+    runs in Python without a DRC script.
+
     based on https://github.com/klayoutmatthias/si4all
 
     """
@@ -1,18 +1,127 @@
+from __future__ import annotations
+
+import sys
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
 from pathlib import Path
 
 import gdsfactory as gf
 import matplotlib.cm as cm
 import matplotlib.pyplot as plt
 import numpy as np
+from gdsfactory import logger
 from gdsfactory.config import get_number_of_cores
-from gdsfactory.typings import Layer
-from klayout.db import Box, Layout, TileOutputReceiver, TilingProcessor
+from gdsfactory.typings import Layer, PathType
+from klayout.db import (
+    Box,
+    Cell,
+    DBox,
+    DPoint,
+    LayerInfo,
+    LayerMap,
+    Layout,
+    LoadLayoutOptions,
+    Region,
+    TileOutputReceiver,
+    TilingProcessor,
+    Vector,
+)
+
+
+@dataclass
+class DensityRaster:
+    """Density of a layer on a regular grid of tiles.
+
+    Iterating yields ``(tile_center_x, tile_center_y, density, ix, iy)`` tuples,
+    so a raster can be used wherever a list of tile tuples was expected.
+
+    Args:
+        density: (ny, nx) density of each tile, indexed by ``[iy, ix]``.
+        origin: lower-left corner of tile (0, 0) in um.
+        pitch: tile size (width, height) in um.
+    """
+
+    density: np.ndarray
+    origin: tuple[float, float]
+    pitch: tuple[float, float]
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.density.shape
+
+    @property
+    def x(self) -> np.ndarray:
+        """Tile centers along x."""
+        return self.origin[0] + self.pitch[0] * (np.arange(self.shape[1]) + 0.5)
+
+    @property
+    def y(self) -> np.ndarray:
+        """Tile centers along y."""
+        return self.origin[1] + self.pitch[1] * (np.arange(self.shape[0]) + 0.5)
+
+    @property
+    def bbox(self) -> tuple[tuple[float, float], tuple[float, float]]:
+        (x0, y0), (dx, dy) = self.origin, self.pitch
+        ny, nx = self.shape
+        return (x0, y0), (x0 + nx * dx, y0 + ny * dy)
+
+    def __len__(self) -> int:
+        return self.density.size
+
+    def __iter__(self) -> Iterator[tuple[float, float, float, int, int]]:
+        x, y = self.x, self.y
+        for (iy, ix), d in np.ndenumerate(self.density):
+            yield x[ix], y[iy], d, ix, iy
+
+    def meshgrid(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Returns the X and Y tile centers and the density as 2D arrays."""
+        Xi, Yi = np.meshgrid(self.x, self.y)
+        return Xi, Yi, self.density
+
+    def padded(
+        self, bbox: tuple[tuple[float, float], tuple[float, float]]
+    ) -> DensityRaster:
+        """Returns the raster padded with zero density tiles to cover ``bbox``."""
+        (xmin, ymin), (xmax, ymax) = bbox
+        (bx0, by0), (bx1, by1) = self.bbox
+        dx, dy = self.pitch
+
+        def ntiles(distance: float, pitch: float) -> int:
+            return max(0, int(np.ceil(distance / pitch - 1e-9)))
+
+        left, right = ntiles(bx0 - xmin, dx), ntiles(xmax - bx1, dx)
+        bottom, top = ntiles(by0 - ymin, dy), ntiles(ymax - by1, dy)
+        return DensityRaster(
+            density=np.pad(self.density, ((bottom, top), (left, right))),
+            origin=(bx0 - left * dx, by0 - bottom * dy),
+            pitch=self.pitch,
+        )
 
 
 class DensityOutputReceiver(TileOutputReceiver):
+    """Writes the density of each tile into a preallocated (ny, nx) array."""
+
     def __init__(self):
         super().__init__()
-        self.data = []
+        self.density = np.zeros((0, 0))
+        self.origin = (0.0, 0.0)
+        self.pitch = (0.0, 0.0)
+
+    def begin(
+        self, nx: int, ny: int, p0: DPoint, dx: float, dy: float, frame: DBox
+    ) -> None:
+        """
+        Arguments:
+            nx: number of tiles along the x-axis.
+            ny: number of tiles along the y-axis.
+            p0: lower-left corner of the first tile in um.
+            dx: tile width in um.
+            dy: tile height in um.
+            frame: region covered by the tiles.
+        """
+        self.density = np.zeros((ny, nx))
+        self.origin = (p0.x, p0.y)
+        self.pitch = (dx, dy)
 
     def put(
         self, ix: int, iy: int, tile: Box, obj: float, dbu: float, clip: bool
@@ -25,109 +134,273 @@ class DensityOutputReceiver(TileOutputReceiver):
             obj: density value (for this task)
             dbu: database units per user unit.
             clip: flag indicating if the tile has been clipped
-
-        Add data as:
-            (tile_center_x, tile_center_y, density)
         """
-        self.data.append(
-            (
-                (tile.left * dbu + tile.right * dbu) / 2,
-                (tile.bottom * dbu + tile.top * dbu) / 2,
-                obj,
-            )
-        )
+        self.density[iy, ix] = obj
 
+    @property
+    def raster(self) -> DensityRaster:
+        return DensityRaster(density=self.density, origin=self.origin, pitch=self.pitch)
 
-def calculate_density(
-    gdspath: Path,
-    layer: tuple[int, int],
+
+def _read_layout(
+    gdspath: PathType | Layout,
     cellname: str | None = None,
-    tile_size: tuple[int, int] = (200, 200),
+    layers: Iterable[Layer] | None = None,
+) -> tuple[Layout, Cell]:
+    """Returns a layout and its cell ``cellname`` (default: top cell).
+
+    When reading a file with ``layers``, shapes on other layers are skipped while
+    reading, so only the hierarchy and the requested layers are held in memory.
+    Keep a reference to the layout as long as the cell is used.
+    """
+    if isinstance(gdspath, Layout):
+        layout = gdspath
+    else:
+        options = LoadLayoutOptions()
+        if layers is not None:
+            layer_map = LayerMap()
+            for i, layer in enumerate(layers):
+                layer_map.map(LayerInfo(*layer), i)
+            options.set_layer_map(layer_map, False)
+        layout = Layout()
+        layout.read(str(gdspath), options)
+    cell = layout.top_cell() if cellname is None else layout.cell(cellname)
+    if cell is None:
+        raise ValueError(f"Cell {cellname!r} not found in {gdspath}")
+    return layout, cell
+
+
+def _peak_memory() -> float:
+    """Returns the peak resident memory of this process in MB, nan if unknown."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return float("nan")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def calculate_densities(
+    gdspath: PathType | Layout,
+    layers: Iterable[Layer],
+    cellname: str | None = None,
+    tile_size: tuple[float, float] = (200, 200),
     threads: int = get_number_of_cores(),
-) -> list[tuple[float, float, float]]:
+    bbox: tuple[tuple[float, float], tuple[float, float]] | None = None,
+) -> dict[Layer, DensityRaster]:
     """
-    Calculates the density of a given layer in a GDS file and returns the density data.
+    Calculates the density of several layers in one pass over a GDS file.
+
+    The layout is read once and all layers are inputs of a single tiling job, so
+    all rasters share the same grid of tiles, laid over the bbox of all ``layers``
+    or starting at the lower-left corner of ``bbox``.
 
-    Process a GDS file to calculate the density of a specified layer. It divides the layout into tiles of a specified size, computes the density of the layer within each tile, and returns a (x,y,density) list of density data. The density is calculated as the area of the layer within a tile divided by the total area of the tile.
+    Only ``layers`` are read from a GDS file and the tiles are processed from the
+    hierarchical layout without flattening it, so layouts much larger than memory
+    when flattened can be processed. Use ``bbox`` to process a region of interest
+    only. The peak memory of the process is logged.
 
     Args:
-        gdspath (Path): The path to the GDS file.
-        layer (Layer): The layer for which to calculate density (layer number, datatype).
-        tile_size (Tuple, optional): The size of the tiles (width, height) in database units. Defaults to (200, 200).
-        threads (int, optional): The number of threads to use for processing. Defaults to total number of threads.
+        gdspath: The path to the GDS file or an already loaded layout.
+        layers: The layers for which to calculate density (layer number, datatype).
+        cellname: cell to process. Defaults to the top cell.
+        tile_size: The size of the tiles (width, height) in um. Defaults to (200, 200).
+        threads: The number of threads to use for processing. Defaults to total number of threads.
+        bbox: ((xmin, ymin), (xmax, ymax)) area to tile in um, shapes outside
+            are not processed. The last tiles extend beyond it if it is not a
+            multiple of ``tile_size``. Defaults to the bbox of all layers.
 
     Returns:
-        list: A list of tuples, each containing the center x-coordinate, center y-coordinate, and density of each tile.
+        dict: maps each layer to its density raster.
     """
+    layers = [tuple(layer) for layer in layers]
+    layout, cell = _read_layout(gdspath, cellname, layers=layers)
+    layer_indexes = [layout.layer(*layer) for layer in layers]
+
     # Validate input
-    (xmin, ymin), (xmax, ymax) = get_gds_bbox(
-        gdspath=gdspath, layer=layer, cellname=cellname
-    )
-    if tile_size[0] > xmax - xmin and tile_size[1] > ymax - ymin:
+    frame = bbox
+    bbox = DBox()
+    if frame is None:
+        for li in layer_indexes:
+            bbox += cell.dbbox_per_layer(li)
+        if bbox.empty():
+            raise ValueError(f"No shapes on layers {layers} in {cell.name!r}")
+    else:
+        (xmin, ymin), (xmax, ymax) = frame
+        bbox = DBox(xmin, ymin, xmax, ymax)
+    if tile_size[0] > bbox.width() and tile_size[1] > bbox.height():
         raise ValueError(
-            f"Too large tile size {tile_size} for bbox {(xmin, ymin), (xmax, ymax)}: reduce tile size (and merge later if needed)."
+            f"Too large tile size {tile_size} for bbox {(bbox.left, bbox.bottom), (bbox.right, bbox.top)}: reduce tile size (and merge later if needed)."
         )
 
-    # Get GDS
-    ly = Layout()
-    ly.read(gdspath)
-    li = ly.layer(layer[0], layer[1])
-    si = ly.top_cell().begin_shapes_rec(li)
-
     # Setup and execute task
     tp = TilingProcessor()
-    out_receiver = DensityOutputReceiver()
-    tp.output("res", out_receiver)
-    tp.input("input", si)
-    tp.dbu = ly.dbu
+    receivers = [DensityOutputReceiver() for _ in layers]
+    for i, (li, receiver) in enumerate(zip(layer_indexes, receivers)):
+        tp.input(f"input{i}", cell.begin_shapes_rec(li))
+        tp.output(f"res{i}", receiver)
+    tp.dbu = layout.dbu
     tp.tile_size(tile_size[0], tile_size[1])
+    area = "_tile.bbox"
+    if frame is not None:
+        tp.frame = bbox
+        tp.tile_origin(bbox.left, bbox.bottom)
+        # the last tiles extend beyond the frame: only measure the part inside
+        tp.var("frame", bbox.to_itype(layout.dbu))
+        area = "_tile.bbox & frame"
     tp.threads = threads
-    tp.queue(
-        "_tile && (var d = to_f(input.area(_tile.bbox)) / to_f(_tile.bbox.area); _output(res, d))"
+    outputs = "; ".join(
+        f"_output(res{i}, to_f(input{i}.area({area})) / to_f(_tile.bbox.area))"
+        for i in range(len(layers))
     )
+    tp.queue(f"_tile && ({outputs})")
     tp.execute("Density map")
+    ny, nx = receivers[0].density.shape
+    logger.info(
+        f"Density of {len(layers)} layers in {cell.name!r} on {nx}x{ny} tiles, "
+        f"peak memory {_peak_memory():.0f} MB"
+    )
+
+    return {layer: receiver.raster for layer, receiver in zip(layers, receivers)}
+
+
+def calculate_density(
+    gdspath: PathType | Layout,
+    layer: tuple[int, int],
+    cellname: str | None = None,
+    tile_size: tuple[int, int] = (200, 200),
+    threads: int = get_number_of_cores(),
+    bbox: tuple[tuple[float, float], tuple[float, float]] | None = None,
+) -> DensityRaster:
+    """
+    Calculates the density of a given layer in a GDS file and returns the density data.
+
+    Process a GDS file to calculate the density of a specified layer. It divides the layout into tiles of a specified size, computes the density of the layer within each tile, and returns a density raster. The density is calculated as the area of the layer within a tile divided by the total area of the tile.
+    Use :func:`calculate_densities` for several layers.
 
-    return out_receiver.data
+    Args:
+        gdspath (Path): The path to the GDS file or an already loaded layout.
+        layer (Layer): The layer for which to calculate density (layer number, datatype).
+        cellname: cell to process. Defaults to the top cell.
+        tile_size (Tuple, optional): The size of the tiles (width, height) in um. Defaults to (200, 200).
+        threads (int, optional): The number of threads to use for processing. Defaults to total number of threads.
+        bbox: area to tile, see :func:`calculate_densities`. Defaults to the layer bbox.
+
+    Returns:
+        DensityRaster: density of each tile with the grid origin and pitch in um.
+            Iterating over it yields (x, y, density, ix, iy) tuples for each tile.
+    """
+    return calculate_densities(
+        gdspath=gdspath,
+        layers=[layer],
+        cellname=cellname,
+        tile_size=tile_size,
+        threads=threads,
+        bbox=bbox,
+    )[tuple(layer)]
 
 
 def get_layer_polygons(
-    gdspath: Path, layer: Layer, cellname: str | None = None
-) -> list[np.array]:
+    gdspath: PathType | Layout,
+    layer: Layer,
+    cellname: str | None = None,
+    bbox: tuple[tuple[float, float], tuple[float, float]] | None = None,
+) -> list[np.ndarray]:
     """
-    Extracts polygons from a specified layer in a GDS file using gdsfactory.
+    Extracts the merged polygons of a layer in a GDS file using KLayout.
+
+    Only ``layer`` is read from the file. Polygons with holes are returned as their hull.
 
     Args:
-        gdspath (Path): The path to the GDS file.
+        gdspath (Path): The path to the GDS file or an already loaded layout.
         layer (Layer): The layer from which to extract polygons (layer number, datatype).
+        cellname: cell to process. Defaults to the top cell.
+        bbox: ((xmin, ymin), (xmax, ymax)) in um. If given, only the polygons touching it.
 
     Returns:
-        list: A list of polygons from the specified layer.
+        list: (n, 2) arrays of the polygon points in um.
     """
-    # Load the layout and initialize an empty list to hold polygon coordinates
-    component = gf.import_gds(gdspath=gdspath, cellname=cellname)
-    component_layer = component.extract(layers=[layer])
-    return component_layer.get_polygons()
+    layout, cell = _read_layout(gdspath, cellname, layers=[layer])
+    li = layout.layer(*layer)
+    if bbox is None:
+        shapes = cell.begin_shapes_rec(li)
+    else:
+        (xmin, ymin), (xmax, ymax) = bbox
+        shapes = cell.begin_shapes_rec_touching(li, DBox(xmin, ymin, xmax, ymax))
+    return [
+        np.array([(p.x, p.y) for p in polygon.each_point_hull()]) * layout.dbu
+        for polygon in Region(shapes).merged().each()
+    ]
 
 
 def get_gds_bbox(
-    gdspath: Path,
+    gdspath: PathType | Layout,
     layer: Layer | None = None,
     cellname: str | None = None,
 ) -> tuple[tuple[float, float], tuple[float, float]]:
     """
-    Calculates the bounding box of the entire GDS file using gdsfactory.
+    Calculates the bounding box of the entire GDS file using KLayout.
 
     Args:
-        gdspath (Path): The path to the GDS file.
+        gdspath (Path): The path to the GDS file or an already loaded layout.
         layer (Layer): if not None, only consider the bbox of that specific layer
+        cellname: cell to consider. Defaults to the top cell.
 
     Returns:
         tuple: ((xmin,ymin),(xmax,ymax))
     """
-    component = gf.import_gds(gdspath, cellname=cellname)
-    if layer is not None:
-        component = component.extract(layers=[layer])
-    return (component.dxmin, component.dymin), (component.dxmax, component.dymax)
+    layout, cell = _read_layout(gdspath, cellname, layers=layer and [layer])
+    bbox = cell.dbbox() if layer is None else cell.dbbox_per_layer(layout.layer(*layer))
+    return (bbox.left, bbox.bottom), (bbox.right, bbox.top)
+
+
+def _density_grid(
+    x: np.ndarray,
+    y: np.ndarray,
+    density: np.ndarray,
+    ix: np.ndarray | None = None,
+    iy: np.ndarray | None = None,
+    bbox: tuple[tuple[float, float], tuple[float, float]] | None = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Returns tile centers along x and y and the (ny, nx) density grid.
+
+    Tile indices are computed from the coordinates if not given. With a bbox the
+    grid is padded with zero density tiles to cover it.
+    """
+    x0, y0 = x.min(), y.min()
+    unique_x = np.unique(x)
+    unique_y = np.unique(y)
+    x_spacing = np.diff(unique_x).min() if len(unique_x) > 1 else 0.0
+    y_spacing = np.diff(unique_y).min() if len(unique_y) > 1 else 0.0
+    if ix is None:
+        ix = np.rint((x - x0) / x_spacing) if x_spacing else np.zeros_like(x)
+    if iy is None:
+        iy = np.rint((y - y0) / y_spacing) if y_spacing else np.zeros_like(y)
+    ix = np.asarray(ix, dtype=int)
+    iy = np.asarray(iy, dtype=int)
+    ix, iy = ix - ix.min(), iy - iy.min()
+    nx, ny = ix.max() + 1, iy.max() + 1
+
+    # number of tiles to add on each side to cover the bbox
+    left = right = bottom = top = 0
+    if bbox is not None:
+        (xmin, ymin), (xmax, ymax) = bbox
+        eps = 1e-9
+
+        def ntiles(distance: float, spacing: float) -> int:
+            return max(0, int(np.ceil(distance / spacing - eps))) if spacing else 0
+
+        left = ntiles(x0 - xmin - x_spacing / 2, x_spacing)
+        right = ntiles(xmax - x_spacing / 2 - (x0 + (nx - 1) * x_spacing), x_spacing)
+        bottom = ntiles(y0 - ymin - y_spacing / 2, y_spacing)
+        top = ntiles(ymax - y_spacing / 2 - (y0 + (ny - 1) * y_spacing), y_spacing)
+
+    grid_x = x0 + x_spacing * np.arange(-left, nx + right)
+    grid_y = y0 + y_spacing * np.arange(-bottom, ny + top)
+    Zi = np.zeros((len(grid_y), len(grid_x)), dtype=float)
+    Zi[iy + bottom, ix + left] = density
+    return grid_x, grid_y, Zi
 
 
 def extend_grid_and_density_to_bbox(
@@ -146,87 +419,52 @@ def extend_grid_and_density_to_bbox(
         bbox (tuple): Bounding box specified as ((xmin, ymin), (xmax, ymax)).
 
     Returns:
-        tuple: Updated unique_x, unique_y, x, y, and density arrays.
+        tuple: x, y and density arrays of all tiles of the extended grid.
     """
-    (xmin, ymin), (xmax, ymax) = bbox
-
-    unique_x = np.unique(x)
-    unique_y = np.unique(y)
-
-    x_spacing = unique_x[1] - unique_x[0]
-    y_spacing = unique_y[1] - unique_y[0]
-
-    # Extend unique_x and unique_y to cover the full bbox range
-    while unique_x[0] > xmin + x_spacing / 2:
-        unique_x = np.insert(unique_x, 0, unique_x[0] - x_spacing)
-    while unique_x[-1] < xmax - x_spacing / 2:
-        unique_x = np.append(unique_x, unique_x[-1] + x_spacing)
-    while unique_y[0] > ymin + y_spacing / 2:
-        unique_y = np.insert(unique_y, 0, unique_y[0] - y_spacing)
-    while unique_y[-1] < ymax - y_spacing / 2:
-        unique_y = np.append(unique_y, unique_y[-1] + y_spacing)
-
-    # Generate all combinations of new x and y coordinates
-    new_x, new_y = np.meshgrid(unique_x, unique_y)
-    new_x = new_x.flatten()
-    new_y = new_y.flatten()
-
-    # Filter out the original x, y pairs
-    original_xy = set(zip(x, y))
-    new_xy = set(zip(new_x, new_y)) - original_xy
-
-    # Extend x, y, and density arrays with new combinations
-    x_extension, y_extension = zip(*new_xy) if new_xy else ([], [])
-    density_extension = [0] * len(x_extension)
-
-    # Update x, y, and density arrays with extensions
-    x = np.concatenate((x, np.array(x_extension)))
-    y = np.concatenate((y, np.array(y_extension)))
-    density = np.concatenate((density, np.array(density_extension)))
-
-    return x, y, density
+    grid_x, grid_y, Zi = _density_grid(
+        np.asarray(x), np.asarray(y), np.asarray(density), bbox=bbox
+    )
+    Xi, Yi = np.meshgrid(grid_x, grid_y)
+    return Xi.ravel(), Yi.ravel(), Zi.ravel()
 
 
 def density_data_to_meshgrid(
-    density_data: list[tuple[float, float, float]],
+    density_data: DensityRaster | list[tuple[float, ...]],
     bbox: tuple[tuple[float, float], tuple[float, float]] | None = None,
 ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
     Converts density data into a meshgrid for plotting.
 
     Args:
-        density_data (List[Tuple[float, float, float]]): A list of tuples, each containing the x-coordinate, y-coordinate, and density value. Output of "calculate_density"
+        density_data: Output of "calculate_density", or a list of (x, y, density) or (x, y, density, ix, iy) tuples.
         bbox: ((xmin, ymin), (xmax, ymax)). If None, the processed layer is not padded to the full gds size.
 
     Returns:
         Tuple[np.ndarray, np.ndarray, np.ndarray]: Three 2D numpy arrays representing the X coordinates, Y coordinates, and density values on a meshgrid.
     """
-    # Extract x, y, and density values
-    x, y, density = zip(*density_data)
+    if isinstance(density_data, DensityRaster):
+        raster = density_data if bbox is None else density_data.padded(bbox)
+        return raster.meshgrid()
 
-    # Convert to numpy arrays for plotting
-    x = np.array(x)
-    y = np.array(y)
-    density = np.array(density)
+    data = np.asarray(density_data, dtype=float)
+    x, y, density = data[:, 0], data[:, 1], data[:, 2]
+    ix, iy = (data[:, 3], data[:, 4]) if data.shape[1] >= 5 else (None, None)
 
-    if bbox is not None:
-        x, y, density = extend_grid_and_density_to_bbox(x, y, density, bbox)
-
-    # Determine unique x and y coordinates for grid
-    unique_x = np.unique(x)
-    unique_y = np.unique(y)
-
-    # Create a grid for plotting
-    Xi, Yi = np.meshgrid(unique_x, unique_y)
+    grid_x, grid_y, Zi = _density_grid(x, y, density, ix=ix, iy=iy, bbox=bbox)
+    Xi, Yi = np.meshgrid(grid_x, grid_y)
+    return Xi, Yi, Zi
 
-    # Map density values to the grid
-    Zi = np.zeros_like(Xi)
-    for i, (x_val, y_val) in enumerate(zip(x, y)):
-        xi_index = np.where(unique_x == x_val)[0][0]
-        yi_index = np.where(unique_y == y_val)[0][0]
-        Zi[yi_index, xi_index] = density[i]
 
-    return Xi, Yi, Zi
+def _overlaps(
+    centers: np.ndarray, spacing: float, vmin: float, vmax: float
+) -> np.ndarray:
+    """Returns the overlap length of tiles centered at ``centers`` with [vmin, vmax]."""
+    return np.clip(
+        np.minimum(centers + spacing / 2, vmax)
+        - np.maximum(centers - spacing / 2, vmin),
+        0,
+        None,
+    )
 
 
 def estimate_weighted_global_density(
@@ -238,6 +476,9 @@ def estimate_weighted_global_density(
     """
     Calculates the mean density within a specified bounding box or overall if bbox is None.
 
+    Each tile is weighted by its overlap area with the bounding box. Use
+    :class:`DensityIntegral` to evaluate many bounding boxes.
+
     Args:
         Xi (np.ndarray): 2D array of X coordinates.
         Yi (np.ndarray): 2D array of Y coordinates.
@@ -247,51 +488,264 @@ def estimate_weighted_global_density(
     Returns:
         float: Mean density value.
     """
+    if bbox is None:
+        return float(np.mean(Zi))
     (xmin, ymin), (xmax, ymax) = bbox
 
-    total_weighted_density = 0
-    total_weight = 0
-
-    # Calculate the spacing between grid points
-    xi_spacing = np.unique(np.diff(Xi[0, :]))[0]
-    yi_spacing = np.unique(np.diff(Yi[:, 0]))[0]
-
-    # Calculate half spacing for overlap calculation
-    half_xi_spacing = xi_spacing / 2
-    half_yi_spacing = yi_spacing / 2
-
-    # Iterate over each grid point to calculate weighted density
-    for i in range(Xi.shape[0]):
-        for j in range(Xi.shape[1]):
-            # Calculate the center of each tile
-            x_center = Xi[i, j]
-            y_center = Yi[i, j]
-
-            # Calculate the overlap between the bbox and the tile
-            x_overlap = max(
-                0,
-                min(x_center + half_xi_spacing, xmax)
-                - max(x_center - half_xi_spacing, xmin),
-            )
-            y_overlap = max(
-                0,
-                min(y_center + half_yi_spacing, ymax)
-                - max(y_center - half_yi_spacing, ymin),
+    # tile overlaps with the bbox are separable: weights = wy[:, None] * wx[None, :]
+    x, y = Xi[0, :], Yi[:, 0]
+    wx = _overlaps(x, np.diff(x).min(), xmin, xmax) if len(x) > 1 else np.ones(1)
+    wy = _overlaps(y, np.diff(y).min(), ymin, ymax) if len(y) > 1 else np.ones(1)
+
+    total_weight = wy.sum() * wx.sum()
+    if total_weight <= 0:
+        return 0
+    return float(wy @ Zi @ wx / total_weight)
+
+
+class DensityIntegral:
+    """Summed-area table of a :class:`DensityRaster` answering window queries in O(1).
+
+    The density is constant within each tile, so the integrated area is bilinear
+    between tile corners and windows do not need to be aligned to tiles.
+
+    Args:
+        raster: density raster.
+
+    Example:
+        integral = DensityIntegral(calculate_density(gdspath, layer=(1, 0)))
+        integral.mean_density([((0, 0), (50, 50)), ((10, 0), (60, 50))])
+    """
+
+    def __init__(self, raster: DensityRaster) -> None:
+        self.raster = raster
+        ny, nx = raster.shape
+        dx, dy = raster.pitch
+        self.table = np.zeros((ny + 1, nx + 1))
+        self.table[1:, 1:] = raster.density.cumsum(axis=0).cumsum(axis=1) * dx * dy
+
+    def _integral(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Returns the filled area below and left of the points (x, y)."""
+        ny, nx = self.raster.shape
+        (x0, y0), (dx, dy) = self.raster.origin, self.raster.pitch
+        fx = np.clip((x - x0) / dx, 0, nx)
+        fy = np.clip((y - y0) / dy, 0, ny)
+        j = np.minimum(fx.astype(int), nx - 1)
+        i = np.minimum(fy.astype(int), ny - 1)
+        tx, ty = fx - j, fy - i
+        t = self.table
+        return (1 - ty) * ((1 - tx) * t[i, j] + tx * t[i, j + 1]) + ty * (
+            (1 - tx) * t[i + 1, j] + tx * t[i + 1, j + 1]
+        )
+
+    def _bboxes(self, bboxes: np.ndarray) -> tuple[np.ndarray, ...]:
+        bboxes = np.asarray(bboxes, dtype=float)
+        return (
+            bboxes[..., 0, 0],
+            bboxes[..., 0, 1],
+            bboxes[..., 1, 0],
+            bboxes[..., 1, 1],
+        )
+
+    def area(self, bboxes: np.ndarray) -> np.ndarray:
+        """Returns the filled area in each bbox.
+
+        Args:
+            bboxes: (..., 2, 2) array of ((xmin, ymin), (xmax, ymax)) in um.
+        """
+        xmin, ymin, xmax, ymax = self._bboxes(bboxes)
+        f = self._integral
+        return f(xmax, ymax) - f(xmin, ymax) - f(xmax, ymin) + f(xmin, ymin)
+
+    def mean_density(self, bboxes: np.ndarray) -> np.ndarray:
+        """Returns the density in each bbox, weighted as :func:`estimate_weighted_global_density`.
+
+        Only the part of the bbox covered by the raster counts. Bboxes outside
+        the raster have zero density.
+
+        Args:
+            bboxes: (..., 2, 2) array of ((xmin, ymin), (xmax, ymax)) in um.
+        """
+        xmin, ymin, xmax, ymax = self._bboxes(bboxes)
+        (rx0, ry0), (rx1, ry1) = self.raster.bbox
+        covered = np.clip(np.minimum(xmax, rx1) - np.maximum(xmin, rx0), 0, None) * (
+            np.clip(np.minimum(ymax, ry1) - np.maximum(ymin, ry0), 0, None)
+        )
+        area = self.area(bboxes)
+        return np.divide(area, covered, out=np.zeros_like(area), where=covered > 0)
+
+
+MAX_ANNOTATED_TILES = 400
+
+
+def rasterize_layer(
+    layout: Layout,
+    cell: Cell,
+    layer: Layer,
+    bbox: tuple[tuple[float, float], tuple[float, float]],
+    resolution: int = 1000,
+) -> DensityRaster:
+    """Returns the fraction of each pixel covered by ``layer``.
+
+    Uses :meth:`klayout.db.Region.rasterize`, which computes the exact coverage of
+    all pixels in one call instead of drawing polygons one by one.
+
+    Args:
+        layout: loaded layout.
+        cell: cell to rasterize.
+        layer: layer to rasterize (layer number, datatype).
+        bbox: ((xmin, ymin), (xmax, ymax)) area to rasterize in um.
+        resolution: number of pixels along the longer side of the bbox.
+    """
+    (xmin, ymin), (xmax, ymax) = bbox
+    dbu = layout.dbu
+    pixel = max(1, round(max(xmax - xmin, ymax - ymin) / resolution / dbu))
+    nx = max(1, int(np.ceil((xmax - xmin) / dbu / pixel)))
+    ny = max(1, int(np.ceil((ymax - ymin) / dbu / pixel)))
+    origin = DPoint(xmin, ymin).to_itype(dbu)
+
+    region = Region(cell.begin_shapes_rec(layout.layer(*layer)))
+    area = np.asarray(region.rasterize(origin, Vector(pixel, pixel), nx, ny))
+    return DensityRaster(
+        density=area.reshape(ny, nx) / pixel**2,
+        origin=(origin.x * dbu, origin.y * dbu),
+        pitch=(pixel * dbu, pixel * dbu),
+    )
+
+
+def _plot_density(
+    raster: DensityRaster,
+    title: str,
+    bbox: tuple[tuple[float, float], tuple[float, float]] | None = None,
+    overlay: DensityRaster | None = None,
+    cmap=cm.Reds,
+    annotate: bool | None = None,
+) -> plt.Figure:
+    """Returns a figure of the density heatmap of a raster."""
+    Xi, Yi, Zi = density_data_to_meshgrid(raster, bbox=bbox)
+
+    fig, ax = plt.subplots(figsize=(10, 8))
+    mesh = ax.pcolormesh(
+        Xi, Yi, Zi, shading="auto", cmap=cmap, alpha=0.5, edgecolor="k"
+    )
+    if annotate if annotate is not None else Zi.size <= MAX_ANNOTATED_TILES:
+        for x, y, val in zip(Xi.flat, Yi.flat, Zi.flat):
+            ax.text(
+                x,
+                y,
+                f"{val * 100:2.0f}%",
+                ha="center",
+                va="center",
+                fontsize=12,
+                fontweight="bold",
             )
-            overlap_area = x_overlap * y_overlap
+    if overlay is not None:
+        Xo, Yo, Zo = overlay.meshgrid()
+        ax.contourf(Xo, Yo, Zo, levels=[0.5, 1.5], colors="none", hatches=["/"])
+        ax.contour(Xo, Yo, Zo, levels=[0.5], colors="r", linewidths=2)
+    if bbox is not None:
+        (xmin, ymin), (xmax, ymax) = bbox
+        ax.plot(
+            [xmin, xmax, xmax, xmin, xmin],
+            [ymin, ymin, ymax, ymax, ymin],
+            "r--",
+            linewidth=2,
+            label="Full GDS Extent",
+        )
+    fig.colorbar(mesh, ax=ax, label="Density")
+    ax.set_xlabel("X (um)")
+    ax.set_ylabel("Y (um)")
+    ax.set_title(title)
+    return fig
+
+
+def plot_density_heatmaps(
+    gdspath: PathType | Layout,
+    layers: Iterable[Layer],
+    cellnames: Iterable[str] | None = None,
+    tile_size: tuple[float, float] = (200, 200),
+    threads: int = get_number_of_cores(),
+    cmap=cm.Reds,
+    visualize_with_full_gds: bool = True,
+    visualize_polygons: bool = False,
+    resolution: int = 1000,
+    annotate: bool | None = None,
+    dirpath: PathType | None = None,
+) -> dict[tuple[str, Layer], plt.Figure]:
+    """
+    Returns density heatmaps of several layers and cells of a layout read once.
 
-            # Calculate the weighted density
-            if overlap_area > 0:
-                total_weighted_density += Zi[i, j] * overlap_area
-                total_weight += overlap_area
+    The densities of all layers of a cell are computed in one pass with
+    :func:`calculate_densities`.
 
-    # Calculate the weighted average density
-    if total_weight > 0:
-        weighted_average_density = total_weighted_density / total_weight
-    else:
-        weighted_average_density = 0
+    Args:
+        gdspath: The path to the GDS file or an already loaded layout.
+        layers: The layers to plot (layer number, datatype).
+        cellnames: The cells to plot. Defaults to the top cell.
+        tile_size: The size of the tiles (width, height) in um.
+        threads: The number of threads to use for the density calculations.
+        cmap: The matplotlib colormap to use for the heatmaps.
+        visualize_with_full_gds: Pad the heatmaps to the bbox of the cell. This
+            reads all layers, otherwise only ``layers`` are read.
+        visualize_polygons: Overlay the layer shapes, rasterized with :func:`rasterize_layer`.
+        resolution: Number of overlay pixels along the longer side of the plot.
+        annotate: Write the density of each tile. Defaults to True up to
+            ``MAX_ANNOTATED_TILES`` tiles.
+        dirpath: If given, saves each figure as ``{cellname}_{layer}_{datatype}.png``
+            there and closes it.
 
-    return weighted_average_density
+    Returns:
+        dict: maps (cellname, layer) to the figure.
+    """
+    layers = [tuple(layer) for layer in layers]
+    # the full extent needs all layers, otherwise only ``layers`` are read
+    layout, top_cell = _read_layout(
+        gdspath, layers=None if visualize_with_full_gds else layers
+    )
+    cellnames = [top_cell.name] if cellnames is None else list(cellnames)
+    if dirpath is not None:
+        dirpath = Path(dirpath)
+        dirpath.mkdir(parents=True, exist_ok=True)
+
+    figures = {}
+    for cellname in cellnames:
+        _, cell = _read_layout(layout, cellname)
+        rasters = calculate_densities(
+            layout, layers, cellname=cellname, tile_size=tile_size, threads=threads
+        )
+        cell_bbox = cell.dbbox()
+        cell_bbox = (cell_bbox.left, cell_bbox.bottom), (cell_bbox.right, cell_bbox.top)
+        bbox = cell_bbox if visualize_with_full_gds else None
+
+        for layer, raster in rasters.items():
+            overlay = (
+                rasterize_layer(layout, cell, layer, bbox or raster.bbox, resolution)
+                if visualize_polygons
+                else None
+            )
+            if bbox is None:
+                title = f"Layer: {layer}, tile size: {tile_size}, layer bbox only"
+            else:
+                estimate = estimate_weighted_global_density(
+                    *density_data_to_meshgrid(raster, bbox=bbox), bbox=bbox
+                )
+                title = f"Layer: {layer}, tile size: {tile_size}, total density ~{estimate * 100:1.2f}%"
+            if len(cellnames) > 1:
+                title = f"{cellname} {title}"
+
+            fig = _plot_density(
+                raster,
+                title=title,
+                bbox=bbox,
+                overlay=overlay,
+                cmap=cmap,
+                annotate=annotate,
+            )
+            if dirpath is not None:
+                fig.savefig(dirpath / f"{cellname}_{layer[0]}_{layer[1]}.png")
+                plt.close(fig)
+            figures[cellname, layer] = fig
+    return figures
 
 
 def plot_density_heatmap(
@@ -308,71 +762,32 @@ def plot_density_heatmap(
     """
     Generates and displays a heatmap visualization representing the density distribution across a specified layer of a GDS file. The heatmap is constructed using the density data calculated for each tile within the layer.
 
+    Use :func:`plot_density_heatmaps` for many layers and cells.
+
     Args:
         gdspath (Path): The path to the GDS file for which the density heatmap is to be plotted.
         layer (Layer): The specific layer within the GDS file for which the density heatmap is to be generated.
-        tile_size (Tuple, optional): The dimensions (width, height) of each tile, in database units, used for density calculation. Defaults to (200, 200).
+        cellname: cell to plot. Defaults to the top cell.
+        tile_size (Tuple, optional): The dimensions (width, height) of each tile, in um, used for density calculation. Defaults to (200, 200).
         threads (int, optional): The number of threads to utilize for processing the density calculations. Defaults to the total number of threads.
         cmap (Colormap, optional): The matplotlib colormap to use for the heatmap. Defaults to cm.Reds.
         title (str | None, optional): The title for the heatmap plot. If None, a default title is generated based on layer and tile size. Defaults to None.
         visualize_with_full_gds (bool, optional): Flag indicating whether to consider the full extent of the GDS file for plotting. Defaults to True.
-        visualize_polygons (bool, optional): Flag indicating whether to overlay the actual layer polygons on top of the heatmap for reference. Defaults to False.
+        visualize_polygons (bool, optional): Flag indicating whether to overlay the rasterized layer shapes on top of the heatmap for reference. Defaults to False.
     """
-    density_data = calculate_density(
+    figures = plot_density_heatmaps(
         gdspath=gdspath,
-        cellname=cellname,
-        layer=layer,
+        layers=[layer],
+        cellnames=None if cellname is None else [cellname],
         tile_size=tile_size,
         threads=threads,
+        cmap=cmap,
+        visualize_with_full_gds=visualize_with_full_gds,
+        visualize_polygons=visualize_polygons,
     )
-
-    Xi, Yi, Zi = density_data_to_meshgrid(
-        density_data=density_data,
-        bbox=get_gds_bbox(gdspath, cellname=cellname)
-        if visualize_with_full_gds
-        else None,
-    )
-
-    # Plot the heatmap
-    plt.figure(figsize=(10, 8))
-    plt.pcolormesh(Xi, Yi, Zi, shading="auto", cmap=cmap, alpha=0.5, edgecolor="k")
-    for i, val in enumerate(Zi.flatten()):
-        plt.text(
-            Xi.flatten()[i],
-            Yi.flatten()[i],
-            f"{val * 100:2.0f}%",
-            ha="center",
-            va="center",
-            fontsize=12,
-            fontweight="bold",
-        )
-    if visualize_polygons:
-        polygons = get_layer_polygons(gdspath=gdspath, layer=layer)
-        for polygon in polygons:
-            x, y = polygon[:, 0], polygon[:, 1]
-            plt.fill(x, y, fill=False, edgecolor="r", hatch="/", linewidth=2)
-    if visualize_with_full_gds:
-        (xmin, ymin), (xmax, ymax) = get_gds_bbox(gdspath, cellname=cellname)
-        plt.plot(
-            [xmin, xmax, xmax, xmin, xmin],
-            [ymin, ymin, ymax, ymax, ymin],
-            "r--",
-            linewidth=2,
-            label="Full GDS Extent",
-        )
-    plt.colorbar(label="Density")
-    plt.xlabel("X (um)")
-    plt.ylabel("Y (um)")
-    if visualize_with_full_gds:
-        estimate = estimate_weighted_global_density(
-            Xi, Yi, Zi, bbox=get_gds_bbox(gdspath, cellname=cellname)
-        )
-        plt.title(
-            title
-            or f"Layer: {layer}, tile size: {tile_size}, total density ~{estimate * 100:1.2f}%"
-        )
-    else:
-        plt.title(title or f"Layer: {layer}, tile size: {tile_size}, layer bbox only")
+    (fig,) = figures.values()
+    if title:
+        fig.axes[0].set_title(title)
     plt.show()
 
 
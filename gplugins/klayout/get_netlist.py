@@ -1,29 +1,48 @@
 # type: ignore
+import json
+import tempfile
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
 import gdsfactory as gf
 import kfactory as kf
 import klayout.db as kdb
+from gdsfactory import logger
+from gdsfactory.config import get_number_of_cores
 from gdsfactory.typings import PathType
 
 from gplugins.common.config import PATH
+from gplugins.common.utils.get_sparameters_path import (
+    get_called_cell_hashes,
+    get_cell_hash,
+)
+from gplugins.common.utils.result_store import ResultStore
+from gplugins.klayout.get_density import _read_layout
 
+CACHE_VERSION = 1
 
-def get_l2n(
-    gdspath: PathType,
-    klayout_tech_path: PathType | None = None,
-    include_labels: bool = True,
-) -> kdb.LayoutToNetlist:
-    """Get the layout to netlist object from a given GDS and klayout technology file.
 
-    Args:
-        gdspath: Path to the GDS file.
-        klayout_tech_path: Path to the klayout technology file.
-        include_labels: Whether to include labels in the netlist connected as individual nets.
+def _get_layer_names() -> dict[tuple[int, int], set[str]]:
+    """Returns (layer, datatype) of the active PDK layers to their names.
+
+    Names are sets in order to support layer aliases.
+    """
+    reversed_layer_map = {}
+    layers = gf.get_active_pdk().layers
+    for k, v in {layer.name: (layer.layer, layer.datatype) for layer in layers}.items():
+        reversed_layer_map[v] = reversed_layer_map.get(v, set()) | {k}
+    return reversed_layer_map
 
-    Returns:
-        kdb.LayoutToNetlist: The layout to netlist object.
 
+def _get_connections(
+    klayout_tech_path: PathType | None = None,
+) -> list[tuple[str, str, str]]:
+    """Returns the (layer_a, via, layer_b) stack connections of a KLayout technology.
+
+    Writes the technology of the active PDK if no path is given.
     """
-    lib = kf.kcell.KCLayout(str(gdspath))
     Tech = kdb.Technology()
 
     tech_dir = PATH.klayout
@@ -35,19 +54,6 @@ def get_l2n(
     # klayout tech path is now assumed to contain a `tech.lyt`` file to use
     technology = Tech.load(str(klayout_tech_path))
 
-    lib.read(filename=str(gdspath))
-    c = lib.top_kcell()
-
-    l2n = kf.kdb.LayoutToNetlist(c.begin_shapes_rec(0))
-    l2n.threads = kf.config.n_threads
-
-    reversed_layer_map = {}
-    layers = gf.get_active_pdk().layers
-
-    # Reversed layer map with names as sets in order to support layer aliases
-    for k, v in {layer.name: (layer.layer, layer.datatype) for layer in layers}.items():
-        reversed_layer_map[v] = reversed_layer_map.get(v, set()) | {k}
-
     # define stack connections through vias
     layer_connection_iter = [
         [
@@ -56,15 +62,32 @@ def get_l2n(
         ]
         for connectivity in technology.component("connectivity").each()
     ]
-    layer_connection_iter = layer_connection_iter[0] if layer_connection_iter else []
-    correct_layer_names = set(sum(layer_connection_iter, ()))
+    return layer_connection_iter[0] if layer_connection_iter else []
+
+
+def _extract_l2n(
+    layout: kdb.Layout,
+    cell: kdb.Cell,
+    connections: list[tuple[str, str, str]],
+    layer_names: dict[tuple[int, int], set[str]],
+    include_labels: bool = True,
+    threads: int | None = None,
+) -> kdb.LayoutToNetlist:
+    """Returns the extracted layout to netlist object of a cell.
+
+    Uses ``kf.config.n_threads`` threads if ``threads`` is None.
+    """
+    l2n = kdb.LayoutToNetlist(cell.begin_shapes_rec(0))
+    l2n.threads = kf.config.n_threads if threads is None else threads
+
+    correct_layer_names = set(sum(connections, ()))
 
     # label locations on the connected layers on a special layer
-    labels = kdb.Texts(c.begin_shapes_rec(0))
+    labels = kdb.Texts(cell.begin_shapes_rec(0))
     # define the layers to be extracted
-    for l_idx in c.kcl.layer_indexes():
-        layer_info = c.kcl.get_info(l_idx)
-        names = reversed_layer_map[(layer_info.layer, layer_info.datatype)]
+    for l_idx in layout.layer_indexes():
+        layer_info = layout.get_info(l_idx)
+        names = layer_names[(layer_info.layer, layer_info.datatype)]
         try:
             same_name_as_in_connections = next(iter(correct_layer_names & names))
         except StopIteration:
@@ -76,8 +99,7 @@ def get_l2n(
             )
 
     for layer_a, layer_via, layer_b in (
-        (l2n.layer_by_name(layer) for layer in layers)
-        for layers in layer_connection_iter
+        (l2n.layer_by_name(layer) for layer in layers) for layers in connections
     ):
         # Don't try to connect Nones
         if all((layer_a, layer_via)):
@@ -89,6 +111,238 @@ def get_l2n(
     return l2n
 
 
+def _l2n_to_bytes(l2n: kdb.LayoutToNetlist) -> bytes:
+    with tempfile.TemporaryDirectory() as dirpath:
+        filepath = Path(dirpath) / "netlist.l2n"
+        l2n.write_l2n(str(filepath))
+        return filepath.read_bytes()
+
+
+def _read_l2n(filepath: PathType) -> kdb.LayoutToNetlist:
+    l2n = kdb.LayoutToNetlist()
+    l2n.read(str(filepath))
+    return l2n
+
+
+def _l2n_from_bytes(data: bytes) -> kdb.LayoutToNetlist:
+    with tempfile.TemporaryDirectory() as dirpath:
+        filepath = Path(dirpath) / "netlist.l2n"
+        filepath.write_bytes(data)
+        return _read_l2n(filepath)
+
+
+def _extract_l2n_bytes(
+    gdspath: str,
+    cellname: str,
+    connections: list[tuple[str, str, str]],
+    layer_names: dict[tuple[int, int], set[str]],
+    include_labels: bool,
+    threads: int | None,
+) -> bytes:
+    """Extracts a cell of a GDS in a worker process and returns the .l2n file content."""
+    layout, cell = _read_layout(gdspath, cellname)
+    l2n = _extract_l2n(layout, cell, connections, layer_names, include_labels, threads)
+    return _l2n_to_bytes(l2n)
+
+
+class ExtractionSession:
+    """Layout to netlist extraction with the technology and layer map loaded once.
+
+    The technology connections and the layer names of the active PDK are read
+    when the session is created, so many cells can be extracted without writing
+    and parsing the technology again, also in worker processes.
+
+    Args:
+        klayout_tech_path: Path to the klayout technology file.
+            Defaults to the technology of the active PDK.
+        include_labels: Whether to include labels in the netlist connected as individual nets.
+        cache_dir: Directory caching the .l2n results by geometry hash. None to disable caching.
+        threads: KLayout threads of each extraction in this process.
+            Defaults to ``kf.config.n_threads`` at extraction time.
+            Cells extracted in a pool of several workers use one thread each.
+
+    .. code::
+
+        session = ExtractionSession(cache_dir="build/l2n")
+        l2ns = session.extract_many(["a.gds", "b.gds", ("c.gds", "sub_cell")])
+    """
+
+    def __init__(
+        self,
+        klayout_tech_path: PathType | None = None,
+        include_labels: bool = True,
+        cache_dir: PathType | None = None,
+        threads: int | None = None,
+    ) -> None:
+        self.connections = _get_connections(klayout_tech_path)
+        self.layer_names = _get_layer_names()
+        self.include_labels = include_labels
+        self.threads = threads
+        self.store = ResultStore(cache_dir) if cache_dir else None
+        self._settings_key = ResultStore.key(
+            str(CACHE_VERSION),
+            json.dumps(self.connections),
+            json.dumps(sorted((k, sorted(v)) for k, v in self.layer_names.items())),
+            str(include_labels),
+        )
+
+    def key(self, cell: kdb.Cell) -> str:
+        """Returns the cache key of a cell from its geometry and the extraction settings.
+
+        The geometry hash ignores cell names, which end up in the extracted
+        netlist, so the names of the cell and of all cells below it are part of the key.
+        """
+        children = get_called_cell_hashes(cell)
+        return ResultStore.key(
+            self._settings_key,
+            get_cell_hash(cell),
+            cell.name,
+            *sorted(f"{name} {h}" for name, h in children.items()),
+        )
+
+    def extract(
+        self, gdspath: PathType, cellname: str | None = None
+    ) -> kdb.LayoutToNetlist:
+        """Returns the layout to netlist object of a cell of a GDS.
+
+        Args:
+            gdspath: Path to the GDS file.
+            cellname: Cell to extract. Defaults to the top cell.
+        """
+        return self.extract_many([(gdspath, cellname)], max_workers=1)[0]
+
+    def extract_many(
+        self,
+        gdspaths: Iterable[PathType | tuple[PathType, str | None]],
+        max_workers: int | None = None,
+    ) -> list[kdb.LayoutToNetlist]:
+        """Returns the layout to netlist objects of many GDS files or cells.
+
+        Cached results are read from the cache. The others are extracted in a
+        process pool, once per distinct geometry, and added to the cache.
+        Layouts are only read in this process to hash them, the workers read
+        the GDS again.
+
+        Args:
+            gdspaths: GDS paths, or (GDS path, cell name) to extract another cell
+                than the top cell.
+            max_workers: Number of worker processes. Defaults to the number of cores.
+                With 1 worker, cells are extracted in this process.
+        """
+        items = [
+            (item if isinstance(item, tuple) else (item, None)) for item in gdspaths
+        ]
+        max_workers = max_workers or get_number_of_cores()
+        results: list[kdb.LayoutToNetlist | None] = [None] * len(items)
+        jobs: dict[str, list[int]] = {}
+        extracted: dict[str, kdb.LayoutToNetlist] = {}
+        data: dict[str, bytes] = {}
+        # (gdspath, cellname) of the cells extracted by workers
+        cells: dict[str, tuple[str, str]] = {}
+        for i, (gdspath, cellname) in enumerate(items):
+            layout, cell = _read_layout(gdspath, cellname)
+            key = self.key(cell) if self.store is not None else str(i)
+            filepath = self.store.get_path(key) if self.store is not None else None
+            if filepath:
+                results[i] = _read_l2n(filepath)
+                continue
+            jobs.setdefault(key, []).append(i)
+            if key in extracted or key in cells:
+                continue
+            if max_workers <= 1:
+                extracted[key] = _extract_l2n(
+                    layout,
+                    cell,
+                    self.connections,
+                    self.layer_names,
+                    self.include_labels,
+                    self.threads,
+                )
+                if self.store is not None:
+                    data[key] = _l2n_to_bytes(extracted[key])
+            else:
+                cells[key] = (str(gdspath), cell.name)
+
+        args = (self.connections, self.layer_names, self.include_labels)
+        if len(cells) == 1:
+            ((key, (gdspath, cellname)),) = cells.items()
+            data[key] = _extract_l2n_bytes(gdspath, cellname, *args, self.threads)
+        elif cells:
+            with ProcessPoolExecutor(
+                max_workers=min(max_workers, len(cells))
+            ) as executor:
+                futures = {
+                    key: executor.submit(
+                        _extract_l2n_bytes, gdspath, cellname, *args, 1
+                    )
+                    for key, (gdspath, cellname) in cells.items()
+                }
+                data |= {key: future.result() for key, future in futures.items()}
+
+        for key, indexes in jobs.items():
+            if self.store is not None:
+                self.store.put_bytes(key, data[key])
+            for i in indexes:
+                # every item gets its own object, read back if it was already used
+                results[i] = (
+                    extracted.pop(key)
+                    if key in extracted
+                    else _l2n_from_bytes(data[key])
+                )
+
+        n_cached = len(items) - sum(map(len, jobs.values()))
+        logger.debug(f"Extracted {len(jobs)} netlists, read {n_cached} from cache")
+        return results
+
+
+@lru_cache(maxsize=4)
+def _get_session(
+    pdk_name: str,
+    layers: tuple[tuple[str, int, int], ...],
+    klayout_tech_path: str | None,
+    tech_mtime_ns: int | None,
+    include_labels: bool,
+) -> ExtractionSession:
+    """Returns a session per PDK and technology file version, see :func:`get_l2n`."""
+    return ExtractionSession(
+        klayout_tech_path=klayout_tech_path, include_labels=include_labels
+    )
+
+
+def get_l2n(
+    gdspath: PathType,
+    klayout_tech_path: PathType | None = None,
+    include_labels: bool = True,
+) -> kdb.LayoutToNetlist:
+    """Get the layout to netlist object from a given GDS and klayout technology file.
+
+    The technology and layer map are loaded once per active PDK and version of
+    the technology file, for the last few of them, see
+    :class:`ExtractionSession` to extract many cells in parallel with caching.
+
+    Args:
+        gdspath: Path to the GDS file.
+        klayout_tech_path: Path to the klayout technology file.
+        include_labels: Whether to include labels in the netlist connected as individual nets.
+
+    Returns:
+        kdb.LayoutToNetlist: The layout to netlist object.
+
+    """
+    pdk = gf.get_active_pdk()
+    tech_path = Path(klayout_tech_path) if klayout_tech_path else None
+    session = _get_session(
+        pdk.name,
+        tuple(
+            sorted((layer.name, layer.layer, layer.datatype) for layer in pdk.layers)
+        ),
+        str(tech_path) if tech_path else None,
+        tech_path.stat().st_mtime_ns if tech_path else None,
+        include_labels,
+    )
+    return session.extract(gdspath)
+
+
 def get_netlist(gdspath: PathType, **kwargs) -> kdb.Netlist:
     """Returns the SPICE netlist from a given GDS and klayout technology file.
 
@@ -0,0 +1,748 @@
+"""Netlist comparison by Weisfeiler-Lehman refinement of device neighbourhoods.
+
+Devices and nets of both netlists start with a color from their device class
+or net kind. Each iteration hashes every node with the multiset of its
+neighbours colors and the terminals they connect through, for both netlists
+at once so that equal neighbourhoods get equal colors. A color found once in
+each netlist matches a device or net pair, which keeps its color from then on,
+so that a difference only spreads to the nodes it could not be told apart
+from. Refinement stops when no color class splits any more. Each iteration is
+linear in the number of terminals, unlike a graph isomorphism search.
+
+Pins, global nets and supply nets with the same name in both netlists start
+matched, so that a miswired device next to a supply does not change the color
+of the supply and with it of every device on it.
+
+Colors with as many nodes in both netlists are matched. If the pairing of
+their nodes does not verify once refinement is stable, as for the symmetric
+devices of a ring or of identical latches, a node of the smallest tied class
+gets a new color in every part of the netlists cut by the matched nodes, and
+refinement resumes until the classes resolve. The colors left unbalanced are
+the mismatches, reported by circuit.
+
+.. code::
+
+    extracted = HierarchicalNetlist.from_netlist(get_netlist(gdspath))
+    reference = HierarchicalNetlist.from_spice("reference.sp")
+    comparison = compare_netlists(extracted, reference, flatten=True)
+    print(comparison.report())
+"""
+
+from __future__ import annotations
+
+import hashlib
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import cache
+
+import klayout.db as kdb
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+
+from gplugins.klayout.netlist_hierarchy import (
+    CircuitTemplate,
+    CompactGraph,
+    HierarchicalNetlist,
+)
+
+# terminals that can be swapped without changing the device, by the terminals of its class
+swappable_terminals: dict[tuple[str, ...], dict[str, str]] = {
+    ("A", "B"): {"B": "A"},
+    ("A", "B", "W"): {"B": "A"},
+    ("S", "G", "D"): {"D": "S"},
+    ("S", "G", "D", "B"): {"D": "S"},
+}
+
+# nets matched by name if both netlists have them, as pins and global nets
+supply_nets: set[str] = {
+    "vdd",
+    "vss",
+    "gnd",
+    "vcc",
+    "vee",
+    "avdd",
+    "avss",
+    "dvdd",
+    "dvss",
+}
+
+_golden = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _mix(x: np.ndarray) -> np.ndarray:
+    """Returns the splitmix64 hash of 64 bit integers."""
+    x = x + _golden
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+@cache
+def _label(*parts: str | int) -> np.uint64:
+    """Returns a 64 bit color of a node kind, the same for every netlist."""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=8).digest()
+    return np.uint64(int.from_bytes(digest, "little"))
+
+
+@dataclass
+class _Graph:
+    """Device to net graph with the initial colors of its nodes and terminals."""
+
+    device_names: list[str]
+    device_classes: list[str]
+    device_labels: np.ndarray
+    device_offsets: np.ndarray
+    device_nets: np.ndarray
+    terminal_labels: np.ndarray
+    net_names: list[str]
+    net_labels: np.ndarray
+    pins: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+    anchors: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+
+
+@dataclass
+class CircuitComparison:
+    """Matched and unmatched devices and nets of a circuit.
+
+    Devices are named ``{device class}_{name}`` and subcircuits
+    ``{circuit}_{name}``, as the nodes of
+    :func:`~gplugins.klayout.netlist_graph.netlist_to_networkx`.
+
+    Args:
+        name: circuit name.
+        devices: matched (extracted, reference) devices and subcircuits.
+        nets: matched (extracted, reference) nets.
+        extracted_devices: devices of the extracted circuit without a match.
+        reference_devices: devices of the reference circuit without a match.
+        extracted_nets: nets of the extracted circuit without a match.
+        reference_nets: nets of the reference circuit without a match.
+        device_counts: (extracted, reference) number of devices of the classes with different counts.
+        iterations: number of refinement iterations.
+        pin_map: extracted pin of each matched reference pin.
+    """
+
+    name: str
+    devices: list[tuple[str, str]] = field(default_factory=list)
+    nets: list[tuple[str, str]] = field(default_factory=list)
+    extracted_devices: list[str] = field(default_factory=list)
+    reference_devices: list[str] = field(default_factory=list)
+    extracted_nets: list[str] = field(default_factory=list)
+    reference_nets: list[str] = field(default_factory=list)
+    device_counts: dict[str, tuple[int, int]] = field(default_factory=dict)
+    iterations: int = 0
+    pin_map: dict[int, int] = field(default_factory=dict)
+
+    @property
+    def matched(self) -> bool:
+        return not (
+            self.extracted_devices
+            or self.reference_devices
+            or self.extracted_nets
+            or self.reference_nets
+        )
+
+
+@dataclass
+class NetlistComparison:
+    """Comparison of an extracted netlist to a reference netlist, by circuit.
+
+    Args:
+        circuits: comparison of the circuits in both netlists, children first.
+        extracted_circuits: circuits only in the extracted netlist.
+        reference_circuits: circuits only in the reference netlist.
+    """
+
+    circuits: list[CircuitComparison] = field(default_factory=list)
+    extracted_circuits: list[str] = field(default_factory=list)
+    reference_circuits: list[str] = field(default_factory=list)
+
+    @property
+    def matched(self) -> bool:
+        return (
+            all(circuit.matched for circuit in self.circuits)
+            and not self.extracted_circuits
+            and not self.reference_circuits
+        )
+
+    def mismatches(self) -> list[CircuitComparison]:
+        """Returns the comparison of the circuits that do not match."""
+        return [circuit for circuit in self.circuits if not circuit.matched]
+
+    def report(self) -> str:
+        """Returns a text report of the mismatches."""
+        if self.matched:
+            return "Netlists match"
+        lines = []
+        for name in self.extracted_circuits:
+            lines.append(f"Circuit {name!r} only in extracted netlist")
+        for name in self.reference_circuits:
+            lines.append(f"Circuit {name!r} only in reference netlist")
+        for circuit in self.mismatches():
+            lines.append(f"Circuit {circuit.name!r} does not match:")
+            for device_class, (n_extracted, n_reference) in sorted(
+                circuit.device_counts.items()
+            ):
+                lines.append(
+                    f"  {device_class}: {n_extracted} extracted, {n_reference} reference devices"
+                )
+            for kind in ("devices", "nets"):
+                for side in ("extracted", "reference"):
+                    if names := getattr(circuit, f"{side}_{kind}"):
+                        lines.append(f"  unmatched {side} {kind}: {', '.join(names)}")
+        return "\n".join(lines)
+
+
+def _terminal_labels(terminals: tuple[str, ...]) -> list[np.uint64]:
+    swaps = swappable_terminals.get(terminals, {})
+    return [_label("terminal", swaps.get(t, t)) for t in terminals]
+
+
+def _parameter_labels(
+    hierarchy: HierarchicalNetlist,
+    template: CircuitTemplate,
+    devices: np.ndarray,
+    labels: np.ndarray,
+) -> np.ndarray:
+    """Returns device labels hashed with the parameter values, equal to float32 precision."""
+    values = template.device_parameters[devices]
+    hashed = np.ascontiguousarray(values.astype(np.float32)).view(np.uint32)
+    hashed = hashed.astype(np.uint64)
+    if template.device_symbols is not None and hierarchy.symbols is not None:
+        symbols = template.device_symbols[devices]
+        for symbol in np.unique(symbols[symbols >= 0]):
+            hashed[symbols == symbol] = _label("string", hierarchy.symbols[symbol])
+    # columns past the parameters of a class are padding
+    n_parameters = np.array(
+        [len(c.parameters) for c in hierarchy.device_classes], dtype=np.int64
+    )[template.device_classes[devices]]
+    for j, column in enumerate(hashed.T):
+        labels = np.where(j < n_parameters, _mix(labels ^ column), labels)
+    return labels
+
+
+def _template_graph(
+    hierarchy: HierarchicalNetlist,
+    template: CircuitTemplate,
+    pin_labels: dict[str, list[np.uint64]],
+    compare_parameters: bool,
+    seed_names: bool,
+) -> _Graph:
+    """Returns the graph of a circuit with its subcircuits as devices with pin terminals."""
+    classes = hierarchy.device_classes
+    class_labels = np.array(
+        [_label("device", c.name.casefold()) for c in classes], dtype=np.uint64
+    )
+    device_labels = class_labels[template.device_classes]
+    if compare_parameters and len(device_labels):
+        device_labels = _parameter_labels(
+            hierarchy, template, np.arange(len(device_labels)), device_labels
+        )
+    terminal_labels = [
+        label
+        for c in template.device_classes
+        for label in _terminal_labels(classes[c].terminals)
+    ]
+
+    children = [hierarchy.templates[t].name for t in template.subcircuit_templates]
+    subcircuit_labels = [_label("circuit", name.casefold()) for name in children]
+    for i, name in enumerate(children):
+        n_pins = template.pin_offsets[i + 1] - template.pin_offsets[i]
+        terminal_labels.extend(
+            pin_labels.get(name) or [_label("pin", j) for j in range(n_pins)]
+        )
+
+    pins = template.pins
+    net_labels = np.full(len(template.net_names), _label("net"), dtype=np.uint64)
+    net_labels[pins[pins >= 0]] = _label("pin")
+    if seed_names:
+        net_labels = _seed_names(net_labels, template.net_names)
+
+    device_classes = [classes[c].name for c in template.device_classes] + children
+    return _Graph(
+        device_names=[
+            f"{c}_{name}"
+            for c, name in zip(
+                device_classes, template.device_names + template.subcircuit_names
+            )
+        ],
+        device_classes=device_classes,
+        device_labels=np.concatenate(
+            [device_labels, np.array(subcircuit_labels, dtype=np.uint64)]
+        ),
+        device_offsets=np.concatenate(
+            [
+                template.terminal_offsets,
+                template.pin_offsets[1:] + template.terminal_offsets[-1],
+            ]
+        ),
+        device_nets=np.concatenate([template.terminal_nets, template.pin_nets]),
+        terminal_labels=np.array(terminal_labels, dtype=np.uint64),
+        net_names=template.net_names,
+        net_labels=net_labels,
+        pins=pins,
+        anchors=_anchors(template.net_names, pins[pins >= 0]),
+    )
+
+
+def _compact_graph(
+    graph: CompactGraph, compare_parameters: bool, seed_names: bool
+) -> _Graph:
+    """Returns the graph of expanded circuits, without pins."""
+    hierarchy = graph.hierarchy
+    classes = hierarchy.device_classes
+    device_classes = graph.device_classes
+    device_labels = np.array(
+        [_label("device", c.name.casefold()) for c in classes], dtype=np.uint64
+    )[device_classes]
+    if compare_parameters:
+        templates = graph.instance_template[graph.device_instance]
+        for t in np.unique(templates):
+            mask = templates == t
+            device_labels[mask] = _parameter_labels(
+                hierarchy,
+                hierarchy.templates[t],
+                graph.device_local[mask],
+                device_labels[mask],
+            )
+
+    width = max((len(c.terminals) for c in classes), default=0)
+    class_terminals = np.zeros((len(classes), width), dtype=np.uint64)
+    for i, c in enumerate(classes):
+        class_terminals[i, : len(c.terminals)] = _terminal_labels(c.terminals)
+    counts = np.diff(graph.device_offsets)
+    entries = np.arange(graph.device_offsets[-1]) - np.repeat(
+        graph.device_offsets[:-1], counts
+    )
+    terminal_labels = class_terminals[np.repeat(device_classes, counts), entries]
+
+    net_names = graph.net_names()
+    net_labels = np.full(graph.n_nets, _label("net"), dtype=np.uint64)
+    if seed_names:
+        net_labels = _seed_names(net_labels, net_names)
+    # pins of the top circuits, including the global nets
+    net_templates = graph.instance_template[graph.net_instance]
+    is_pin = np.zeros(graph.n_nets, dtype=bool)
+    for t in np.unique(net_templates):
+        is_pin |= (net_templates == t) & np.isin(
+            graph.net_local, hierarchy.templates[t].pins
+        )
+    is_pin &= graph.instance_parent[graph.net_instance] < 0
+    class_names = [classes[c].name for c in device_classes]
+    return _Graph(
+        device_names=[
+            f"{c}_{name}" for c, name in zip(class_names, graph.device_names())
+        ],
+        device_classes=class_names,
+        device_labels=device_labels,
+        device_offsets=graph.device_offsets,
+        device_nets=graph.device_nets,
+        terminal_labels=terminal_labels,
+        net_names=net_names,
+        net_labels=net_labels,
+        anchors=_anchors(net_names, np.nonzero(is_pin)[0]),
+    )
+
+
+def _is_named(name: str) -> bool:
+    """Returns whether a net is named. KLayout names unnamed nets ``$1``, ``$2``..."""
+    return bool(name) and not name.rsplit(".", 1)[-1].startswith("$")
+
+
+def _anchors(names: list[str], pins: np.ndarray) -> np.ndarray:
+    """Returns the named pin and supply nets, which are matched by name."""
+    supplies = [i for i, name in enumerate(names) if name.casefold() in supply_nets]
+    anchors = np.union1d(pins, np.array(supplies, dtype=np.int64)).astype(np.int64)
+    return np.array([i for i in anchors if _is_named(names[i])], dtype=np.int64)
+
+
+def _seed_anchors(extracted: _Graph, reference: _Graph) -> list[np.ndarray]:
+    """Returns the net colors with the anchors named alike in both graphs colored by name."""
+    labels = [extracted.net_labels.copy(), reference.net_labels.copy()]
+    anchors = [
+        {graph.net_names[i].casefold(): i for i in graph.anchors.tolist()}
+        for graph in (extracted, reference)
+    ]
+    for name in anchors[0].keys() & anchors[1].keys():
+        for k in (0, 1):
+            labels[k][anchors[k][name]] = _label("name", name)
+    return labels
+
+
+def _seed_names(labels: np.ndarray, names: list[str]) -> np.ndarray:
+    """Colors named nets by their name."""
+    labels = labels.copy()
+    for i, name in enumerate(names):
+        if _is_named(name):
+            labels[i] = _label("name", name.casefold())
+    return labels
+
+
+def _step(
+    graph: _Graph, devices: np.ndarray, nets: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Returns the device and net colors hashed with the colors of their neighbours."""
+    connected = graph.device_nets >= 0
+    terminal_nets = graph.device_nets[connected]
+    terminal_devices = np.repeat(
+        np.arange(len(devices)), np.diff(graph.device_offsets)
+    )[connected]
+    terminal_labels = graph.terminal_labels[connected]
+
+    # sums of hashes are hashes of the multisets of neighbours
+    device_sums = np.zeros(len(devices), dtype=np.uint64)
+    np.add.at(
+        device_sums, terminal_devices, _mix(nets[terminal_nets] ^ terminal_labels)
+    )
+    net_sums = np.zeros(len(nets), dtype=np.uint64)
+    np.add.at(
+        net_sums, terminal_nets, _mix(devices[terminal_devices] ^ terminal_labels)
+    )
+    return _mix(devices ^ _mix(device_sums)), _mix(nets ^ _mix(net_sums))
+
+
+def _verify(
+    extracted: _Graph,
+    reference: _Graph,
+    device_pairs: list[np.ndarray],
+    net_pairs: list[np.ndarray],
+) -> tuple[np.ndarray, np.ndarray]:
+    """Returns the device pairs not connected to net pairs through equivalent terminals,
+    and the net pairs they disagree on.
+
+    Colors kept from a unique pair do not change with their neighbours, so
+    every device pair is checked against the net pairs. Unmatched nets are
+    already reported and may face any unmatched net.
+    """
+    n_pairs = len(net_pairs[0])
+    signatures, terminal_ids = [], []
+    for graph, devices, nets in zip((extracted, reference), device_pairs, net_pairs):
+        # net pair of each net, -2 for unmatched nets
+        net_ids = np.full(len(graph.net_labels), -2, dtype=np.int64)
+        net_ids[nets] = np.arange(n_pairs)
+        ids = np.where(graph.device_nets >= 0, net_ids[graph.device_nets], -1)
+        n_devices = len(graph.device_labels)
+        sums = np.zeros(n_devices, dtype=np.uint64)
+        np.add.at(
+            sums,
+            np.repeat(np.arange(n_devices), np.diff(graph.device_offsets)),
+            _mix(_mix(ids.astype(np.uint64)) ^ graph.terminal_labels),
+        )
+        signatures.append(sums[devices])
+        terminal_ids.append((graph, ids))
+    failed = signatures[0] != signatures[1]
+
+    failed_nets = np.zeros(n_pairs, dtype=bool)
+    for i, j in zip(device_pairs[0][failed], device_pairs[1][failed]):
+        ids = [
+            set(ids[graph.device_offsets[d] : graph.device_offsets[d + 1]].tolist())
+            for (graph, ids), d in zip(terminal_ids, (i, j))
+        ]
+        for net_id in ids[0] ^ ids[1]:
+            if net_id >= 0:
+                failed_nets[net_id] = True
+    return failed, failed_nets
+
+
+def _pairs(
+    inverse: np.ndarray, balanced: np.ndarray, sizes: list[int]
+) -> list[list[np.ndarray]]:
+    """Returns the paired and unpaired devices and nets of both graphs.
+
+    Nodes of the colors with as many nodes in both graphs are paired in color order.
+    """
+    inverse = np.split(inverse, np.cumsum(sizes)[:-1])
+    pairs = []
+    for k in (0, 1):
+        ours, theirs = inverse[k], inverse[2 + k]
+        a = np.nonzero(balanced[ours])[0]
+        b = np.nonzero(balanced[theirs])[0]
+        pairs.append(
+            [
+                a[np.argsort(ours[a], kind="stable")],
+                b[np.argsort(theirs[b], kind="stable")],
+                np.nonzero(~balanced[ours])[0],
+                np.nonzero(~balanced[theirs])[0],
+            ]
+        )
+    return pairs
+
+
+def _components(
+    graph: _Graph, kept_devices: np.ndarray, kept_nets: np.ndarray
+) -> np.ndarray:
+    """Returns the connected component of each device and net, cut at the kept nodes."""
+    n_devices = len(graph.device_labels)
+    n = n_devices + len(graph.net_labels)
+    terminal_devices = np.repeat(np.arange(n_devices), np.diff(graph.device_offsets))
+    nets = graph.device_nets
+    edges = nets >= 0
+    edges[edges] = ~kept_nets[nets[edges]]
+    edges &= ~kept_devices[terminal_devices]
+    adjacency = sp.coo_matrix(
+        (
+            np.ones(np.count_nonzero(edges), dtype=np.int8),
+            (terminal_devices[edges], n_devices + nets[edges]),
+        ),
+        shape=(n, n),
+    )
+    return connected_components(adjacency, directed=False)[1]
+
+
+def _individualize(
+    graphs: tuple[_Graph, _Graph],
+    colors: list[list[np.ndarray]],
+    tied: list[np.ndarray],
+    kept: list[np.ndarray],
+    n_individualized: int,
+) -> int:
+    """Gives a node of a tied class a new color in every component of the graphs.
+
+    Components are cut at the kept nodes, whose colors do not change any more,
+    so that each component resolves its own symmetry independently. They are
+    paired between the graphs by the sum of their colors. Returns the number
+    of new colors given so far.
+
+    Args:
+        graphs: extracted and reference graphs.
+        colors: device and net colors of each graph, updated in place.
+        tied: whether each device and net of each graph is in the tied class.
+        kept: whether each device and net of each graph keeps its color.
+        n_individualized: number of new colors given so far.
+    """
+    keys = []
+    for s, graph in enumerate(graphs):
+        components = _components(graph, kept[2 * s], kept[2 * s + 1])
+        sums = np.zeros(components.max() + 1, dtype=np.uint64)
+        np.add.at(sums, components, _mix(np.concatenate(colors[s])))
+        nodes = np.nonzero(tied[s])[0]
+        # the first node of each component, ordered by component color
+        _, first = np.unique(components[nodes], return_index=True)
+        nodes = nodes[first]
+        nodes = nodes[np.argsort(sums[components[nodes]], kind="stable")]
+        signatures = sums[components[nodes]]
+        ranks = np.arange(len(nodes)) - np.searchsorted(signatures, signatures)
+        keys.append(dict(zip(zip(signatures.tolist(), ranks.tolist()), nodes)))
+
+    pairs = sorted((keys[0][k], keys[1][k]) for k in keys[0].keys() & keys[1].keys())
+    if not pairs:
+        # no components alike, the tied nodes are paired anyway
+        pairs = [(min(keys[0].values()), min(keys[1].values()))]
+    for k, nodes in enumerate(pairs, n_individualized):
+        label = _label("individualized", k)
+        for s, node in enumerate(nodes):
+            n_devices = len(colors[s][0])
+            if node < n_devices:
+                colors[s][0][node] = label
+            else:
+                colors[s][1][node - n_devices] = label
+    return n_individualized + len(pairs)
+
+
+def _compare_graphs(
+    name: str, extracted: _Graph, reference: _Graph, max_iterations: int | None
+) -> CircuitComparison:
+    graphs = (extracted, reference)
+    colors = [
+        [graph.device_labels.copy(), net_labels]
+        for graph, net_labels in zip(graphs, _seed_anchors(extracted, reference))
+    ]
+    sizes = [len(c) for side in colors for c in side]
+    side = np.repeat([0, 0, 1, 1], sizes)
+    max_iterations = sum(sizes) if max_iterations is None else max_iterations
+
+    offsets = np.cumsum([0, *sizes])
+    n_classes = iterations = n_individualized = 0
+    while True:
+        unique, inverse = np.unique(
+            np.concatenate([c for s in colors for c in s]), return_inverse=True
+        )
+        inverse = inverse.ravel()
+        counts = [
+            np.bincount(inverse[side == s], minlength=len(unique)) for s in (0, 1)
+        ]
+        balanced = counts[0] == counts[1]
+        # colors found once in each netlist are matched and kept
+        unique_pairs = (counts[0] == 1) & (counts[1] == 1)
+        kept = np.split(unique_pairs[inverse], offsets[1:-1])
+        stable = len(unique) == n_classes or iterations == max_iterations
+        if stable or balanced.all():
+            pairs = _pairs(inverse, balanced, sizes)
+            failed = _verify(extracted, reference, *pairs)
+            # a verified pairing of all nodes is an isomorphism, even if colors could still split
+            if balanced.all() and not any(f.any() for f in failed):
+                break
+            # symmetric nodes keep the same colors: give a node of the smallest
+            # tied class a new color in each part of the netlists and refine again.
+            # Classes with a different count are tied too, so that a mismatch in
+            # one part does not leave the parts alike to it unmatched.
+            smaller = np.minimum(counts[0], counts[1])
+            tied = (smaller > 0) & ~unique_pairs
+            if stable and (iterations == max_iterations or not tied.any()):
+                break
+            if stable:
+                color = np.argmin(np.where(tied, smaller, len(inverse)))
+                members = inverse == color
+                n_individualized = _individualize(
+                    graphs,
+                    colors,
+                    [members[side == s] for s in (0, 1)],
+                    kept,
+                    n_individualized,
+                )
+        n_classes = len(unique)
+        iterations += 1
+        for s, graph in enumerate(graphs):
+            devices, nets = _step(graph, *colors[s])
+            colors[s] = [
+                np.where(kept[2 * s], colors[s][0], devices),
+                np.where(kept[2 * s + 1], colors[s][1], nets),
+            ]
+
+    for k in (0, 1):
+        a, b, extra_a, extra_b = pairs[k]
+        pairs[k] = [
+            a[~failed[k]],
+            b[~failed[k]],
+            np.sort(np.concatenate([extra_a, a[failed[k]]])),
+            np.sort(np.concatenate([extra_b, b[failed[k]]])),
+        ]
+
+    comparison = CircuitComparison(name=name, iterations=iterations)
+    for kind, (a, b, extra_a, extra_b) in zip(("devices", "nets"), pairs):
+        names = [getattr(g, f"{kind[:-1]}_names") for g in graphs]
+        setattr(comparison, kind, [(names[0][i], names[1][j]) for i, j in zip(a, b)])
+        setattr(comparison, f"extracted_{kind}", [names[0][i] for i in extra_a])
+        setattr(comparison, f"reference_{kind}", [names[1][j] for j in extra_b])
+
+    net_pairs = dict(zip(pairs[1][1].tolist(), pairs[1][0].tolist()))
+    extracted_pins = {net: j for j, net in reversed(list(enumerate(extracted.pins)))}
+    comparison.pin_map = {
+        k: extracted_pins[net_pairs[net]]
+        for k, net in enumerate(reference.pins.tolist())
+        if net in net_pairs and net_pairs[net] in extracted_pins
+    }
+
+    extracted_counts = Counter(extracted.device_classes)
+    reference_counts = Counter(reference.device_classes)
+    comparison.device_counts = {
+        c: (extracted_counts[c], reference_counts[c])
+        for c in extracted_counts | reference_counts
+        if extracted_counts[c] != reference_counts[c]
+    }
+    return comparison
+
+
+def _pin_map(
+    extracted: CircuitTemplate, reference: CircuitTemplate, pin_map: dict[int, int]
+) -> dict[int, int]:
+    """Returns the pin map completed with the unmatched pins of the same name.
+
+    The pins of a circuit that does not match are then still connected in its
+    parents, which only report their own mismatches.
+    """
+    pin_map = dict(pin_map)
+    used = set(pin_map.values())
+    extracted_names = {
+        extracted.net_names[net].casefold(): j
+        for j, net in enumerate(extracted.pins)
+        if net >= 0 and j not in used
+    }
+    for k, net in enumerate(reference.pins):
+        if k not in pin_map and net >= 0:
+            j = extracted_names.pop(reference.net_names[net].casefold(), None)
+            if j is not None:
+                pin_map[k] = j
+    return pin_map
+
+
+def compare_netlists(
+    extracted: HierarchicalNetlist | kdb.Netlist,
+    reference: HierarchicalNetlist | kdb.Netlist,
+    flatten: bool = False,
+    compare_parameters: bool = False,
+    seed_names: bool = False,
+    max_iterations: int | None = None,
+) -> NetlistComparison:
+    """Compares an extracted netlist to a reference netlist.
+
+    Devices and nets are matched by the Weisfeiler-Lehman colors of their
+    neighbourhoods, see :mod:`gplugins.klayout.netlist_compare`. Swappable
+    terminals, as the ends of a resistor or source and drain of a transistor,
+    are equivalent. Pins, global nets and the :data:`supply_nets` named alike
+    in both netlists are matched by name. Symmetric devices or nets that the
+    colors cannot tell apart are told apart, one pair in each independent
+    part of the netlists at a time, until their pairing verifies.
+
+    Args:
+        extracted: extracted netlist, for example of ``get_netlist``.
+        reference: reference netlist, for example of
+            :meth:`~gplugins.klayout.netlist_hierarchy.HierarchicalNetlist.from_spice`.
+        flatten: compare the expanded top circuits. Otherwise circuits with the
+            same name are compared one by one, children first, with their
+            subcircuits as devices whose pins are matched from the children.
+        compare_parameters: whether devices must have equal parameters, to float32 precision.
+        seed_names: whether nets with the same name must match. Nets named by
+            KLayout such as ``$1`` are not seeded.
+        max_iterations: maximum number of refinement iterations. Defaults to
+            until no color class splits.
+    """
+    extracted, reference = (
+        netlist
+        if isinstance(netlist, HierarchicalNetlist)
+        else HierarchicalNetlist.from_netlist(netlist)
+        for netlist in (extracted, reference)
+    )
+
+    if flatten:
+        name = ",".join(extracted.templates[i].name for i in extracted.top)
+        graphs = [
+            _compact_graph(netlist.expand(), compare_parameters, seed_names)
+            for netlist in (extracted, reference)
+        ]
+        return NetlistComparison(
+            circuits=[_compare_graphs(name, *graphs, max_iterations)]
+        )
+
+    reference_index = {t.name.casefold(): i for i, t in enumerate(reference.templates)}
+    extracted_names = {t.name.casefold() for t in extracted.templates}
+    comparison = NetlistComparison(
+        extracted_circuits=[
+            t.name
+            for t in extracted.templates
+            if t.name.casefold() not in reference_index
+        ],
+        reference_circuits=[
+            t.name
+            for t in reference.templates
+            if t.name.casefold() not in extracted_names
+        ],
+    )
+    # terminal labels of the subcircuits of each circuit, the reference ones from the pin map
+    extracted_pins: dict[str, list[np.uint64]] = {}
+    reference_pins: dict[str, list[np.uint64]] = {}
+    for template in extracted.templates:
+        key = template.name.casefold()
+        if key not in reference_index:
+            continue
+        other = reference.templates[reference_index[key]]
+        circuit = _compare_graphs(
+            template.name,
+            _template_graph(
+                extracted, template, extracted_pins, compare_parameters, seed_names
+            ),
+            _template_graph(
+                reference, other, reference_pins, compare_parameters, seed_names
+            ),
+            max_iterations,
+        )
+        comparison.circuits.append(circuit)
+        extracted_pins[template.name] = [
+            _label("pin", j) for j in range(len(template.pins))
+        ]
+        pin_map = _pin_map(template, other, circuit.pin_map)
+        reference_pins[other.name] = [
+            _label("pin", pin_map.get(k, f"reference {k}"))
+            for k in range(len(other.pins))
+        ]
+    return comparison
@@ -1,5 +1,5 @@
 import itertools
-from collections.abc import Callable
+from collections.abc import Callable, Sequence
 from pathlib import Path
 from tempfile import NamedTemporaryFile
 
@@ -9,9 +9,11 @@ from gdsfactory import logger
 from gdsfactory.typings import PathType
 
 import gplugins.vlsir
+from gplugins.klayout.netlist_hierarchy import HierarchicalNetlist, valid_projections
 from gplugins.klayout.netlist_spice_reader import (
     GdsfactorySpiceReader,
     NetlistSpiceReaderDelegateWithStrings,
+    SymbolTable,
 )
 
 
@@ -20,11 +22,74 @@ def _get_device_name(device: kdb.Device) -> str:
     return f"{device.device_class().name}_{device.expanded_name()}"
 
 
+def _select_top_circuits(top_circuits: Sequence, top_cell: str | None) -> Sequence:
+    """Returns the top circuit named ``top_cell``, or all of them if None."""
+    if not top_cell:
+        return top_circuits
+    try:
+        return (
+            next(c for c in top_circuits if c.name.casefold() == top_cell.casefold()),
+        )
+    except StopIteration as e:
+        available_top_cells = [cell.name for cell in top_circuits]
+        raise ValueError(
+            f"{top_cell=!r} not found in the netlist. Available top cells: {available_top_cells!r}"
+        ) from e
+
+
+def _finalize_nets(
+    G: nx.Graph, all_used_nets: set[str], include_labels: bool, projection: str
+) -> nx.Graph:
+    """Marks the net nodes, or replaces them by edges between their devices without labels."""
+    # Easier to set different colors for nets
+    for net in all_used_nets:
+        G.nodes[net]["is_net"] = True
+
+    if not include_labels:
+        for node in all_used_nets:
+            connections = list(G.neighbors(node))
+            if projection == "star":
+                hub, *others = connections
+                G.add_edges_from(((hub, other) for other in others), net=node)
+            else:
+                G.add_edges_from(itertools.combinations(connections, r=2))
+            G.remove_node(node)
+
+    return G
+
+
+def hierarchy_to_networkx(
+    hierarchy: HierarchicalNetlist,
+    include_labels: bool = True,
+    top_cell: str | None = None,
+    projection: str = "clique",
+) -> nx.Graph:
+    """Convert a :class:`~gplugins.klayout.netlist_hierarchy.HierarchicalNetlist` to a networkx graph.
+
+    Args:
+        hierarchy: The netlist to expand.
+        include_labels: Whether to include net labels in the graph connected to corresponding cells.
+        top_cell: The name of the top cell to consider for the NetworkX graph. Defaults to all top cells.
+        projection: How nets connect devices without labels, see :func:`netlist_to_networkx`.
+    """
+    if projection not in valid_projections:
+        raise ValueError(f"{projection=!r} not in {valid_projections}")
+
+    top_circuits = _select_top_circuits(
+        [hierarchy.templates[i] for i in hierarchy.top], top_cell
+    )
+    G = hierarchy.expand(c.name for c in top_circuits).to_networkx()
+    all_used_nets = {node for node, is_net in G.nodes(data="is_net") if is_net}
+    return _finalize_nets(G, all_used_nets, include_labels, projection)
+
+
 def netlist_to_networkx(
     netlist: kdb.Netlist,
     include_labels: bool = True,
     top_cell: str | None = None,
     spice_reader_instance: NetlistSpiceReaderDelegateWithStrings | None = None,
+    hierarchical: bool = False,
+    projection: str = "clique",
 ) -> nx.Graph:
     """Convert a KLayout DB `Netlist` to a networkx graph.
 
@@ -34,30 +99,41 @@ def netlist_to_networkx(
         top_cell: The name of the top cell to consider for the NetworkX graph. Defaults to all top cells.
         spice_reader_instance: The KLayout Spice reader that was used for parsing SPICE netlists.
             Used for fetching string parameter values from a stored mapping.
+        hierarchical: Expand the subcircuits from a
+            :class:`~gplugins.klayout.netlist_hierarchy.HierarchicalNetlist` instead of
+            flattening the `Netlist` in place. Unnamed devices and nets are then named
+            by their subcircuit path instead of being renumbered.
+        projection: How nets connect devices without labels. "clique" connects all
+            devices of a net, which is k (k - 1) / 2 edges for k devices. "star"
+            connects the first device of a net to the others with a ``net`` edge
+            attribute, which keeps the connected components with k - 1 edges.
 
     Returns:
         A networkx `Graph` representing the connectivity of the `Netlist`.
     """
-    G = nx.Graph()
-    netlist.flatten()
+    if projection not in valid_projections:
+        raise ValueError(f"{projection=!r} not in {valid_projections}")
 
-    top_circuits = list(
-        itertools.islice(netlist.each_circuit_top_down(), netlist.top_circuit_count())
-    )
+    if hierarchical:
+        hierarchy = HierarchicalNetlist.from_netlist(
+            netlist,
+            strings=spice_reader_instance.integer_to_string_map
+            if spice_reader_instance
+            else None,
+        )
+        return hierarchy_to_networkx(hierarchy, include_labels, top_cell, projection)
 
-    if top_cell:
-        try:
-            top_circuits = (
-                next(
-                    c for c in top_circuits if c.name.casefold() == top_cell.casefold()
-                ),
+    netlist.flatten()
+    top_circuits = _select_top_circuits(
+        list(
+            itertools.islice(
+                netlist.each_circuit_top_down(), netlist.top_circuit_count()
             )
-        except StopIteration as e:
-            available_top_cells = [cell.name for cell in top_circuits]
-            raise ValueError(
-                f"{top_cell=!r} not found in the netlist. Available top cells: {available_top_cells!r}"
-            ) from e
+        ),
+        top_cell,
+    )
 
+    G = nx.Graph()
     all_used_nets = set()
     for circuit in top_circuits:
         for device in circuit.each_device():
@@ -91,17 +167,7 @@ def netlist_to_networkx(
                 G.add_edge(device_name, net_name)
                 all_used_nets.add(net_name)
 
-    # Easier to set different colors for nets
-    for net in all_used_nets:
-        G.nodes[net]["is_net"] = True
-
-    if not include_labels:
-        for node in all_used_nets:
-            connections = list(G.neighbors(node))
-            G.add_edges_from(itertools.combinations(connections, r=2))
-            G.remove_node(node)
-
-    return G
+    return _finalize_nets(G, all_used_nets, include_labels, projection)
 
 
 def networkx_from_spice(
@@ -110,6 +176,10 @@ def networkx_from_spice(
     top_cell: str | None = None,
     spice_reader: type[NetlistSpiceReaderDelegateWithStrings]
     | NetlistSpiceReaderDelegateWithStrings = GdsfactorySpiceReader,
+    hierarchical: bool = False,
+    projection: str = "clique",
+    streaming: bool = False,
+    symbols: SymbolTable | None = None,
     **kwargs,
 ) -> nx.Graph:
     """Returns a networkx Graph from a SPICE netlist file or KLayout LayoutToNetlist.
@@ -119,6 +189,13 @@ def networkx_from_spice(
         include_labels: Whether to include labels in the graph connected to corresponding cells.
         top_cell: The name of the top cell to consider for the NetworkX graph. Defaults to all top cells.
         spice_reader: The KLayout Spice reader to use for parsing SPICE netlists.
+        hierarchical: Expand subcircuits without flattening the netlist, see :func:`netlist_to_networkx`.
+        projection: How nets connect devices without labels, see :func:`netlist_to_networkx`.
+        streaming: Read SPICE netlists line by line into a
+            :class:`~gplugins.klayout.netlist_hierarchy.HierarchicalNetlist` without a
+            KLayout `Netlist`, see :meth:`~gplugins.klayout.netlist_hierarchy.HierarchicalNetlist.from_spice`.
+            The spice reader only decides which subcircuits are devices.
+        symbols: Symbol table interning the strings of streamed netlists, shared between calls.
     """
     spice_reader_instance = None
     match Path(filepath).suffix:
@@ -136,9 +213,26 @@ def networkx_from_spice(
                     include_labels=include_labels,
                     top_cell=top_cell,
                     spice_reader=spice_reader,
+                    hierarchical=hierarchical,
+                    projection=projection,
+                    streaming=streaming,
+                    symbols=symbols,
                     **kwargs,
                 )
 
+        case ".cir" | ".sp" | ".spi" | ".spice" if streaming:
+            spice_reader_instance = (
+                spice_reader() if isinstance(spice_reader, Callable) else spice_reader
+            )
+            hierarchy = HierarchicalNetlist.from_spice(
+                filepath,
+                symbols=symbols,
+                as_device=spice_reader_instance.wants_subcircuit,
+            )
+            return hierarchy_to_networkx(
+                hierarchy, include_labels, top_cell, projection
+            )
+
         case ".cir" | ".sp" | ".spi" | ".spice":
             reader = kdb.NetlistSpiceReader(
                 spice_reader_instance := spice_reader()
@@ -159,4 +253,6 @@ def networkx_from_spice(
         include_labels=include_labels,
         top_cell=top_cell,
         spice_reader_instance=spice_reader_instance,
+        hierarchical=hierarchical,
+        projection=projection,
     )
@@ -0,0 +1,1063 @@
+"""Hierarchical netlists expanded on demand into compact array graphs.
+
+:func:`~gplugins.klayout.netlist_graph.netlist_to_networkx` flattens the
+netlist and builds a NetworkX node per device and net, which does not fit in
+memory for full-chip netlists. A :class:`HierarchicalNetlist` keeps every
+circuit once as a :class:`CircuitTemplate` of integer arrays. Device counts are
+computed on the templates, and circuits are only expanded when asked to, into
+a :class:`CompactGraph`: the device to net incidence as CSR arrays, with names
+built from the instance tree only when needed.
+
+.. code::
+
+    hierarchy = HierarchicalNetlist.from_netlist(netlist)
+    print(hierarchy.device_count("TOP"))
+    graph = hierarchy.expand(["TOP"])
+    n_components, device_labels, net_labels = graph.connected_components()
+    G = graph.to_networkx()
+
+SPICE netlists too large for a ``kdb.Netlist`` are streamed into the templates
+with :meth:`HierarchicalNetlist.from_spice`, which interns names and string
+parameters in a :class:`~gplugins.klayout.netlist_spice_reader.SymbolTable`.
+"""
+
+from __future__ import annotations
+
+from array import array
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from dataclasses import dataclass, field
+from functools import cached_property
+
+import klayout.db as kdb
+import networkx as nx
+import numpy as np
+import scipy.sparse as sp
+from gdsfactory import logger
+from gdsfactory.typings import PathType
+from scipy.sparse.csgraph import connected_components
+
+from gplugins.klayout.netlist_spice_reader import (
+    SpiceElement,
+    SpiceEnds,
+    SpiceGlobal,
+    SpiceSubcircuit,
+    SymbolTable,
+    iter_spice,
+)
+
+valid_projections = ["clique", "star"]
+
+# KLayout device classes of SPICE elements: class name (None for the model name),
+# terminals, and SI scaling of the parameters as in ``kdb.DeviceClass``
+spice_device_classes: dict[
+    str, tuple[str | None, tuple[str, ...], dict[str, float]]
+] = {
+    "R": ("RES", ("A", "B"), {"R": 1, "L": 1e-6, "W": 1e-6, "A": 1e-12, "P": 1e-6}),
+    "C": ("CAP", ("A", "B"), {"C": 1, "A": 1e-12, "P": 1e-6}),
+    "L": ("IND", ("A", "B"), {"L": 1}),
+    "D": (None, ("A", "C"), {"A": 1e-12, "P": 1e-6}),
+    "M": (
+        None,
+        ("S", "G", "D", "B"),
+        {"L": 1e-6, "W": 1e-6, "AS": 1e-12, "AD": 1e-12, "PS": 1e-6, "PD": 1e-6},
+    ),
+}
+
+
+@dataclass(frozen=True)
+class DeviceClassInfo:
+    """Name, parameter names and terminal names of a device class."""
+
+    name: str
+    parameters: tuple[str, ...]
+    terminals: tuple[str, ...]
+
+
+@dataclass
+class CircuitTemplate:
+    """Circuit stored once for all its instances. Nets are local indexes.
+
+    Args:
+        name: circuit name.
+        net_names: expanded name of each net.
+        pins: net of each pin, -1 if not connected.
+        device_names: expanded name of each device.
+        device_classes: index of the class of each device.
+        device_parameters: (devices, parameters) values of each device, 0 for missing parameters.
+        device_symbols: (devices, parameters) symbol of string values, -1 for numbers.
+            None if all values are numbers.
+        terminal_offsets: CSR offsets of the device terminals in ``terminal_nets``.
+        terminal_nets: net of each device terminal, -1 if not connected.
+        subcircuit_names: expanded name of each subcircuit.
+        subcircuit_templates: template index of each subcircuit.
+        pin_offsets: CSR offsets of the subcircuit pins in ``pin_nets``.
+        pin_nets: net of each subcircuit pin, -1 if not connected.
+    """
+
+    name: str
+    net_names: list[str] = field(default_factory=list)
+    pins: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+    device_names: list[str] = field(default_factory=list)
+    device_classes: np.ndarray = field(
+        default_factory=lambda: np.zeros(0, dtype=np.int32)
+    )
+    device_parameters: np.ndarray = field(
+        default_factory=lambda: np.zeros((0, 0), dtype=np.float64)
+    )
+    device_symbols: np.ndarray | None = None
+    terminal_offsets: np.ndarray = field(
+        default_factory=lambda: np.zeros(1, dtype=np.int64)
+    )
+    terminal_nets: np.ndarray = field(
+        default_factory=lambda: np.zeros(0, dtype=np.int64)
+    )
+    subcircuit_names: list[str] = field(default_factory=list)
+    subcircuit_templates: np.ndarray = field(
+        default_factory=lambda: np.zeros(0, dtype=np.int32)
+    )
+    pin_offsets: np.ndarray = field(default_factory=lambda: np.zeros(1, dtype=np.int64))
+    pin_nets: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+
+
+class HierarchicalNetlist:
+    """Netlist as circuit templates, expanded on demand.
+
+    Templates are ordered bottom-up, so children come before their parents.
+
+    Args:
+        templates: circuit templates, children first.
+        device_classes: device classes referenced by the templates.
+        top: indexes of the top circuits.
+        strings: integer parameter values to the strings they encode, as the
+            ``integer_to_string_map`` of
+            :class:`~gplugins.klayout.netlist_spice_reader.NetlistSpiceReaderDelegateWithStrings`.
+        symbols: symbol table of the ``device_symbols`` of the templates.
+    """
+
+    def __init__(
+        self,
+        templates: list[CircuitTemplate],
+        device_classes: list[DeviceClassInfo],
+        top: list[int],
+        strings: Mapping[int, str] | None = None,
+        symbols: SymbolTable | None = None,
+    ) -> None:
+        self.templates = templates
+        self.device_classes = device_classes
+        self.top = top
+        self.strings = strings or {}
+        self.symbols = symbols
+        self.index = {template.name: i for i, template in enumerate(templates)}
+
+    @classmethod
+    def from_netlist(
+        cls, netlist: kdb.Netlist, strings: Mapping[int, str] | None = None
+    ) -> HierarchicalNetlist:
+        """Returns the templates of a KLayout netlist, which is not modified.
+
+        Args:
+            netlist: KLayout netlist.
+            strings: integer parameter values to the strings they encode.
+        """
+        device_classes: list[DeviceClassInfo] = []
+        class_index: dict[str, int] = {}
+        templates: list[CircuitTemplate] = []
+        index: dict[str, int] = {}
+
+        for circuit in netlist.each_circuit_bottom_up():
+            devices = list(circuit.each_device())
+            classes = []
+            parameters = []
+            for device in devices:
+                device_class = device.device_class()
+                if device_class.name not in class_index:
+                    class_index[device_class.name] = len(device_classes)
+                    device_classes.append(
+                        DeviceClassInfo(
+                            name=device_class.name,
+                            parameters=tuple(
+                                p.name for p in device_class.parameter_definitions()
+                            ),
+                            terminals=tuple(
+                                t.name for t in device_class.terminal_definitions()
+                            ),
+                        )
+                    )
+                info = device_classes[class_index[device_class.name]]
+                classes.append(class_index[device_class.name])
+                parameters.append([device.parameter(p) for p in info.parameters])
+            width = max(map(len, parameters), default=0)
+            device_parameters = np.zeros((len(devices), width), dtype=np.float64)
+            for i, values in enumerate(parameters):
+                device_parameters[i, : len(values)] = values
+            terminal_offsets = np.zeros(len(devices) + 1, dtype=np.int64)
+            terminal_offsets[1:] = np.cumsum(
+                [len(device_classes[c].terminals) for c in classes], dtype=np.int64
+            )
+            terminal_nets = np.full(terminal_offsets[-1], -1, dtype=np.int64)
+            device_index = {device.id(): i for i, device in enumerate(devices)}
+
+            subcircuits = list(circuit.each_subcircuit())
+            children = [index[s.circuit_ref().name] for s in subcircuits]
+            pin_offsets = np.zeros(len(subcircuits) + 1, dtype=np.int64)
+            pin_offsets[1:] = np.cumsum(
+                [len(templates[child].pins) for child in children], dtype=np.int64
+            )
+            pin_nets = np.full(pin_offsets[-1], -1, dtype=np.int64)
+            subcircuit_index = {s.id(): i for i, s in enumerate(subcircuits)}
+
+            # KLayout nets have no identity in Python: index them through their references
+            pins = np.full(circuit.pin_count(), -1, dtype=np.int64)
+            net_names = []
+            for i, net in enumerate(circuit.each_net()):
+                net_names.append(net.expanded_name())
+                for ref in net.each_terminal():
+                    j = device_index[ref.device().id()]
+                    terminal_nets[terminal_offsets[j] + ref.terminal_id()] = i
+                for ref in net.each_subcircuit_pin():
+                    j = subcircuit_index[ref.subcircuit().id()]
+                    pin_nets[pin_offsets[j] + ref.pin_id()] = i
+                for ref in net.each_pin():
+                    pins[ref.pin_id()] = i
+
+            index[circuit.name] = len(templates)
+            templates.append(
+                CircuitTemplate(
+                    name=circuit.name,
+                    net_names=net_names,
+                    pins=pins,
+                    device_names=[device.expanded_name() for device in devices],
+                    device_classes=np.array(classes, dtype=np.int32),
+                    device_parameters=device_parameters,
+                    terminal_offsets=terminal_offsets,
+                    terminal_nets=terminal_nets,
+                    subcircuit_names=[s.expanded_name() for s in subcircuits],
+                    subcircuit_templates=np.array(children, dtype=np.int32),
+                    pin_offsets=pin_offsets,
+                    pin_nets=pin_nets,
+                )
+            )
+
+        top = [
+            index[circuit.name]
+            for _, circuit in zip(
+                range(netlist.top_circuit_count()), netlist.each_circuit_top_down()
+            )
+        ]
+        return cls(templates, device_classes, top, strings)
+
+    @classmethod
+    def from_spice(
+        cls,
+        filepath: PathType,
+        symbols: SymbolTable | None = None,
+        as_device: Callable[[str], bool] | None = None,
+    ) -> HierarchicalNetlist:
+        """Returns the templates of a SPICE netlist read as a stream.
+
+        Elements are added to a :class:`HierarchicalNetlistBuilder` as they are
+        parsed, without a ``kdb.Netlist``, so the memory grows with the
+        templates rather than the file. R, C, L, D and M elements become the
+        KLayout device classes of the ``kdb.NetlistSpiceReader``. ``X`` elements
+        calling an undefined circuit, or one for which ``as_device`` is true,
+        become devices of the model class with parameters and location as in
+        :class:`~gplugins.klayout.netlist_spice_reader.CalibreSpiceReader`.
+        Parameters of subcircuit calls are ignored. ``.GLOBAL`` nets are
+        connected through all circuits, see :meth:`HierarchicalNetlistBuilder.add_global`.
+
+        Args:
+            filepath: path to the SPICE netlist.
+            symbols: symbol table to intern strings in, shared between netlists.
+            as_device: whether the instances of a circuit are devices, as
+                ``NetlistSpiceReaderDelegate.wants_subcircuit``.
+        """
+        builder = HierarchicalNetlistBuilder(symbols)
+        for record in iter_spice(filepath):
+            if isinstance(record, SpiceSubcircuit):
+                builder.begin_circuit(record.name, record.pins)
+            elif isinstance(record, SpiceEnds):
+                builder.end_circuit()
+            elif isinstance(record, SpiceGlobal):
+                builder.add_global(record.nets)
+            else:
+                _add_spice_element(builder, record)
+        return builder.build(as_device)
+
+    def device_counts(self) -> np.ndarray:
+        """Returns the number of devices of each template once expanded."""
+        counts = np.zeros(len(self.templates), dtype=np.int64)
+        for i, template in enumerate(self.templates):
+            counts[i] = (
+                len(template.device_names) + counts[template.subcircuit_templates].sum()
+            )
+        return counts
+
+    def device_count(self, circuit: str | None = None) -> int:
+        """Returns the number of devices of a circuit once expanded, without expanding it.
+
+        Args:
+            circuit: circuit name. Defaults to all top circuits.
+        """
+        counts = self.device_counts()
+        if circuit is None:
+            return int(counts[self.top].sum())
+        return int(counts[self._template(circuit)])
+
+    def _template(self, name: str) -> int:
+        if name not in self.index:
+            raise ValueError(f"Circuit {name!r} not in {list(self.index)}")
+        return self.index[name]
+
+    def expand(self, circuits: Iterable[str] | None = None) -> CompactGraph:
+        """Returns the flat device to net graph of circuits.
+
+        Circuits are expanded level by level, all instances of a template at
+        once, so the cost grows with the number of templates and levels rather
+        than of instances. Nets joined through subcircuit pins are merged and
+        keep the name of their topmost part.
+
+        Args:
+            circuits: names of the circuits to expand. Defaults to the top circuits.
+        """
+        roots = (
+            self.top
+            if circuits is None
+            else [self._template(name) for name in circuits]
+        )
+        instance_parent, instance_template, instance_local = [], [], []
+        device_instance, device_local, device_terminals, device_nets = [], [], [], []
+        net_instance, net_local, aliases = [], [], []
+        n_instances = n_nets = 0
+
+        # instances of a level grouped by template: parents, subcircuit indexes, pin nets
+        level: dict[int, list[tuple[np.ndarray, np.ndarray, np.ndarray]]] = {}
+        for root in roots:
+            level.setdefault(root, []).append(
+                (
+                    np.full(1, -1),
+                    np.full(1, -1),
+                    np.full((1, len(self.templates[root].pins)), -1),
+                )
+            )
+        while level:
+            next_level: dict[int, list[tuple[np.ndarray, np.ndarray, np.ndarray]]] = {}
+            for t, groups in level.items():
+                template = self.templates[t]
+                parents = np.concatenate([group[0] for group in groups])
+                k = len(parents)
+                instances = np.arange(n_instances, n_instances + k)
+                n_instances += k
+                instance_parent.append(parents)
+                instance_template.append(np.full(k, t))
+                instance_local.append(np.concatenate([group[1] for group in groups]))
+
+                outer = np.concatenate([group[2] for group in groups])
+                nets = np.full((k, len(template.net_names)), -1, dtype=np.int64)
+                for j, local in enumerate(template.pins):
+                    if local < 0:
+                        continue
+                    current, new = nets[:, local], outer[:, j]
+                    # pins shorted inside the circuit join the outer nets
+                    shorted = (current >= 0) & (new >= 0) & (current != new)
+                    if shorted.any():
+                        aliases.append(np.stack([current[shorted], new[shorted]]))
+                    nets[:, local] = np.where(current >= 0, current, new)
+                own = nets < 0
+                n_own = int(np.count_nonzero(own))
+                nets[own] = np.arange(n_nets, n_nets + n_own)
+                n_nets += n_own
+                rows, columns = np.nonzero(own)
+                net_instance.append(instances[rows])
+                net_local.append(columns)
+                # extra -1 column for the unconnected (-1) terminals and pins
+                nets = np.pad(nets, ((0, 0), (0, 1)), constant_values=-1)
+
+                n_devices = len(template.device_names)
+                if n_devices:
+                    terminal_nets = template.terminal_nets
+                    device_instance.append(np.repeat(instances, n_devices))
+                    device_local.append(np.tile(np.arange(n_devices), k))
+                    device_terminals.append(
+                        np.tile(np.diff(template.terminal_offsets), k)
+                    )
+                    device_nets.append(nets[:, terminal_nets].ravel())
+
+                for i, child in enumerate(template.subcircuit_templates):
+                    pin_nets = template.pin_nets[
+                        template.pin_offsets[i] : template.pin_offsets[i + 1]
+                    ]
+                    next_level.setdefault(int(child), []).append(
+                        (
+                            instances,
+                            np.full(k, i),
+                            nets[:, pin_nets],
+                        )
+                    )
+            level = next_level
+
+        def concatenate(arrays: list[np.ndarray]) -> np.ndarray:
+            return np.concatenate(arrays) if arrays else np.zeros(0, dtype=np.int64)
+
+        device_nets = concatenate(device_nets)
+        net_instance = concatenate(net_instance)
+        net_local = concatenate(net_local)
+        if aliases:
+            pairs = np.concatenate(aliases, axis=1)
+            joined = sp.coo_matrix(
+                (np.ones(pairs.shape[1]), (pairs[0], pairs[1])), shape=(n_nets, n_nets)
+            )
+            _, labels = connected_components(joined, directed=False)
+            # labels are numbered by their lowest net, which is the topmost one
+            _, first = np.unique(labels, return_index=True)
+            net_instance, net_local = net_instance[first], net_local[first]
+            device_nets = np.where(device_nets >= 0, labels[device_nets], -1)
+
+        device_offsets = np.zeros(sum(map(len, device_local)) + 1, dtype=np.int64)
+        np.cumsum(concatenate(device_terminals), out=device_offsets[1:])
+        return CompactGraph(
+            hierarchy=self,
+            instance_parent=concatenate(instance_parent),
+            instance_template=concatenate(instance_template),
+            instance_local=concatenate(instance_local),
+            device_instance=concatenate(device_instance),
+            device_local=concatenate(device_local),
+            device_offsets=device_offsets,
+            device_nets=device_nets,
+            net_instance=net_instance,
+            net_local=net_local,
+        )
+
+
+@dataclass
+class CompactGraph:
+    """Flat device to net graph as arrays.
+
+    Devices and nets are numbered in expansion order and point back to their
+    instance in the expanded instance tree, which names them.
+
+    Args:
+        hierarchy: expanded netlist.
+        instance_parent: parent instance of each instance, -1 for roots.
+        instance_template: template of each instance.
+        instance_local: subcircuit index of each instance in its parent.
+        device_instance: instance of each device.
+        device_local: device index of each device in its template.
+        device_offsets: CSR offsets of the device terminals in ``device_nets``.
+        device_nets: net of each device terminal, -1 if not connected.
+        net_instance: instance of each net.
+        net_local: net index of each net in its template.
+    """
+
+    hierarchy: HierarchicalNetlist
+    instance_parent: np.ndarray
+    instance_template: np.ndarray
+    instance_local: np.ndarray
+    device_instance: np.ndarray
+    device_local: np.ndarray
+    device_offsets: np.ndarray
+    device_nets: np.ndarray
+    net_instance: np.ndarray
+    net_local: np.ndarray
+
+    @property
+    def n_devices(self) -> int:
+        return len(self.device_instance)
+
+    @property
+    def n_nets(self) -> int:
+        return len(self.net_instance)
+
+    @property
+    def device_classes(self) -> np.ndarray:
+        """Index of the class of each device in ``hierarchy.device_classes``."""
+        classes = np.zeros(self.n_devices, dtype=np.int32)
+        templates = self.instance_template[self.device_instance]
+        for t in np.unique(templates):
+            mask = templates == t
+            classes[mask] = self.hierarchy.templates[t].device_classes[
+                self.device_local[mask]
+            ]
+        return classes
+
+    def _instance_paths(self) -> list[str]:
+        paths = []
+        for parent, local in zip(self.instance_parent, self.instance_local):
+            if parent < 0:
+                paths.append("")
+                continue
+            template = self.hierarchy.templates[self.instance_template[parent]]
+            name = template.subcircuit_names[local]
+            paths.append(f"{paths[parent]}.{name}" if paths[parent] else name)
+        return paths
+
+    def _names(
+        self, instances: np.ndarray, locals_: np.ndarray, attribute: str
+    ) -> list[str]:
+        paths = self._instance_paths()
+        names = []
+        for instance, local in zip(instances, locals_):
+            template = self.hierarchy.templates[self.instance_template[instance]]
+            name = getattr(template, attribute)[local]
+            names.append(f"{paths[instance]}.{name}" if paths[instance] else name)
+        return names
+
+    def device_names(self) -> list[str]:
+        """Returns the device names, prefixed by their subcircuit path as in ``Netlist.flatten``."""
+        return self._names(self.device_instance, self.device_local, "device_names")
+
+    def net_names(self) -> list[str]:
+        """Returns the net names, prefixed by their subcircuit path as in ``Netlist.flatten``."""
+        return self._names(self.net_instance, self.net_local, "net_names")
+
+    def incidence(self) -> sp.csr_matrix:
+        """Returns the (devices, nets) incidence matrix counting the terminals on each net."""
+        devices = np.repeat(np.arange(self.n_devices), np.diff(self.device_offsets))
+        connected = self.device_nets >= 0
+        return sp.csr_matrix(
+            (
+                np.ones(np.count_nonzero(connected), dtype=np.int32),
+                (devices[connected], self.device_nets[connected]),
+            ),
+            shape=(self.n_devices, self.n_nets),
+        )
+
+    @cached_property
+    def _incidences(self) -> tuple[sp.csr_matrix, sp.csc_matrix]:
+        incidence = self.incidence()
+        return incidence, incidence.tocsc()
+
+    def net_degree(self) -> np.ndarray:
+        """Returns the number of devices on each net."""
+        return np.diff(self._incidences[1].indptr)
+
+    def neighbors(self, device: int) -> np.ndarray:
+        """Returns the devices sharing a net with ``device``.
+
+        Reads the nets of the device and their devices from the incidence,
+        so high fanout nets are never projected to device pairs.
+        """
+        by_device, by_net = self._incidences
+        nets = by_device.indices[
+            by_device.indptr[device] : by_device.indptr[device + 1]
+        ]
+        devices = np.unique(
+            np.concatenate(
+                [by_net.indices[by_net.indptr[n] : by_net.indptr[n + 1]] for n in nets]
+                or [np.zeros(0, dtype=np.int32)]
+            )
+        )
+        return devices[devices != device]
+
+    def adjacency(self, projection: str = "star") -> sp.csr_matrix:
+        """Returns the symmetric (devices, devices) adjacency of the nets projected on devices.
+
+        Args:
+            projection: "star" connects the first device of each net to the
+                others, with as many edges as terminals. It keeps the connected
+                components but not which devices share a net, see :meth:`neighbors`.
+                "clique" connects all devices of each net, with k (k - 1) / 2
+                edges for a net of k devices.
+        """
+        if projection not in valid_projections:
+            raise ValueError(f"{projection=!r} not in {valid_projections}")
+        by_device, by_net = self._incidences
+        if projection == "clique":
+            adjacency = (by_device @ by_device.T).tocsr()
+            adjacency.setdiag(0)
+            adjacency.eliminate_zeros()
+        else:
+            degree = np.diff(by_net.indptr)
+            hubs = np.repeat(
+                by_net.indices[by_net.indptr[:-1][degree > 0]], degree[degree > 0]
+            )
+            others = by_net.indices
+            keep = others != hubs
+            star = sp.coo_matrix(
+                (np.ones(np.count_nonzero(keep)), (hubs[keep], others[keep])),
+                shape=(self.n_devices, self.n_devices),
+            )
+            adjacency = (star + star.T).tocsr()
+        adjacency.data[:] = 1
+        return adjacency
+
+    def connected_components(self) -> tuple[int, np.ndarray, np.ndarray]:
+        """Returns the number of connected components and the component of each device and net."""
+        incidence = self.incidence()
+        adjacency = sp.bmat([[None, incidence], [incidence.T, None]], format="csr")
+        n, labels = connected_components(adjacency, directed=False)
+        return n, labels[: self.n_devices], labels[self.n_devices :]
+
+    def to_networkx(self) -> nx.Graph:
+        """Returns the graph of device and net nodes as built by
+        :func:`~gplugins.klayout.netlist_graph.netlist_to_networkx` with labels.
+
+        Device nodes are named ``{device class}_{device name}`` with the device
+        parameters as attributes, net nodes by their name with ``is_net=True``.
+        """
+        strings = self.hierarchy.strings
+        symbols = self.hierarchy.symbols
+        device_classes = self.hierarchy.device_classes
+        device_names = self.device_names()
+        net_names = self.net_names()
+
+        G = nx.Graph()
+        for i, c in enumerate(self.device_classes):
+            info = device_classes[c]
+            template = self.hierarchy.templates[
+                self.instance_template[self.device_instance[i]]
+            ]
+            local = self.device_local[i]
+            values = template.device_parameters[local].tolist()
+            if template.device_symbols is not None:
+                values = [
+                    symbols[symbol] if symbol >= 0 else value
+                    for value, symbol in zip(values, template.device_symbols[local])
+                ]
+            parameters = {
+                name: strings.get(int(value), value)
+                if strings and isinstance(value, float)
+                else value
+                for name, value in zip(info.parameters, values)
+            }
+            device = f"{info.name}_{device_names[i]}"
+            G.add_node(device, **parameters)
+            for net in self.device_nets[
+                self.device_offsets[i] : self.device_offsets[i + 1]
+            ]:
+                if net >= 0:
+                    G.add_edge(device, net_names[net])
+                    G.nodes[net_names[net]]["is_net"] = True
+        return G
+
+
+def _add_spice_element(
+    builder: HierarchicalNetlistBuilder, element: SpiceElement
+) -> None:
+    """Adds a parsed SPICE element as KLayout would read it."""
+    if element.element == "X":
+        builder.add_instance(
+            element.model,
+            element.name,
+            element.nets,
+            # devices have a location, 0 if not given
+            element.parameters
+            | {key: element.parameters.get(key, 0.0) for key in ("x", "y")},
+        )
+        return
+    device_class, terminals, scaling = spice_device_classes[element.element]
+    parameters = dict(element.parameters)
+    if element.value is not None:
+        parameters[next(iter(scaling))] = element.value
+    parameters = {
+        key: value / scaling[key]
+        if key in scaling and not isinstance(value, str)
+        else value
+        for key, value in parameters.items()
+    }
+    nets = element.nets
+    if element.element == "M":
+        # SPICE order is drain, gate, source, bulk
+        nets = [nets[2], nets[1], nets[0], nets[3]]
+    builder.add_device(
+        device_class or element.model,
+        element.name,
+        nets,
+        parameters,
+        terminals=terminals,
+        class_parameters=tuple(scaling),
+    )
+
+
+def _csr_rows(
+    offsets: np.ndarray, values: np.ndarray, rows: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Returns the offsets and values of some rows of a CSR array."""
+    lengths = offsets[rows + 1] - offsets[rows]
+    new_offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=new_offsets[1:])
+    starts = np.repeat(offsets[rows] - new_offsets[:-1], lengths)
+    return new_offsets, values[starts + np.arange(new_offsets[-1])]
+
+
+@dataclass
+class _CircuitBuffer:
+    """Elements of a circuit as added to a builder, in compact arrays.
+
+    Elements are devices or instances of a model, a device class or a circuit,
+    with their nets and ``key=value`` parameters as CSR arrays.
+    """
+
+    name: str
+    pins: list[int] = field(default_factory=list)
+    nets: dict[str, int] = field(default_factory=dict)
+    names: list[str] = field(default_factory=list)
+    is_instance: array = field(default_factory=lambda: array("b"))
+    models: array = field(default_factory=lambda: array("q"))
+    net_offsets: array = field(default_factory=lambda: array("q", [0]))
+    element_nets: array = field(default_factory=lambda: array("q"))
+    parameter_offsets: array = field(default_factory=lambda: array("q", [0]))
+    parameter_keys: array = field(default_factory=lambda: array("q"))
+    parameter_values: array = field(default_factory=lambda: array("d"))
+    parameter_symbols: array = field(default_factory=lambda: array("q"))
+
+    def net(self, name: str) -> int:
+        return self.nets.setdefault(name, len(self.nets))
+
+
+class HierarchicalNetlistBuilder:
+    """Builds a :class:`HierarchicalNetlist` from elements added one at a time.
+
+    Elements are kept in compact arrays with their models, parameter names
+    and string values interned in a symbol table, so a netlist can be streamed
+    in without a ``kdb.Netlist``. Subcircuit instances are resolved by
+    :meth:`build`, so circuits can be used before they are defined. Elements
+    outside of a circuit go to the ``.TOP`` circuit, as in the KLayout SPICE reader.
+
+    Args:
+        symbols: symbol table to intern strings in, shared between netlists.
+
+    .. code::
+
+        builder = HierarchicalNetlistBuilder()
+        builder.begin_circuit("INV", ["A", "Y", "VDD", "VSS"])
+        builder.add_device("PMOS", "1", ["VDD", "A", "Y", "VDD"], {"W": 1.0})
+        builder.end_circuit()
+        builder.add_instance("INV", "1", ["IN", "OUT", "VDD", "VSS"])
+        hierarchy = builder.build()
+    """
+
+    top_name = ".TOP"
+
+    def __init__(self, symbols: SymbolTable | None = None) -> None:
+        self.symbols = symbols if symbols is not None else SymbolTable()
+        # device class name to its terminals and parameter columns
+        self.device_classes: dict[str, tuple[tuple[str, ...], dict[str, int]]] = {}
+        self._circuits: dict[str, _CircuitBuffer] = {}
+        self._current: _CircuitBuffer | None = None
+        self.global_nets: dict[str, None] = {}
+
+    def begin_circuit(self, name: str, pins: Sequence[str]) -> None:
+        """Starts the definition of a circuit, whose elements are added until :meth:`end_circuit`."""
+        if self._current is not None:
+            raise ValueError(
+                f"Circuit {name!r} defined inside circuit {self._current.name!r}"
+            )
+        if name in self._circuits:
+            raise ValueError(f"Circuit {name!r} defined twice")
+        self._current = self._circuits[name] = _CircuitBuffer(name)
+        self._current.pins = [self._current.net(pin) for pin in pins]
+
+    def end_circuit(self) -> None:
+        """Ends the definition of the current circuit."""
+        if self._current is None:
+            raise ValueError("No circuit to end")
+        self._current = None
+
+    def add_global(self, nets: Iterable[str]) -> None:
+        """Declares global nets, as the SPICE ``.GLOBAL`` card.
+
+        A global net is the same net in every circuit: :meth:`build` adds it as
+        a pin to the circuits using it, directly or in their subcircuits, and
+        connects it in every instance of them.
+        """
+        self.global_nets.update(dict.fromkeys(nets))
+
+    def _device_class(
+        self, name: str, terminals: Sequence[str], parameters: Iterable[str]
+    ) -> None:
+        terminals = tuple(terminals)
+        class_terminals, columns = self.device_classes.setdefault(name, (terminals, {}))
+        if class_terminals != terminals:
+            raise ValueError(
+                f"Device class {name!r} has terminals {class_terminals}, not {terminals}"
+            )
+        for parameter in parameters:
+            columns.setdefault(parameter, len(columns))
+
+    def _add(
+        self,
+        is_instance: bool,
+        model: str,
+        name: str,
+        nets: Sequence[str],
+        parameters: Mapping[str, float | str],
+    ) -> None:
+        circuit = self._current
+        if circuit is None:
+            circuit = self._circuits.setdefault(
+                self.top_name, _CircuitBuffer(self.top_name)
+            )
+        circuit.names.append(name)
+        circuit.is_instance.append(is_instance)
+        circuit.models.append(self.symbols.intern(model))
+        circuit.element_nets.extend(circuit.net(net) for net in nets)
+        circuit.net_offsets.append(len(circuit.element_nets))
+        for key, value in parameters.items():
+            circuit.parameter_keys.append(self.symbols.intern(key))
+            if isinstance(value, str):
+                circuit.parameter_values.append(0.0)
+                circuit.parameter_symbols.append(self.symbols.intern(value))
+            else:
+                circuit.parameter_values.append(value or 0.0)
+                circuit.parameter_symbols.append(-1)
+        circuit.parameter_offsets.append(len(circuit.parameter_keys))
+
+    def add_device(
+        self,
+        device_class: str,
+        name: str,
+        nets: Sequence[str],
+        parameters: Mapping[str, float | str] | None = None,
+        terminals: Sequence[str] | None = None,
+        class_parameters: Sequence[str] = (),
+    ) -> None:
+        """Adds a device to the current circuit.
+
+        Args:
+            device_class: device class name, created on first use.
+            name: device name.
+            nets: net of each terminal.
+            parameters: parameter values, numbers or strings.
+            terminals: terminal names of the class. Defaults to "0", "1", ...
+            class_parameters: parameters of the class before the ones of ``parameters``.
+        """
+        parameters = parameters or {}
+        terminals = terminals or [str(i) for i in range(len(nets))]
+        if len(nets) != len(terminals):
+            raise ValueError(
+                f"Device {name!r} connects {len(nets)} nets to the {len(terminals)} "
+                f"terminals of {device_class!r}"
+            )
+        self._device_class(device_class, terminals, [*class_parameters, *parameters])
+        self._add(False, device_class, name, nets, parameters)
+
+    def add_instance(
+        self,
+        circuit: str,
+        name: str,
+        nets: Sequence[str],
+        parameters: Mapping[str, float | str] | None = None,
+    ) -> None:
+        """Adds an instance of a circuit, or of a device class if the circuit is not defined.
+
+        Args:
+            circuit: circuit or device class name.
+            name: instance name.
+            nets: net of each pin.
+            parameters: parameter values, kept if the instance is a device.
+        """
+        self._add(True, circuit, name, nets, parameters or {})
+
+    def build(
+        self, as_device: Callable[[str], bool] | None = None
+    ) -> HierarchicalNetlist:
+        """Returns the netlist of the added circuits.
+
+        Args:
+            as_device: whether the instances of a defined circuit are devices
+                with terminals "0", "1", ... instead of subcircuits.
+        """
+        if self._current is not None:
+            raise ValueError(f"Circuit {self._current.name!r} is not ended")
+        symbols = self.symbols
+        # circuits instantiated as devices are neither templates nor top circuits
+        circuits = {
+            name: circuit
+            for name, circuit in self._circuits.items()
+            if as_device is None or not as_device(name)
+        }
+
+        # models called as subcircuits, the others are device classes
+        circuit_symbols = [symbols.intern(name) for name in circuits]
+        is_circuit = np.zeros(len(symbols), dtype=bool)
+        is_circuit[circuit_symbols] = True
+        subcircuits: dict[str, np.ndarray] = {}
+        for circuit in circuits.values():
+            models = np.frombuffer(circuit.models, dtype=np.int64)
+            is_instance = np.frombuffer(circuit.is_instance, dtype=np.int8) > 0
+            subcircuits[circuit.name] = is_instance & is_circuit[models]
+            net_offsets = np.frombuffer(circuit.net_offsets, dtype=np.int64)
+            parameter_offsets = np.frombuffer(circuit.parameter_offsets, dtype=np.int64)
+            for i in np.nonzero(is_instance & ~subcircuits[circuit.name])[0]:
+                self._device_class(
+                    symbols[circuit.models[i]],
+                    [str(j) for j in range(net_offsets[i + 1] - net_offsets[i])],
+                    (
+                        symbols[key]
+                        for key in circuit.parameter_keys[
+                            parameter_offsets[i] : parameter_offsets[i + 1]
+                        ]
+                    ),
+                )
+
+        # circuits ordered bottom-up
+        children = {
+            name: {
+                symbols[m]
+                for m in np.unique(
+                    np.frombuffer(circuits[name].models, dtype=np.int64)[mask]
+                )
+            }
+            for name, mask in subcircuits.items()
+        }
+        order: list[str] = []
+        state: dict[str, bool] = {}  # False while visited, True when done
+        for root in circuits:
+            stack = [(root, iter(sorted(children[root])))]
+            state.setdefault(root, False)
+            while stack:
+                name, remaining = stack[-1]
+                child = next(remaining, None)
+                if child is None:
+                    stack.pop()
+                    if not state[name]:
+                        state[name] = True
+                        order.append(name)
+                elif child not in state:
+                    state[child] = False
+                    stack.append((child, iter(sorted(children[child]))))
+                elif not state[child]:
+                    raise ValueError(f"Circuit {child!r} instantiates itself")
+
+        # global nets used in a circuit or its subcircuits, that are not its pins
+        global_pins: dict[str, list[str]] = {}
+        for name in order:
+            circuit = circuits[name]
+            net_names = list(circuit.nets)
+            used = set(circuit.nets).union(*(global_pins[c] for c in children[name]))
+            pins = {net_names[pin] for pin in circuit.pins}
+            global_pins[name] = [
+                net for net in self.global_nets if net in used and net not in pins
+            ]
+
+        device_classes = [
+            DeviceClassInfo(name, tuple(columns), terminals)
+            for name, (terminals, columns) in self.device_classes.items()
+        ]
+        class_index = np.full(len(symbols), -1, dtype=np.int32)
+        for i, name in enumerate(self.device_classes):
+            class_index[symbols.intern(name)] = i
+
+        templates: list[CircuitTemplate] = []
+        index: dict[str, int] = {}
+        for name in order:
+            circuit = circuits[name]
+            nets = dict(circuit.nets)
+            pins = [
+                *circuit.pins,
+                *(nets.setdefault(n, len(nets)) for n in global_pins[name]),
+            ]
+            models = np.frombuffer(circuit.models, dtype=np.int64)
+            net_offsets = np.frombuffer(circuit.net_offsets, dtype=np.int64)
+            element_nets = np.frombuffer(circuit.element_nets, dtype=np.int64)
+            is_subcircuit = subcircuits[name]
+            devices = np.nonzero(~is_subcircuit)[0]
+            instances = np.nonzero(is_subcircuit)[0]
+
+            classes = class_index[models[devices]]
+            terminal_offsets, terminal_nets = _csr_rows(
+                net_offsets, element_nets, devices
+            )
+            device_parameters, device_symbols = self._parameters(
+                circuit, devices, classes, device_classes
+            )
+
+            children_index = np.array(
+                [index[symbols[m]] for m in models[instances]], dtype=np.int32
+            )
+            pin_offsets, pin_nets = _csr_rows(net_offsets, element_nets, instances)
+            for i, child in zip(instances, children_index):
+                n_pins = len(templates[child].pins) - len(
+                    global_pins[templates[child].name]
+                )
+                if net_offsets[i + 1] - net_offsets[i] != n_pins:
+                    raise ValueError(
+                        f"Subcircuit {circuit.names[i]!r} of {name!r} connects "
+                        f"{net_offsets[i + 1] - net_offsets[i]} nets to the {n_pins} "
+                        f"pins of {templates[child].name!r}"
+                    )
+            if any(global_pins[templates[child].name] for child in children_index):
+                # connect the global pins of the subcircuits to the global nets
+                rows = [
+                    np.concatenate(
+                        [
+                            pin_nets[pin_offsets[k] : pin_offsets[k + 1]],
+                            [nets[n] for n in global_pins[templates[child].name]],
+                        ]
+                    ).astype(np.int64)
+                    for k, child in enumerate(children_index)
+                ]
+                pin_offsets = np.cumsum([0, *map(len, rows)], dtype=np.int64)
+                pin_nets = np.concatenate(rows)
+
+            index[name] = len(templates)
+            templates.append(
+                CircuitTemplate(
+                    name=name,
+                    net_names=list(nets),
+                    pins=np.array(pins, dtype=np.int64),
+                    device_names=[circuit.names[i] for i in devices],
+                    device_classes=classes,
+                    device_parameters=device_parameters,
+                    device_symbols=device_symbols,
+                    terminal_offsets=terminal_offsets,
+                    terminal_nets=terminal_nets,
+                    subcircuit_names=[circuit.names[i] for i in instances],
+                    subcircuit_templates=children_index,
+                    pin_offsets=pin_offsets,
+                    pin_nets=pin_nets,
+                )
+            )
+
+        instantiated = set().union(*children.values())
+        top = [index[name] for name in circuits if name not in instantiated]
+        logger.debug(
+            f"Built {len(templates)} circuits with {len(symbols)} symbols "
+            f"and {len(device_classes)} device classes"
+        )
+        return HierarchicalNetlist(templates, device_classes, top, symbols=symbols)
+
+    def _parameters(
+        self,
+        circuit: _CircuitBuffer,
+        devices: np.ndarray,
+        classes: np.ndarray,
+        device_classes: list[DeviceClassInfo],
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Returns the (devices, parameters) values and symbols of devices in class order."""
+        symbols = self.symbols
+        width = max(
+            (len(device_classes[c].parameters) for c in np.unique(classes)), default=0
+        )
+        values = np.zeros((len(devices), width), dtype=np.float64)
+        value_symbols = np.full((len(devices), width), -1, dtype=np.int64)
+
+        offsets = np.frombuffer(circuit.parameter_offsets, dtype=np.int64)
+        _, keys = _csr_rows(
+            offsets, np.frombuffer(circuit.parameter_keys, dtype=np.int64), devices
+        )
+        rows = np.repeat(
+            np.arange(len(devices)), offsets[devices + 1] - offsets[devices]
+        )
+        if not len(keys):
+            return values, value_symbols
+        # column of each distinct (class, parameter) pair
+        pairs, inverse = np.unique(
+            np.stack([classes[rows], keys], axis=1), axis=0, return_inverse=True
+        )
+        columns = np.array(
+            [
+                self.device_classes[device_classes[c].name][1][symbols[key]]
+                for c, key in pairs
+            ],
+            dtype=np.int64,
+        )[inverse.ravel()]
+        _, parameter_values = _csr_rows(
+            offsets, np.frombuffer(circuit.parameter_values, dtype=np.float64), devices
+        )
+        _, parameter_symbols = _csr_rows(
+            offsets, np.frombuffer(circuit.parameter_symbols, dtype=np.int64), devices
+        )
+        values[rows, columns] = parameter_values
+        value_symbols[rows, columns] = parameter_symbols
+        return values, value_symbols
@@ -1,11 +1,14 @@
 import hashlib
 import re
 from abc import ABC, abstractmethod
-from collections.abc import MutableMapping, Sequence
-from typing import Any
+from collections.abc import Iterator, MutableMapping, Sequence
+from pathlib import Path
+from typing import Any, NamedTuple
 
 import gdsfactory as gf
 import klayout.db as kdb
+from gdsfactory import logger
+from gdsfactory.typings import PathType
 from typing_extensions import override
 
 
@@ -163,3 +166,184 @@ class GdsfactorySpiceReader(CalibreSpiceReader):
             any(cell in name.casefold() for cell in self.components_as_devices)
             or super().wants_subcircuit(name)
         )
+
+
+class SymbolTable:
+    """Strings interned to integer ids, shared by the netlists read with it.
+
+    Names and string parameters are stored once however often they occur, and
+    netlists read with the same table compare their strings by id.
+    """
+
+    def __init__(self) -> None:
+        self.strings: list[str] = []
+        self.ids: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def __getitem__(self, i: int) -> str:
+        return self.strings[i]
+
+    def intern(self, s: str) -> int:
+        """Returns the id of ``s``, adding it on first occurrence."""
+        i = self.ids.get(s)
+        if i is None:
+            i = self.ids[s] = len(self.strings)
+            self.strings.append(s)
+        return i
+
+
+class SpiceSubcircuit(NamedTuple):
+    """Start of a ``.SUBCKT`` definition."""
+
+    name: str
+    pins: list[str]
+
+
+class SpiceEnds(NamedTuple):
+    """End of a ``.SUBCKT`` definition."""
+
+
+class SpiceGlobal(NamedTuple):
+    """Nets declared global by a ``.GLOBAL`` card."""
+
+    nets: list[str]
+
+
+class SpiceElement(NamedTuple):
+    """Element line of a SPICE netlist.
+
+    Args:
+        element: element letter, for example "X" for subcircuit instances.
+        name: element name without the element letter.
+        nets: connected nets in SPICE order.
+        model: model or subcircuit name, None for elements without one.
+        value: positional value of R, C and L elements.
+        parameters: ``key=value`` parameters, with the Calibre location as ``x`` and ``y`` in um.
+    """
+
+    element: str
+    name: str
+    nets: list[str]
+    model: str | None = None
+    value: float | None = None
+    parameters: dict[str, float | str] = {}
+
+
+spice_suffixes = {
+    "T": 1e12,
+    "G": 1e9,
+    "MEG": 1e6,
+    "K": 1e3,
+    "MIL": 25.4e-6,
+    "M": 1e-3,
+    "U": 1e-6,
+    "N": 1e-9,
+    "P": 1e-12,
+    "F": 1e-15,
+    "A": 1e-18,
+}
+_spice_number = re.compile(
+    r"([+-]?(?:\d+\.?\d*|\.\d+)(?:E[+-]?\d+)?)(MEG|MIL|[TGKMUNPFA])?[A-Z]*"
+)
+# number of nets of elements with a model after their nets, others end with their model
+_spice_element_nets = {"R": 2, "C": 2, "L": 2, "D": 2, "M": 4}
+
+
+def parse_spice_value(token: str) -> float | str:
+    """Returns a SPICE number with its scale suffix as float, other values as uppercase string."""
+    token = token.upper()
+    if match := _spice_number.fullmatch(token):
+        return float(match[1]) * spice_suffixes.get(match[2], 1.0)
+    return token.strip("'\"{}")
+
+
+def _iter_spice_lines(filepath: PathType) -> Iterator[str]:
+    """Yields the lines of a SPICE file joined with their ``+`` continuations, without comments."""
+    line = None
+    with open(filepath) as f:
+        for raw in f:
+            stripped = raw.strip()
+            if not stripped or stripped[0] in "*;":
+                continue
+            if stripped[0] == "+":
+                if line is not None:
+                    line = f"{line} {stripped[1:]}"
+                continue
+            if line is not None:
+                yield line
+            line = stripped
+    if line is not None:
+        yield line
+
+
+def iter_spice(
+    filepath: PathType,
+) -> Iterator[SpiceSubcircuit | SpiceEnds | SpiceGlobal | SpiceElement]:
+    """Yields the subcircuit definitions and elements of a SPICE netlist as they are read.
+
+    The file is read line by line and nothing is kept, so it can be larger than
+    memory. Names are uppercased as by KLayout. Comments after ``$`` are
+    skipped except the Calibre ``$X=... $Y=...`` location and ``$[model]``
+    names, as in :class:`CalibreSpiceReader`. ``.INCLUDE`` files are read in
+    place, ``.GLOBAL`` nets are yielded as :class:`SpiceGlobal` and other
+    control cards are skipped. Subcircuit parameter defaults after ``PARAMS:``
+    are not pins.
+
+    Args:
+        filepath: path to the SPICE netlist.
+    """
+    filepath = Path(filepath)
+    skipped = set()
+    for line in _iter_spice_lines(filepath):
+        location = None
+        if "$" in line:
+            line = re.sub(r"\$\[([^\]]+)\]", r"\1", line)
+            if match := re.search(CalibreSpiceReader.calibre_location_pattern, line):
+                location = {"x": int(match[1]) / 1000, "y": int(match[2]) / 1000}
+            line = line.split("$")[0]
+        tokens = re.sub(r"\s*=\s*", "=", line).split()
+        if not tokens:
+            continue
+        head = tokens[0].upper()
+        positional = [t.upper() for t in tokens[1:] if "=" not in t]
+        parameters = {
+            key.upper(): parse_spice_value(value)
+            for key, value in (t.split("=", 1) for t in tokens[1:] if "=" in t)
+        }
+
+        if head == ".SUBCKT":
+            pins = []
+            for token in tokens[2:]:
+                if "=" in token or token.upper().startswith("PARAMS:"):
+                    break
+                pins.append(token.upper())
+            yield SpiceSubcircuit(name=positional[0], pins=pins)
+        elif head == ".ENDS":
+            yield SpiceEnds()
+        elif head == ".GLOBAL":
+            yield SpiceGlobal(nets=positional)
+        elif head in {".INCLUDE", ".INC"}:
+            yield from iter_spice(filepath.parent / tokens[1].strip("'\""))
+        elif head == ".END":
+            return
+        elif head.startswith("."):
+            continue
+        elif head[0] == "X" or head[0] in _spice_element_nets:
+            n = _spice_element_nets.get(head[0], len(positional) - 1)
+            model = positional[n] if len(positional) > n else None
+            value = None
+            if head[0] in "RCL" and model is not None:
+                model, value = None, parse_spice_value(model)
+            yield SpiceElement(
+                element=head[0],
+                name=head[1:],
+                nets=positional[:n],
+                model=model,
+                value=value if isinstance(value, float) else None,
+                parameters=parameters | (location or {}),
+            )
+        elif head[0] not in skipped:
+            skipped.add(head[0])
+            logger.warning(f"Element type {head[0]!r} ignored in {filepath}")
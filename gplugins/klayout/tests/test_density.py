@@ -6,9 +6,14 @@ import pytest
 from gdsfactory.config import PATH
 
 from gplugins.klayout.get_density import (
+    _read_layout,
+    calculate_densities,
     calculate_density,
     density_data_to_meshgrid,
     get_gds_bbox,
+    get_layer_polygons,
+    plot_density_heatmaps,
+    rasterize_layer,
 )
 
 
@@ -73,3 +78,87 @@ def test_calculate_density(layer, tile_size, expected_densities):
         # Get density meshgrid
         Xi, Yi, Zi = density_data_to_meshgrid(density_data=density_data, bbox=bbox)
         np.testing.assert_allclose(Zi, expected_densities, rtol=1e-3)
+
+
+def test_density_data_to_meshgrid_from_coordinates():
+    gdspath = PATH.test_data / "test_gds_density1.gds"
+    component_test_density1().write_gds(gdspath)
+    bbox = get_gds_bbox(gdspath=gdspath)
+
+    density_data = calculate_density(gdspath=gdspath, layer=(2, 0), tile_size=(20, 20))
+    Xi, Yi, Zi = density_data_to_meshgrid(density_data=density_data, bbox=bbox)
+    Xc, Yc, Zc = density_data_to_meshgrid(
+        density_data=[(x, y, d) for x, y, d, *_ in density_data], bbox=bbox
+    )
+    np.testing.assert_allclose(Zc, Zi)
+    np.testing.assert_allclose(Xc, Xi)
+    np.testing.assert_allclose(Yc, Yi)
+    np.testing.assert_allclose(Zi, expected_densities[0], rtol=1e-3)
+
+
+def test_calculate_density_raster():
+    gdspath = PATH.test_data / "test_gds_density1.gds"
+    component_test_density1().write_gds(gdspath)
+
+    raster = calculate_density(gdspath=gdspath, layer=(1, 0), tile_size=(50, 50))
+    assert raster.shape == (3, 2)
+    assert raster.pitch == (50, 50)
+    assert raster.bbox == ((0, 0), (100, 150))
+    np.testing.assert_allclose(raster.x, [25, 75])
+    np.testing.assert_allclose(raster.density, 1)
+
+    padded = raster.padded(((-60, 0), (100, 210)))
+    assert padded.shape == (5, 4)
+    assert padded.origin == (-100, 0)
+    assert padded.density.sum() == raster.density.sum()
+
+
+def test_calculate_densities():
+    gdspath = PATH.test_data / "test_gds_density1.gds"
+    component_test_density1().write_gds(gdspath)
+
+    rasters = calculate_densities(
+        gdspath=gdspath, layers=[(1, 0), (2, 0)], tile_size=(50, 50)
+    )
+    assert list(rasters) == [(1, 0), (2, 0)]
+    assert rasters[(1, 0)].shape == rasters[(2, 0)].shape == (3, 2)
+    np.testing.assert_allclose(
+        rasters[(1, 0)].density,
+        calculate_density(gdspath, layer=(1, 0), tile_size=(50, 50)).density,
+    )
+    # 50x50 + 25x25 um2 on layer (2, 0)
+    assert np.isclose(rasters[(2, 0)].density.sum() * 50 * 50, 3125)
+
+
+def test_read_requested_layers_only(tmp_path) -> None:
+    gdspath = component_test_density1().write_gds(tmp_path / "density1.gds")
+
+    layout, cell = _read_layout(gdspath, layers=[(2, 0)])
+    assert [(info.layer, info.datatype) for info in layout.layer_infos()] == [(2, 0)]
+    assert get_gds_bbox(gdspath, layer=(2, 0)) == ((0, 0), (75, 75))
+
+    # the two rectangles touch at a corner and are merged
+    (polygon,) = get_layer_polygons(gdspath, layer=(2, 0))
+    assert polygon.shape == (8, 2)
+    assert get_layer_polygons(gdspath, layer=(2, 0), bbox=((80, 0), (90, 10))) == []
+
+
+def test_plot_density_heatmaps(tmp_path) -> None:
+    gdspath = component_test_density1().write_gds(tmp_path / "density1.gds")
+    layout, cell = _read_layout(gdspath)
+
+    pixels = rasterize_layer(layout, cell, (2, 0), bbox=((0, 0), (100, 150)))
+    assert pixels.shape == (1000, 667)
+    np.testing.assert_allclose(
+        pixels.density.sum() * np.prod(pixels.pitch), 50 * 50 + 25 * 25
+    )
+
+    figures = plot_density_heatmaps(
+        layout,
+        layers=[(1, 0), (2, 0)],
+        tile_size=(20, 20),
+        visualize_polygons=True,
+        dirpath=tmp_path / "heatmaps",
+    )
+    assert list(figures) == [(cell.name, (1, 0)), (cell.name, (2, 0))]
+    assert len(list((tmp_path / "heatmaps").glob("*.png"))) == 2
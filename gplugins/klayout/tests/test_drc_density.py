@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import gdsfactory as gf
+import klayout.db as kdb
+import klayout.rdb as rdb
+import numpy as np
+
+from gplugins.klayout.drc.check_density import check_density
+
+
+def test_density_windows(tmp_path) -> None:
+    c = gf.Component()
+    c << gf.components.rectangle(size=(200, 100), layer=(99, 0))
+    c << gf.components.rectangle(size=(100, 100), layer=(1, 0))
+    gdspath = c.write_gds(tmp_path / "density.gds")
+
+    result = check_density(
+        gdspath,
+        layer=(1, 0),
+        min_density=0.3,
+        max_density=0.9,
+        window_size=(50, 50),
+        step=(10, 10),
+        layer_floorplan=(99, 0),
+    )
+    assert result.density.shape == (6, 16)
+    starts = result.windows[0, :, 0, 0]
+    expected = np.clip(100 - starts, 0, 50) / 50
+    np.testing.assert_allclose(result.density, np.broadcast_to(expected, (6, 16)))
+
+    assert result.too_high.sum() == 6 * 6  # windows starting at x <= 50
+    assert result.too_low.sum() == 7 * 6  # windows starting at x >= 90
+    assert len(result) == 78
+    assert result.to_region().area() == 200 * 100 * 1e6
+
+    result.to_rdb(tmp_path / "density.lyrdb")
+    db = rdb.ReportDatabase()
+    db.load(str(tmp_path / "density.lyrdb"))
+    assert db.num_items() == 78
+
+
+def test_density_windows_passing() -> None:
+    c = gf.components.rectangle(size=(120, 80), layer=(1, 0))
+    result = check_density(
+        c, layer=(1, 0), max_density=1, window_size=(50, 50), step=(25, 25)
+    )
+    np.testing.assert_allclose(result.density, 1)
+    assert len(result) == 0
+    assert result.to_region().is_empty()
+
+
+def test_density_edge_tiles_and_dbu(tmp_path) -> None:
+    c = gf.Component()
+    c << gf.components.rectangle(size=(95, 95), layer=(99, 0))
+    # half of the floorplan, and shapes outside it within the last tiles
+    c << gf.components.rectangle(size=(95, 47.5), layer=(1, 0))
+    c.add_polygon([(95, 0), (100, 0), (100, 100), (95, 100)], layer=(1, 0))
+    c.add_polygon([(0, 95), (100, 95), (100, 100), (0, 100)], layer=(1, 0))
+    gdspath = c.write_gds(tmp_path / "density.gds")
+
+    layout = kdb.Layout()
+    layout.read(str(gdspath))
+    layout.dbu = 5e-4  # halves all coordinates in um
+    result = check_density(
+        layout,
+        layer=(1, 0),
+        window_size=(47.5, 47.5),
+        step=(5, 5),
+        layer_floorplan=(99, 0),
+    )
+    np.testing.assert_allclose(result.density, 0.5)
+    assert result.dbu == 5e-4
+    assert result.to_region().area() == 0
+
+    result.min_density = 0.6
+    assert result.to_region().area() == 95_000**2
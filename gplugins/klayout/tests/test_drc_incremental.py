@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import gdsfactory as gf
+import klayout.db as kdb
+
+from gplugins.klayout.drc.incremental_drc import run_drc_incremental
+from gplugins.klayout.drc.run_drc import run_drc
+from gplugins.klayout.drc.write_drc import check_space, check_width
+
+layers = {"WG": (1, 0)}
+rules = [check_width(layer="WG", value=0.2), check_space(layer="WG", value=0.5)]
+
+
+@gf.cell
+def pair(width: float) -> gf.Component:
+    c = gf.Component()
+    c << gf.components.rectangle(size=(width, 2), layer=layers["WG"])
+    right = c << gf.components.rectangle(size=(1, 2), layer=layers["WG"])
+    right.dmovex(width + 0.3)
+    return c
+
+
+def write_chip(gdspath, width: float):
+    c = gf.Component()
+    narrow = gf.components.rectangle(size=(0.1, 2), layer=layers["WG"])
+    c.add_ref(narrow, columns=4, rows=1, spacing=(30, 0))
+    ref = c << pair(width=width)
+    ref.dmove((210, 0))
+    c.write_gds(gdspath)
+
+    # same top cell name for every version of the chip
+    layout = kdb.Layout()
+    layout.read(str(gdspath))
+    layout.top_cell().name = "chip"
+    layout.write(str(gdspath))
+    return gdspath
+
+
+def test_run_drc_incremental(tmp_path) -> None:
+    cache_dir = tmp_path / "cache"
+    gdspath = write_chip(tmp_path / "chip.gds", width=1)
+    first = run_drc_incremental(
+        gdspath, rules=rules, layers=layers, cache_dir=cache_dir, tile_size=20
+    )
+    assert first.checked_tiles == first.total_tiles == 11
+    assert (
+        first.counts == run_drc(gdspath, rules=rules, layers=layers, deep=False).counts
+    )
+    assert first.counts == {"WG width 0.2um": 4, "WG space 0.5um": 1}
+
+    unchanged = run_drc_incremental(
+        gdspath, rules=rules, layers=layers, cache_dir=cache_dir, tile_size=20
+    )
+    assert unchanged.checked_tiles == 0
+    assert unchanged.dirty_cells == []
+    assert unchanged.counts == first.counts
+
+    gdspath = write_chip(tmp_path / "chip.gds", width=0.1)
+    changed = run_drc_incremental(
+        gdspath, rules=rules, layers=layers, cache_dir=cache_dir, tile_size=20
+    )
+    assert changed.checked_tiles == 1
+    assert (
+        changed.counts
+        == run_drc(gdspath, rules=rules, layers=layers, deep=False).counts
+    )
+    assert changed.counts == {"WG width 0.2um": 5, "WG space 0.5um": 1}
+
+    other_rules = run_drc_incremental(
+        gdspath, rules=rules[:1], layers=layers, cache_dir=cache_dir, tile_size=20
+    )
+    assert other_rules.checked_tiles == other_rules.total_tiles
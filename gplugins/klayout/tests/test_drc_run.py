@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import gdsfactory as gf
+
+from gplugins.klayout.drc.count_drc import count_drc
+from gplugins.klayout.drc.run_drc import run_drc
+from gplugins.klayout.drc.write_drc import (
+    check_area,
+    check_enclosing,
+    check_separation,
+    check_space,
+    check_width,
+)
+
+layers = {"WG": (1, 0), "M1": (41, 0), "VIAC": (40, 0)}
+
+
+@gf.cell
+def via_with_narrow_wg() -> gf.Component:
+    c = gf.Component()
+    c << gf.components.rectangle(size=(0.1, 2), layer=layers["WG"])
+    m1 = c << gf.components.rectangle(size=(1, 1), layer=layers["M1"])
+    via = c << gf.components.rectangle(size=(0.8, 0.8), layer=layers["VIAC"])
+    m1.dmove((1, 0))
+    via.dmove((1.1, 0.1))
+    return c
+
+
+def test_run_drc(tmp_path) -> None:
+    c = gf.Component()
+    c.add_ref(via_with_narrow_wg(), columns=4, rows=3, spacing=(10, 10))
+    gdspath = c.write_gds(tmp_path / "drc.gds")
+
+    rules = [
+        check_width(layer="WG", value=0.2),
+        check_space(layer="WG", value=0.2),
+        check_separation(layer1="WG", layer2="M1", value=1.0),
+        check_enclosing(layer1="M1", layer2="VIAC", value=0.2),
+        check_area(layer="WG", min_area_um2=0.5),
+    ]
+    report = run_drc(
+        gdspath, rules=rules, layers=layers, threads=2, filepath=tmp_path / "drc.lyrdb"
+    )
+    assert report.counts == {
+        "WG width 0.2um": 12,
+        "WG space 0.2um": 0,
+        "min WG M1 separation 1.0um": 12,
+        "M1 enclosing VIAC by 0.2um": 48,
+        "WG_A: WG area < 0.5 um2": 12,
+    }
+    assert set(report.runtimes) == set(report.counts)
+
+    # hierarchical: each violation is reported once in the repeated cell
+    errors = count_drc(tmp_path / "drc.lyrdb")
+    assert errors["total"] == 1 + 1 + 4 + 1
+    assert errors["M1 enclosing VIAC by 0.2um"] == 4
+
+    flat = run_drc(gdspath, rules=rules, layers=layers, deep=False)
+    assert flat.counts == report.counts
+    assert flat.db.num_items() == report.total
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import gdsfactory as gf
+import numpy as np
+import pytest
+
+from gplugins.klayout.drc.drc_session import DrcSession
+from gplugins.klayout.drc.write_drc import check_area, check_width
+
+
+def test_drc_session() -> None:
+    c = gf.Component()
+    c.add_ref(
+        gf.components.rectangle(size=(0.1, 2), layer=(1, 0)),
+        columns=3,
+        rows=1,
+        spacing=(0.25, 0),
+    )
+    large = c << gf.components.rectangle(size=(2, 2), layer=(2, 0))
+    large.dmovex(10)
+
+    session = DrcSession(c, layers={"WG": (1, 0), "SLAB": (2, 0)})
+    assert session.region("WG") is session.region((1, 0))
+    assert session.region("WG").count() == 3
+
+    width = session.width("WG", 0.2)
+    assert len(width) == 3
+    np.testing.assert_allclose(
+        width.bboxes[:, :, 0], [[0, 0.1], [0.25, 0.35], [0.5, 0.6]]
+    )
+    assert all(ep.distance() == pytest.approx(0.1) for ep in width.edge_pairs)
+
+    space = session.space("WG", 0.2)
+    assert len(space) == 2
+    assert space.area() == pytest.approx(2 * 0.15 * 2)
+
+    assert len(session.separation("WG", "SLAB", 5.0)) == 0
+    assert len(session.area("SLAB", 5.0)) == 1
+    # int areas are in dbu2
+    assert len(session.area("SLAB", 4_000_000)) == 0
+    assert len(session.area("SLAB", 4_000_001)) == 1
+
+    violations = session.run(
+        [check_width(layer="SLAB", value=1.0), check_area(layer="WG", min_area_um2=1.0)]
+    )
+    assert {name: len(v) for name, v in violations.items()} == {
+        "SLAB width 1.0um": 0,
+        "WG_A: WG area < 1.0 um2": 3,
+    }
+
+    with pytest.raises(ValueError):
+        session.region("M1")
+
+    with pytest.raises(ValueError, match="same name"):
+        session.run(
+            [
+                check_width(layer="WG", value=0.2),
+                check_width(layer="WG", value=0.2, angle_limit=80.0),
+            ]
+        )
+
+
+def test_drc_session_threads() -> None:
+    c = gf.Component()
+    for i in range(4):
+        c << gf.components.rectangle(size=(0.1, 2), layer=(i + 1, 0))
+    layers = {f"L{i}": (i + 1, 0) for i in range(4)}
+    session = DrcSession(c, layers=layers, threads=4)
+
+    rules = [check_width(layer=name, value=0.2) for name in layers]
+    violations = session.run(rules)
+    assert [len(v) for v in violations.values()] == [1] * 4
+    # every check runs with all threads
+    assert all(session.region(name).threads == 4 for name in layers)
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import klayout.db as kdb
+import pytest
+from gdsfactory.samples.demo.lvs import pads_correct, pads_shorted
+
+from gplugins.klayout.get_netlist import ExtractionSession, _get_session, get_l2n
+
+
+@pytest.fixture(scope="module")
+def gdspaths(tmp_path_factory) -> list:
+    dirpath = tmp_path_factory.mktemp("gds")
+    return [
+        pads_correct().write_gds(dirpath / "correct.gds"),
+        pads_shorted().write_gds(dirpath / "shorted.gds"),
+    ]
+
+
+def _netlists(l2ns) -> list[str]:
+    return [str(l2n.netlist()) for l2n in l2ns]
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_extract_many_cached(gdspaths, tmp_path, max_workers: int) -> None:
+    expected = _netlists([get_l2n(gdspath) for gdspath in gdspaths])
+    session = ExtractionSession(cache_dir=tmp_path / "l2n")
+
+    l2ns = session.extract_many([*gdspaths, gdspaths[0]], max_workers=max_workers)
+    assert _netlists(l2ns) == [*expected, expected[0]]
+    # the repeated GDS is extracted once
+    assert len(session.store) == 2
+
+    l2ns = session.extract_many(gdspaths, max_workers=max_workers)
+    assert _netlists(l2ns) == expected
+    assert session.store.hits == 2
+
+
+def test_extract_without_cache(gdspaths) -> None:
+    session = ExtractionSession()
+    assert session.store is None
+    l2n = session.extract(gdspaths[1])
+    assert _netlists([l2n]) == _netlists([get_l2n(gdspaths[1])])
+
+
+def test_get_l2n_reuses_session(gdspaths) -> None:
+    get_l2n(gdspaths[0])
+    hits = _get_session.cache_info().hits
+    get_l2n(gdspaths[1])
+    assert _get_session.cache_info().hits == hits + 1
+    assert _get_session.cache_info().maxsize is not None
+
+
+def _layout(*children: tuple[str, int]) -> kdb.Layout:
+    layout = kdb.Layout()
+    top = layout.create_cell("TOP")
+    for i, (name, width) in enumerate(children):
+        child = layout.create_cell(name)
+        child.shapes(layout.layer(1, 0)).insert(kdb.Box(width, 100))
+        top.insert(kdb.CellInstArray(child.cell_index(), kdb.Trans(i * 1000, 0)))
+    return layout
+
+
+def test_key_includes_child_names() -> None:
+    def key(*children: tuple[str, int]) -> str:
+        layout = _layout(*children)
+        return session.key(layout.top_cell())
+
+    session = ExtractionSession()
+    assert key(("ALPHA", 100), ("BETA", 200)) == key(("ALPHA", 100), ("BETA", 200))
+    # same geometry, other child names
+    assert key(("ALPHA", 100), ("BETA", 200)) != key(("ALPHA", 100), ("GAMMA", 200))
+    # same geometry and names, swapped between the children
+    assert key(("ALPHA", 100), ("BETA", 200)) != key(("BETA", 100), ("ALPHA", 200))
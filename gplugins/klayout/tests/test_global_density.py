@@ -6,6 +6,8 @@ import pytest
 from gdsfactory.config import PATH
 
 from gplugins.klayout.get_density import (
+    DensityIntegral,
+    DensityRaster,
     calculate_density,
     density_data_to_meshgrid,
     estimate_weighted_global_density,
@@ -108,3 +110,25 @@ def test_estimate_weighted_global_density(
     assert np.isclose(
         estimated_density, expected_global_density
     ), f"{estimated_density=}, {expected_global_density=}"
+
+
+def test_density_integral():
+    rng = np.random.default_rng(0)
+    raster = DensityRaster(
+        density=rng.random((7, 9)), origin=(-10.0, 5.0), pitch=(2.0, 3.0)
+    )
+    Xi, Yi, Zi = raster.meshgrid()
+    integral = DensityIntegral(raster)
+
+    corners = rng.uniform(-20, 30, size=(50, 2, 2))
+    bboxes = np.sort(corners, axis=1)
+    expected = [
+        estimate_weighted_global_density(Xi, Yi, Zi, bbox=tuple(map(tuple, bbox)))
+        for bbox in bboxes
+    ]
+    np.testing.assert_allclose(integral.mean_density(bboxes), expected, atol=1e-12)
+
+    # the full raster holds the total area
+    assert np.isclose(
+        integral.area(raster.bbox), raster.density.sum() * 2.0 * 3.0, rtol=1e-12
+    )
@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+import time
+
+import klayout.db as kdb
+import numpy as np
+import pytest
+
+from gplugins.klayout.netlist_compare import compare_netlists
+from gplugins.klayout.netlist_hierarchy import (
+    HierarchicalNetlist,
+    HierarchicalNetlistBuilder,
+)
+
+# comparison of two netlists of 20k devices
+compare_time_budget_seconds = 10.0
+
+reference = """
+.SUBCKT inv a y vdd vss
+M1 y a vdd vdd PMOS W=1 L=0.1
+M2 y a vss vss NMOS W=0.5 L=0.1
+.ENDS
+.SUBCKT buf a y vdd vss
+X1 a m vdd vss inv
+X2 m y vdd vss inv
+.ENDS
+.SUBCKT top in out vdd vss
+XA in mid vdd vss buf
+XB mid out vdd vss buf
+R1 out vss 100
+.ENDS
+"""
+
+# same circuits with other names, orders, pin orders and swapped terminals
+extracted = """
+.SUBCKT inv vss vdd y a
+M7 vss a y vss NMOS W=0.5 L=0.1
+M3 vdd a y vdd PMOS W=1 L=0.1
+.ENDS
+.SUBCKT buf a y vdd vss
+X2 vss vdd y m inv
+X1 vss vdd m a inv
+.ENDS
+.SUBCKT top in out vdd vss
+XB mid out vdd vss buf
+XA in mid vdd vss buf
+R9 vss out 100
+.ENDS
+"""
+
+
+@pytest.fixture
+def read(tmp_path):
+    def read(spice: str) -> HierarchicalNetlist:
+        path = tmp_path / "netlist.sp"
+        path.write_text(spice)
+        return HierarchicalNetlist.from_spice(path)
+
+    return read
+
+
+@pytest.mark.parametrize("flatten", [False, True])
+def test_equivalent_netlists(read, flatten: bool) -> None:
+    comparison = compare_netlists(
+        read(extracted), read(reference), flatten=flatten, compare_parameters=True
+    )
+    assert comparison.matched, comparison.report()
+    top = comparison.circuits[-1]
+    assert ("RES_9", "RES_1") in top.devices
+    assert ("IN", "IN") in top.nets
+
+
+def test_pin_map(read) -> None:
+    comparison = compare_netlists(read(extracted), read(reference))
+    assert [c.name for c in comparison.circuits] == ["INV", "BUF", "TOP"]
+    # reference pins a y vdd vss are the extracted pins 3 2 1 0
+    assert comparison.circuits[0].pin_map == {0: 3, 1: 2, 2: 1, 3: 0}
+
+
+def test_rewired_device(read) -> None:
+    rewired = extracted.replace("R9 vss out 100", "R9 vss in 100")
+    comparison = compare_netlists(read(rewired), read(reference), seed_names=True)
+    assert not comparison.matched
+    assert [c.name for c in comparison.mismatches()] == ["TOP"]
+    top = comparison.mismatches()[0]
+    assert top.extracted_devices == ["RES_9"]
+    assert top.reference_devices == ["RES_1"]
+    assert set(top.extracted_nets) == set(top.reference_nets) == {"IN", "OUT"}
+    assert "RES_1" in comparison.report()
+
+    # without seed_names, the pins are still matched by name
+    flat = compare_netlists(read(rewired), read(reference), flatten=True)
+    assert not flat.matched
+    assert flat.circuits[0].extracted_devices == ["RES_9"]
+    assert set(flat.circuits[0].extracted_nets) == {"IN", "OUT"}
+    assert len(flat.circuits[0].devices) == 8
+
+
+def test_parameters(read) -> None:
+    wider = extracted.replace("W=0.5", "W=0.6")
+    assert compare_netlists(read(wider), read(reference)).matched
+    comparison = compare_netlists(read(wider), read(reference), compare_parameters=True)
+    assert [c.name for c in comparison.mismatches()] == ["INV"]
+    assert comparison.mismatches()[0].extracted_devices == ["NMOS_7"]
+
+
+def test_missing_device(read, tmp_path) -> None:
+    path = tmp_path / "reference.sp"
+    path.write_text(reference)
+    netlist = kdb.Netlist()
+    netlist.read(str(path), kdb.NetlistSpiceReader())
+
+    comparison = compare_netlists(
+        read(extracted.replace("R9 vss out 100", "")), netlist
+    )
+    assert [c.name for c in comparison.mismatches()] == ["TOP"]
+    top = comparison.mismatches()[0]
+    assert top.device_counts == {"RES": (0, 1)}
+    assert "RES_1" in top.reference_devices
+
+
+def random_netlist(
+    n_devices: int, order: int, rewire: bool = False
+) -> HierarchicalNetlist:
+    """Returns random transistors on n_devices / 2 nets, added in a random order."""
+    rng = np.random.default_rng(0)
+    nets = rng.integers(0, n_devices // 2, size=(n_devices, 4))
+    classes = rng.integers(0, 3, size=n_devices)
+    if rewire:
+        nets[0, 1] = (nets[0, 1] + 1) % (n_devices // 2)
+    builder = HierarchicalNetlistBuilder()
+    for i in np.random.default_rng(order).permutation(n_devices):
+        builder.add_device(
+            f"MOS{classes[i]}",
+            f"{order}_{i}",
+            [f"N{net}" for net in nets[i]],
+            terminals=("S", "G", "D", "B"),
+        )
+    return builder.build()
+
+
+def test_compare_scaling() -> None:
+    n_devices = 20_000
+    extracted, reference = random_netlist(n_devices, 1), random_netlist(n_devices, 2)
+    t0 = time.perf_counter()
+    comparison = compare_netlists(extracted, reference, flatten=True)
+    runtime = time.perf_counter() - t0
+
+    assert comparison.matched
+    assert len(comparison.circuits[0].devices) == n_devices
+    assert runtime < compare_time_budget_seconds
+
+    comparison = compare_netlists(
+        random_netlist(n_devices, 1, rewire=True), reference, flatten=True
+    )
+    mismatch = comparison.circuits[0]
+    assert "1_0" in {name.split("_", 1)[1] for name in mismatch.extracted_devices}
+    # the mismatch stays close to the rewired device
+    assert len(mismatch.extracted_devices) < n_devices // 100
+
+
+def latches(n: int, order: int, miswired: bool = False) -> HierarchicalNetlist:
+    """Returns n identical latches on global VDD and VSS nets, added in a random order.
+
+    The first PMOS of a miswired netlist has its source on VSS instead of VDD.
+    """
+    devices = []
+    for i in range(n):
+        q, qb = f"Q{i}", f"QB{i}"
+        devices += [
+            ("PMOS", f"{i}_1", [q, qb, "VDD", "VDD"]),
+            ("NMOS", f"{i}_2", [q, qb, "VSS", "VSS"]),
+            ("PMOS", f"{i}_3", [qb, q, "VDD", "VDD"]),
+            ("NMOS", f"{i}_4", [qb, q, "VSS", "VSS"]),
+        ]
+    if miswired:
+        devices[0] = ("PMOS", "0_1", ["Q0", "QB0", "VSS", "VDD"])
+    builder = HierarchicalNetlistBuilder()
+    builder.add_global(["VDD", "VSS"])
+    for i in np.random.default_rng(order).permutation(len(devices)):
+        device_class, name, nets = devices[i]
+        builder.add_device(device_class, name, nets, terminals=("D", "G", "S", "B"))
+    return builder.build()
+
+
+@pytest.mark.parametrize("flatten", [False, True])
+def test_global_net_mismatch(flatten: bool) -> None:
+    n = 50
+    comparison = compare_netlists(
+        latches(n, 1, miswired=True), latches(n, 2), flatten=flatten
+    )
+    assert not comparison.matched
+    top = comparison.circuits[0]
+    # the miswired latch does not change the colors of VDD and VSS for the others
+    assert {("VDD", "VDD"), ("VSS", "VSS")} <= set(top.nets)
+    assert "PMOS_0_1" in top.extracted_devices
+    assert {name.split("_")[1] for name in top.extracted_devices} == {"0"}
+    assert len(top.devices) >= 4 * (n - 1)
+
+
+def test_compare_symmetric_scaling() -> None:
+    n = 5_000
+    t0 = time.perf_counter()
+    comparison = compare_netlists(latches(n, 1), latches(n, 2), flatten=True)
+    runtime = time.perf_counter() - t0
+
+    assert comparison.matched, comparison.report()
+    assert len(comparison.circuits[0].devices) == 4 * n
+    # the latches are told apart at once, not one at a time
+    assert comparison.circuits[0].iterations < 10
+    assert runtime < compare_time_budget_seconds
+
+
+def resistor_ring(n: int, shift: int, reverse: bool) -> HierarchicalNetlist:
+    """Returns a ring of n identical resistors, with nets renumbered by ``shift``."""
+    builder = HierarchicalNetlistBuilder()
+    for i in reversed(range(n)) if reverse else range(n):
+        builder.add_device(
+            "RES",
+            str(i),
+            [f"N{(i + shift) % n}", f"N{(i + shift + 1) % n}"],
+            {"R": 100.0},
+            terminals=("A", "B"),
+        )
+    return builder.build()
+
+
+@pytest.mark.parametrize("n", [4, 6, 8])
+def test_symmetric_ring(n: int) -> None:
+    comparison = compare_netlists(
+        resistor_ring(n, 0, False), resistor_ring(n, 3, True), flatten=True
+    )
+    assert comparison.matched, comparison.report()
+    assert len(comparison.circuits[0].devices) == n
+
+
+inverters = """
+.SUBCKT inv a y vdd vss
+M1 y a vdd vdd PMOS W=1 L=0.1
+M2 y a vss vss NMOS W=0.5 L=0.1
+.ENDS
+.SUBCKT top vdd vss y1 y2 y3 y4
+X1 a1 y1 vdd vss inv
+X2 a2 y2 vdd vss inv
+X3 a3 y3 vdd vss inv
+X4 a4 y4 vdd vss inv
+.ENDS
+"""
+
+# same inverters in another order, with other net names and pin order
+inverters_permuted = """
+.SUBCKT inv vss vdd y a
+M2 y a vss vss NMOS W=0.5 L=0.1
+M1 y a vdd vdd PMOS W=1 L=0.1
+.ENDS
+.SUBCKT top q2 vss q4 vdd q1 q3
+X7 vss vdd q3 p3 inv
+X5 vss vdd q1 p1 inv
+X8 vss vdd q4 p4 inv
+X6 vss vdd q2 p2 inv
+.ENDS
+"""
+
+
+@pytest.mark.parametrize("flatten", [False, True])
+def test_symmetric_inverters(read, flatten: bool) -> None:
+    comparison = compare_netlists(
+        read(inverters_permuted), read(inverters), flatten=flatten
+    )
+    assert comparison.matched, comparison.report()
+    top = comparison.circuits[-1]
+    assert ("VDD", "VDD") in top.nets
+
+    # a real mismatch is still found after breaking the symmetry
+    shorted = inverters_permuted.replace("q4 p4", "q4 p3")
+    assert not compare_netlists(read(shorted), read(inverters), flatten=flatten).matched
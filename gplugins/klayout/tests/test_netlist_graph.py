@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import time
+
+import klayout.db as kdb
+import networkx as nx
+import pytest
+
+from gplugins.klayout.netlist_graph import netlist_to_networkx
+
+# projection of nets with 10k devices without labels
+star_time_budget_seconds = 10.0
+
+
+def synthetic_netlist(fanout: int) -> kdb.Netlist:
+    """Returns ``fanout`` transistors sharing the VSS and CLK nets."""
+    netlist = kdb.Netlist()
+    nmos = kdb.DeviceClassMOS4Transistor()
+    nmos.name = "NMOS"
+    netlist.add(nmos)
+    top = kdb.Circuit()
+    top.name = "TOP"
+    netlist.add(top)
+    vss, clk = top.create_net("VSS"), top.create_net("CLK")
+    for i in range(fanout):
+        device = top.create_device(nmos, f"M{i}")
+        drain = top.create_net(f"D{i}")
+        for terminal, net in (("S", vss), ("G", clk), ("D", drain), ("B", vss)):
+            device.connect_terminal(terminal, net)
+    return netlist
+
+
+@pytest.mark.parametrize("hierarchical", [False, True])
+def test_star_projection_high_fanout(hierarchical: bool) -> None:
+    fanout = 10_000
+    netlist = synthetic_netlist(fanout)
+    t0 = time.perf_counter()
+    G = netlist_to_networkx(
+        netlist, include_labels=False, projection="star", hierarchical=hierarchical
+    )
+    runtime = time.perf_counter() - t0
+
+    assert G.number_of_nodes() == fanout
+    # a clique projection would have fanout * (fanout - 1) / 2 edges
+    assert G.number_of_edges() == fanout - 1
+    assert nx.is_connected(G)
+    assert runtime < star_time_budget_seconds
+
+
+def test_star_projection_components() -> None:
+    clique = netlist_to_networkx(synthetic_netlist(50), include_labels=False)
+    star = netlist_to_networkx(
+        synthetic_netlist(50), include_labels=False, projection="star"
+    )
+    assert set(star.nodes) == set(clique.nodes)
+    assert set(star.edges) <= set(clique.edges)
+    assert {frozenset(c) for c in nx.connected_components(star)} == {
+        frozenset(c) for c in nx.connected_components(clique)
+    }
+    assert all(net in {"VSS", "CLK"} for _, _, net in star.edges(data="net"))
+
+
+def test_invalid_projection() -> None:
+    with pytest.raises(ValueError, match="projection"):
+        netlist_to_networkx(synthetic_netlist(2), projection="hyperedge")
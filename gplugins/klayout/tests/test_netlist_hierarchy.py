@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import klayout.db as kdb
+import networkx as nx
+import numpy as np
+import pytest
+from scipy.sparse.csgraph import connected_components
+
+from gplugins.klayout.netlist_graph import netlist_to_networkx
+from gplugins.klayout.netlist_hierarchy import HierarchicalNetlist
+
+spice = """
+.SUBCKT inv a y vdd vss
+M1 y a vdd vdd PMOS W=1 L=0.1
+M2 y a vss vss NMOS W=0.5 L=0.1
+.ENDS
+.SUBCKT buf a y vdd vss
+X1 a m vdd vss inv
+X2 m y vdd vss inv
+.ENDS
+.SUBCKT top in out vdd vss
+XA in mid vdd vss buf
+XB mid out vdd vss buf
+R1 out vss 100
+.ENDS
+"""
+
+
+@pytest.fixture
+def read_netlist(tmp_path):
+    path = tmp_path / "buffers.sp"
+    path.write_text(spice)
+
+    def read() -> kdb.Netlist:
+        netlist = kdb.Netlist()
+        netlist.read(str(path), kdb.NetlistSpiceReader())
+        return netlist
+
+    return read
+
+
+@pytest.mark.parametrize("include_labels", [True, False])
+def test_hierarchical_matches_flat(read_netlist, include_labels: bool) -> None:
+    netlist = read_netlist()
+    G = netlist_to_networkx(netlist, include_labels=include_labels, hierarchical=True)
+    assert nx.utils.graphs_equal(
+        G, netlist_to_networkx(read_netlist(), include_labels=include_labels)
+    )
+    # the netlist is not flattened
+    assert len(list(netlist.each_circuit())) == 3
+
+
+def test_expand(read_netlist) -> None:
+    hierarchy = HierarchicalNetlist.from_netlist(read_netlist())
+    assert hierarchy.device_count() == 9
+    assert hierarchy.device_count("BUF") == 4
+
+    graph = hierarchy.expand()
+    assert graph.n_devices == 9
+    assert graph.n_nets == 7
+    assert "A.1.2" in graph.device_names()
+    assert set(graph.net_names()) == {"IN", "OUT", "VDD", "VSS", "MID", "A.M", "B.M"}
+    assert dict(zip(graph.net_names(), graph.net_degree()))["VDD"] == 4
+
+    n_components, device_labels, _ = graph.connected_components()
+    assert n_components == 1
+    assert np.all(device_labels == 0)
+
+    buf = hierarchy.expand(["BUF"])
+    assert buf.n_devices == 4
+    assert set(buf.net_names()) == {"A", "Y", "VDD", "VSS", "M"}
+
+
+def test_expand_shorted_pins() -> None:
+    netlist = kdb.Netlist()
+    resistor = kdb.DeviceClassResistor()
+    resistor.name = "RES"
+    netlist.add(resistor)
+
+    short = kdb.Circuit()
+    short.name = "SHORT"
+    netlist.add(short)
+    net = short.create_net("N")
+    for name in "AB":
+        short.connect_pin(short.create_pin(name), net)
+
+    top = kdb.Circuit()
+    top.name = "TOP"
+    netlist.add(top)
+    x, y = top.create_net("X"), top.create_net("Y")
+    subcircuit = top.create_subcircuit(short, "S")
+    subcircuit.connect_pin(0, x)
+    subcircuit.connect_pin(1, y)
+    device = top.create_device(resistor, "R")
+    device.connect_terminal("A", x)
+    device.connect_terminal("B", y)
+
+    graph = HierarchicalNetlist.from_netlist(netlist).expand()
+    assert graph.n_nets == 1
+    assert graph.net_names() == ["X"]
+    assert graph.device_nets.tolist() == [0, 0]
+
+
+def test_expand_unconnected() -> None:
+    netlist = kdb.Netlist()
+    resistor = kdb.DeviceClassResistor()
+    resistor.name = "RES"
+    netlist.add(resistor)
+
+    lone = kdb.Circuit()
+    lone.name = "LONE"
+    netlist.add(lone)
+    lone.create_device(resistor, "R")
+
+    top = kdb.Circuit()
+    top.name = "TOP"
+    netlist.add(top)
+    top.create_subcircuit(lone, "L")
+
+    graph = HierarchicalNetlist.from_netlist(netlist).expand()
+    assert (graph.n_devices, graph.n_nets) == (1, 0)
+    assert graph.device_nets.tolist() == [-1, -1]
+
+    # a subcircuit with an unconnected pin in a circuit without nets
+    wire = kdb.Circuit()
+    wire.name = "WIRE"
+    netlist.add(wire)
+    net = wire.create_net("N")
+    wire.connect_pin(wire.create_pin("A"), net)
+    device = wire.create_device(resistor, "R")
+    device.connect_terminal("A", net)
+    top.create_subcircuit(wire, "W")
+
+    graph = HierarchicalNetlist.from_netlist(netlist).expand()
+    assert (graph.n_devices, graph.n_nets) == (2, 1)
+    assert graph.net_names() == ["W.N"]
+    assert sorted(graph.device_nets.tolist()) == [-1, -1, -1, 0]
+
+
+def test_adjacency(read_netlist) -> None:
+    graph = HierarchicalNetlist.from_netlist(read_netlist()).expand()
+    names = graph.device_names()
+    resistor = names.index("1")
+
+    neighbors = {names[i] for i in graph.neighbors(resistor)}
+    # R1 is on OUT and VSS, shared by all NMOS and the last buffer output
+    assert neighbors == {"A.1.2", "A.2.2", "B.1.2", "B.2.1", "B.2.2"}
+
+    clique = graph.adjacency("clique")
+    assert set(clique[resistor].indices) == set(graph.neighbors(resistor))
+    star = graph.adjacency("star")
+    assert star.nnz < clique.nnz
+    assert connected_components(star)[0] == connected_components(clique)[0] == 1
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import networkx as nx
+import pytest
+
+from gplugins.klayout.netlist_graph import networkx_from_spice
+from gplugins.klayout.netlist_hierarchy import (
+    HierarchicalNetlist,
+    HierarchicalNetlistBuilder,
+)
+from gplugins.klayout.netlist_spice_reader import (
+    CalibreSpiceReader,
+    SpiceElement,
+    SpiceGlobal,
+    SpiceSubcircuit,
+    SymbolTable,
+    iter_spice,
+    parse_spice_value,
+)
+
+spice = """* calibre style
+.SUBCKT ring_unit in out
+XWG1 in mid WG_STRAIGHT length=10 wg_type=strip $X=1000 $Y=-2000
+XWG2 mid out $[WG_BEND] radius = 5
+.ENDS
+.subckt top a b
++ c
+.include 'devices.sp'
+xr1 a n1 ring_unit
+XR2 n1 b ring_unit $ comment
+.ends
+"""
+
+devices = """
+R1 b c 50
+M1 c a b b nch W=1u L=0.1u
+"""
+
+
+@pytest.fixture
+def spice_path(tmp_path):
+    (tmp_path / "devices.sp").write_text(devices)
+    path = tmp_path / "ring.sp"
+    path.write_text(spice)
+    return path
+
+
+def test_parse_spice_value() -> None:
+    assert parse_spice_value("0.1u") == pytest.approx(1e-7)
+    assert parse_spice_value("10Meg") == pytest.approx(1e7)
+    assert parse_spice_value("2e-3") == pytest.approx(2e-3)
+    assert parse_spice_value("strip") == "STRIP"
+
+
+def test_iter_spice(spice_path) -> None:
+    records = list(iter_spice(spice_path))
+    assert records[0] == SpiceSubcircuit("RING_UNIT", ["IN", "OUT"])
+    assert records[1].parameters == {
+        "LENGTH": 10.0,
+        "WG_TYPE": "STRIP",
+        "x": 1.0,
+        "y": -2.0,
+    }
+    assert records[2].model == "WG_BEND"
+    assert records[4] == SpiceSubcircuit("TOP", ["A", "B", "C"])
+    # included elements are read in place
+    resistor, transistor = records[5:7]
+    assert resistor == SpiceElement("R", "1", ["B", "C"], value=50.0)
+    assert transistor.nets == ["C", "A", "B", "B"]
+    assert transistor.model == "NCH"
+
+
+global_spice = """
+.GLOBAL vdd vss
+.SUBCKT inv a y PARAMS: w=1 l = 0.1
+M1 y a vdd vdd PMOS W=1 L=0.1
+M2 y a vss vss NMOS W=0.5 L=0.1
+.ENDS
+.SUBCKT buf a y
+X1 a m inv
+X2 m y inv
+.ENDS
+.SUBCKT top in out
+XA in mid buf
+XB mid out buf
+R1 out vss 100
+.ENDS
+"""
+
+
+def test_global_nets(tmp_path) -> None:
+    path = tmp_path / "global.sp"
+    path.write_text(global_spice)
+    records = list(iter_spice(path))
+    assert records[0] == SpiceGlobal(["VDD", "VSS"])
+    assert records[1] == SpiceSubcircuit("INV", ["A", "Y"])
+
+    hierarchy = HierarchicalNetlist.from_spice(path)
+    pins = {t.name: [t.net_names[pin] for pin in t.pins] for t in hierarchy.templates}
+    assert pins["INV"] == ["A", "Y", "VDD", "VSS"]
+    # buf has no device on the global nets, but its subcircuits do
+    assert pins["BUF"] == ["A", "Y", "VDD", "VSS"]
+    nets = set(hierarchy.expand().net_names())
+    assert nets == {"IN", "MID", "OUT", "A.M", "B.M", "VDD", "VSS"}
+
+    G = networkx_from_spice(path, top_cell="TOP", streaming=True)
+    assert nx.utils.graphs_equal(G, networkx_from_spice(path, top_cell="TOP"))
+    assert len(G["VDD"]) == 4
+
+
+@pytest.mark.parametrize("include_labels", [True, False])
+def test_streaming_matches_reader(spice_path, include_labels: bool) -> None:
+    G = networkx_from_spice(
+        spice_path,
+        include_labels=include_labels,
+        top_cell="TOP",
+        spice_reader=CalibreSpiceReader,
+        streaming=True,
+    )
+    assert nx.utils.graphs_equal(
+        G,
+        networkx_from_spice(
+            spice_path,
+            include_labels=include_labels,
+            top_cell="TOP",
+            spice_reader=CalibreSpiceReader,
+        ),
+    )
+    assert G.nodes["WG_STRAIGHT_R1.WG1"]["WG_TYPE"] == "STRIP"
+    assert G.nodes["NCH_1"]["W"] == pytest.approx(1.0)
+
+
+def test_streaming_circuits_as_devices(tmp_path) -> None:
+    path = tmp_path / "wg.sp"
+    path.write_text(
+        ".SUBCKT WG_X a b\nR1 a b 10\n.ENDS\n"
+        ".SUBCKT TOP in out\nX1 in m WG_X\nX2 m out WG_X\n.ENDS\n"
+    )
+    G = networkx_from_spice(path, spice_reader=CalibreSpiceReader, streaming=True)
+    # WG_X is a device, its content is not an extra top circuit
+    assert set(G.nodes) == {"IN", "M", "OUT", "WG_X_1", "WG_X_2"}
+    assert nx.utils.graphs_equal(
+        G, networkx_from_spice(path, spice_reader=CalibreSpiceReader)
+    )
+
+
+def test_shared_symbols(spice_path) -> None:
+    symbols = SymbolTable()
+    first = HierarchicalNetlist.from_spice(spice_path, symbols=symbols)
+    n_symbols = len(symbols)
+    second = HierarchicalNetlist.from_spice(spice_path, symbols=symbols)
+    assert len(symbols) == n_symbols
+    assert first.symbols is second.symbols is symbols
+
+    # undefined subcircuits are devices with a string parameter
+    template = first.templates[first.index["RING_UNIT"]]
+    assert symbols[template.device_symbols[0, 1]] == "STRIP"
+    assert first.device_count() == 6
+
+
+def test_builder_forward_reference() -> None:
+    builder = HierarchicalNetlistBuilder()
+    builder.begin_circuit("TOP", ["A", "B"])
+    builder.add_instance("HALF", "1", ["A", "M"])
+    builder.add_instance("HALF", "2", ["M", "B"])
+    builder.end_circuit()
+    builder.begin_circuit("HALF", ["P", "N"])
+    builder.add_device("RES", "1", ["P", "N"], {"R": 10.0}, terminals=("A", "B"))
+    builder.end_circuit()
+
+    hierarchy = builder.build()
+    assert [hierarchy.templates[i].name for i in hierarchy.top] == ["TOP"]
+    graph = hierarchy.expand()
+    assert graph.device_names() == ["1.1", "2.1"]
+    assert set(graph.net_names()) == {"A", "B", "M"}
+
+    # as devices, the instances keep their nets as numbered terminals
+    flat = builder.build(as_device=lambda name: name == "HALF")
+    assert flat.device_count("TOP") == 2
+    assert [t.name for t in flat.templates] == ["TOP"]
+    assert flat.device_classes[-1].terminals == ("0", "1")
+
+
+def test_builder_errors() -> None:
+    builder = HierarchicalNetlistBuilder()
+    builder.begin_circuit("A", ["P"])
+    builder.add_instance("B", "1", ["P", "Q"])
+    builder.end_circuit()
+    builder.begin_circuit("B", ["P"])
+    builder.end_circuit()
+    with pytest.raises(ValueError, match="pins"):
+        builder.build()
+
+    builder = HierarchicalNetlistBuilder()
+    builder.begin_circuit("A", ["P"])
+    builder.add_instance("A", "1", ["P"])
+    builder.end_circuit()
+    with pytest.raises(ValueError, match="instantiates itself"):
+        builder.build()
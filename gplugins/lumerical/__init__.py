@@ -1,17 +1,15 @@
 from __future__ import annotations
 
-from gplugins.lumerical.interconnect import run_wavelength_sweep
-from gplugins.lumerical.read import read_sparameters_lumerical
-from gplugins.lumerical.write_sparameters_lumerical import (
-    write_sparameters_lumerical,
-)
-from gplugins.lumerical.write_sparameters_lumerical_components import (
-    write_sparameters_lumerical_components,
-)
+from gplugins.common.utils.lazy_loader import attach
 
-__all__ = [
-    "read_sparameters_lumerical",
-    "write_sparameters_lumerical",
-    "write_sparameters_lumerical_components",
-    "run_wavelength_sweep",
-]
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    submod_attrs={
+        ".interconnect": ["run_wavelength_sweep"],
+        ".read": ["read_sparameters_lumerical"],
+        ".write_sparameters_lumerical": ["write_sparameters_lumerical"],
+        ".write_sparameters_lumerical_components": [
+            "write_sparameters_lumerical_components"
+        ],
+    },
+)
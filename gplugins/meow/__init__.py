@@ -1,5 +1,6 @@
-from gplugins.meow.meow_eme import MEOW
+from gplugins.common.utils.lazy_loader import attach
 
-__all__ = [
-    "MEOW",
-]
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    submod_attrs={".meow_eme": ["MEOW"]},
+)
@@ -1,4 +1,5 @@
 import pathlib
+import pickle
 import pprint
 import time
 from typing import Literal
@@ -16,9 +17,14 @@ from gdsfactory.technology import DerivedLayer, LayerStack
 from gdsfactory.typings import Component, LayerSpec, PathType
 from tqdm.auto import tqdm
 
+from gplugins.common.utils.get_sparameters_path import get_component_hash
+from gplugins.common.utils.get_sparameters_path import (
+    get_sparameters_key_meow as get_sparameters_key,
+)
 from gplugins.common.utils.get_sparameters_path import (
     get_sparameters_path_meow as get_sparameters_path,
 )
+from gplugins.common.utils.result_store import ResultStore
 
 
 def list_unique_layer_stack_z(
@@ -66,6 +72,7 @@ class MEOW:
         dirpath: PathType | None = PATH.sparameters,
         filepath: PathType | None = None,
         overwrite: bool = False,
+        store: ResultStore | None = None,
     ) -> None:
         """Computes multimode 2-port S-parameters for a gdsfactory component.
 
@@ -94,6 +101,9 @@ class MEOW:
             filepath: to store pandas Dataframe with Sparameters in npz format.
                 Defaults to dirpath/component_.npz.
             overwrite: overwrites stored Sparameter npz results.
+            store: optional result store. If given, Sparameters and extruded
+                structures are cached in the store instead of dirpath/filepath.
+                Cannot be combined with filepath.
 
         Returns:
             S-parameters in form o1@0,o2@0 at wavelength.
@@ -137,6 +147,10 @@ class MEOW:
         """
         # Validate component
         self.validate_component(component)
+        if store is not None and filepath is not None:
+            raise ValueError(
+                f"Pass either filepath={str(filepath)!r} or store, results go to one of them"
+            )
 
         # Save parameters
         self.wavelength = wavelength
@@ -175,11 +189,12 @@ class MEOW:
         self.num_cells = max(int(self.span_z / cell_length) + 2, 4)
 
         # Setup simulation
+        self.store = store
         self.component, self.layer_stack = self.add_global_layers(
             component, layer_stack
         )
         self.extrusion_rules = self.layer_stack_to_extrusion()
-        self.structs = mw.extrude_gds(self.component, self.extrusion_rules)
+        self.structs = self.extrude_structures()
         self.cells = self.create_cells()
         self.env = mw.Environment(wl=self.wavelength, T=self.temperature)
         self.css = [
@@ -203,6 +218,11 @@ class MEOW:
             resolution_y=resolution_y,
         )
 
+        if store is not None:
+            self.store_key = get_sparameters_key(
+                component=component, layer_stack=layer_stack, **sim_settings
+            )
+            filepath = store.path(self.store_key)
         filepath = filepath or get_sparameters_path(
             component=component,
             dirpath=dirpath,
@@ -215,7 +235,10 @@ class MEOW:
         sim_settings["component"] = component.to_dict()
         self.sim_settings = sim_settings
         self.filepath = pathlib.Path(filepath)
-        self.filepath_sim_settings = filepath.with_suffix(".yml")
+        self.filepath_sim_settings = self.filepath.with_suffix(".yml")
+        if store is not None:
+            self.sim_settings_key = ResultStore.key(self.store_key, "sim_settings")
+            self.filepath_sim_settings = store.path(self.sim_settings_key)
         self.overwrite = overwrite
 
     def gf_material_to_meow_material(
@@ -301,6 +324,23 @@ class MEOW:
             )
         return extrusions
 
+    def extrude_structures(self) -> list[mw.Structure3D]:
+        """Extrude the component into meow structures, cached in the store if any."""
+        if self.store is None:
+            return mw.extrude_gds(self.component, self.extrusion_rules)
+
+        key = ResultStore.key(
+            "extrude_gds",
+            get_component_hash(self.component),
+            self.layer_stack.model_dump_json(),
+            f"{self.wavelength} {sorted(self.material_to_color.items())}",
+        )
+        if (data := self.store.get_bytes(key)) is not None:
+            return pickle.loads(data)
+        structs = mw.extrude_gds(self.component, self.extrusion_rules)
+        self.store.put_bytes(key, pickle.dumps(structs))
+        return structs
+
     def create_cells(self) -> list[mw.Cell]:
         """Get meow cells from extruded component.
 
@@ -406,24 +446,31 @@ class MEOW:
 
     def compute_sparameters(self) -> dict[str, np.ndarray]:
         """Returns Sparameters using EME."""
-        if self.filepath.exists():
+        cached = None
+        if self.store is not None:
             if not self.overwrite:
-                logger.info(f"Simulation loaded from {self.filepath!r}")
-                sp = dict(np.load(self.filepath))
-
-                def rename(p):
-                    return p.replace("o1", "left").replace("o2", "right")
-
-                sdict = {
-                    tuple(rename(p) for p in k.split(",")): np.asarray(v)
-                    for k, v in sp.items()
-                }
-                S, self.port_map = sax.sdense(sdict)
-                self.S = np.asarray(S).view(np.ndarray)
-                return sp
+                cached = self.store.load_arrays(self.store_key)
+        elif self.filepath.exists():
+            if not self.overwrite:
+                cached = dict(np.load(self.filepath))
             else:
                 self.filepath.unlink()
 
+        if cached is not None:
+            logger.info(f"Simulation loaded from {self.filepath!r}")
+            sp = cached
+
+            def rename(p):
+                return p.replace("o1", "left").replace("o2", "right")
+
+            sdict = {
+                tuple(rename(p) for p in k.split(",")): np.asarray(v)
+                for k, v in sp.items()
+            }
+            S, self.port_map = sax.sdense(sdict)
+            self.S = np.asarray(S).view(np.ndarray)
+            return sp
+
         start = time.time()
 
         self.compute_all_modes()
@@ -439,14 +486,22 @@ class MEOW:
             f"{rename(p1)},{rename(p2)}": np.asarray(v) for (p1, p2), v in sdict.items()
         }
 
-        np.savez_compressed(self.filepath, **sp)
+        if self.store is not None:
+            self.store.save_arrays(self.store_key, **sp)
+        else:
+            np.savez_compressed(self.filepath, **sp)
 
         end = time.time()
 
         self.sim_settings.update(compute_time_seconds=end - start)
         self.sim_settings.update(compute_time_minutes=(end - start) / 60)
         logger.info(f"Write simulation results to {self.filepath!r}")
-        self.filepath_sim_settings.write_text(yaml.dump(self.sim_settings))
+        if self.store is not None:
+            self.store.put_bytes(
+                self.sim_settings_key, yaml.dump(self.sim_settings).encode()
+            )
+        else:
+            self.filepath_sim_settings.write_text(yaml.dump(self.sim_settings))
         logger.info(f"Write simulation settings to {self.filepath_sim_settings!r}")
 
         return sp
@@ -1,7 +1,9 @@
-from gplugins.palace.get_capacitance import run_capacitive_simulation_palace
-from gplugins.palace.get_scattering import run_scattering_simulation_palace
+from gplugins.common.utils.lazy_loader import attach
 
-__all__ = [
-    "run_capacitive_simulation_palace",
-    "run_scattering_simulation_palace",
-]
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    submod_attrs={
+        ".get_capacitance": ["run_capacitive_simulation_palace"],
+        ".get_scattering": ["run_scattering_simulation_palace"],
+    },
+)
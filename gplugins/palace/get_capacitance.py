@@ -5,6 +5,7 @@ import itertools
 import json
 import shutil
 from collections.abc import Iterable, Mapping, Sequence
+from concurrent.futures import Future
 from math import inf
 from pathlib import Path
 from tempfile import TemporaryDirectory
@@ -19,10 +20,7 @@ from pandas import read_csv
 
 from gplugins.common.base_models.simulation import ElectrostaticResults
 from gplugins.common.types import RFMaterialSpec
-from gplugins.common.utils.async_helpers import (
-    execute_and_stream_output,
-    run_async_with_event_loop,
-)
+from gplugins.common.utils.job_scheduler import Command, JobScheduler
 from gplugins.gmsh import get_mesh
 
 ELECTROSTATIC_JSON = "electrostatic.json"
@@ -116,23 +114,18 @@ def _generate_json(
         json.dump(palace_json_data, fp, indent=4)
 
 
-def _palace(simulation_folder: Path, name: str, n_processes: int = 1):
-    """Run simulations with Palace."""
+def _palace(simulation_folder: Path, name: str, n_processes: int = 1) -> Command:
+    """Palace command for running simulations."""
     palace = shutil.which("palace")
     if palace is None:
         raise RuntimeError("palace not found. Make sure it is available in your PATH.")
 
     json_file = simulation_folder / f"{Path(name).stem}.json"
-    run_async_with_event_loop(
-        execute_and_stream_output(
-            [palace, json_file]
-            if n_processes == 1
-            else [palace, "-np", str(n_processes), json_file],
-            shell=False,
-            log_file_dir=simulation_folder,
-            log_file_str=json_file.stem + "_palace",
-            cwd=simulation_folder,
-        )
+    return Command(
+        [palace, json_file]
+        if n_processes == 1
+        else [palace, "-np", str(n_processes), json_file],
+        log_file_str=json_file.stem + "_palace",
     )
 
 
@@ -178,7 +171,8 @@ def run_capacitive_simulation_palace(
     simulator_params: Mapping[str, Any] | None = None,
     mesh_parameters: dict[str, Any] | None = None,
     mesh_file: Path | str | None = None,
-) -> ElectrostaticResults:
+    scheduler: JobScheduler | None = None,
+) -> ElectrostaticResults | Future[ElectrostaticResults]:
     """Run electrostatic finite element method simulations using
     `Palace`_.
     Returns the field solution and resulting capacitance matrix.
@@ -205,6 +199,9 @@ def run_capacitive_simulation_palace(
             Keyword arguments to provide to :func:`get_mesh`.
         mesh_file: Path to a ready mesh to use. Useful for reusing one mesh file.
             By default a mesh is generated according to ``mesh_parameters``.
+        scheduler: Runs Palace as a job of ``n_processes`` cores on this
+            :class:`~JobScheduler` and returns a future of the results right after
+            meshing. Use it to run several simulations concurrently.
 
     .. _Palace: https://github.com/awslabs/palace
     """
@@ -310,12 +307,25 @@ def run_capacitive_simulation_palace(
         background_tag,
         simulator_params,
     )
-    _palace(simulation_folder, filename, n_processes)
-    results = _read_palace_results(
-        simulation_folder,
-        filename,
-        component.ports,
-        is_temporary=str(simulation_folder) == temp_dir.name,
-    )
-    temp_dir.cleanup()
-    return results
+    command = _palace(simulation_folder, filename, n_processes)
+
+    def read_results() -> ElectrostaticResults:
+        return _read_palace_results(
+            simulation_folder,
+            filename,
+            component.ports,
+            is_temporary=str(simulation_folder) == temp_dir.name,
+        )
+
+    def submit(scheduler: JobScheduler) -> Future[ElectrostaticResults]:
+        future = scheduler.submit(
+            command, cores=n_processes, cwd=simulation_folder, callback=read_results
+        )
+        # also clean up when the solver fails or the job is cancelled
+        future.add_done_callback(lambda _: temp_dir.cleanup())
+        return future
+
+    if scheduler is not None:
+        return submit(scheduler)
+    with JobScheduler(max_cores=n_processes) as scheduler:
+        return submit(scheduler).result()
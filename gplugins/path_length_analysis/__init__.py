@@ -1,7 +1,6 @@
-from gplugins.path_length_analysis.path_length_analysis import (
-    report_pathlengths,
-)
+from gplugins.common.utils.lazy_loader import attach
 
-__all__ = [
-    "report_pathlengths",
-]
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    submod_attrs={".path_length_analysis": ["report_pathlengths"]},
+)
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-from gplugins.sax import models, read
-from gplugins.sax.plot_model import plot_model
+from gplugins.common.utils.lazy_loader import attach
 
-__all__ = ["read", "plot_model", "models"]
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    submodules=[".models", ".read"],
+    submod_attrs={".plot_model": ["plot_model"]},
+)
@@ -13,11 +13,13 @@ import numpy as np
 import pandas as pd
 from sax.saxtypes import Float, Model
 
+from gplugins.common.utils.chunked_arrays import is_chunked
 from gplugins.common.utils.get_sparameters_path import (
     get_sparameters_path_lumerical,
     get_sparameters_path_meep,
     get_sparameters_path_tidy3d,
 )
+from gplugins.common.utils.sparameters import SParameters
 
 wl_cband = np.linspace(1.500, 1.600, 128)
 
@@ -27,7 +29,7 @@ Simulator = Literal["lumerical", "meep", "tidy3d"]
 
 
 def model_from_npz(
-    filepath: PathType | np.ndarray,
+    filepath: PathType | np.ndarray | SParameters,
     xkey: str = "wavelengths",
     xunits: float = 1,
 ) -> Model:
@@ -36,37 +38,34 @@ def model_from_npz(
     The SAX Model is a function that returns a SAX SDict interpolated over wavelength.
 
     Args:
-        filepath: CSV Sparameters path or pandas DataFrame.
+        filepath: npz Sparameters path, directory saved with
+            :meth:`SParameters.save_chunked`, dict of arrays or :class:`SParameters`.
         xkey: key for wavelengths in file.
         xunits: x units in um from the loaded file (um). 1 means 1um.
     """
-    sp = np.load(filepath) if isinstance(filepath, pathlib.Path | str) else filepath
-    keys = list(sp.keys())
-
-    if xkey not in keys:
-        raise ValueError(f"{xkey!r} not in {keys}")
+    if isinstance(filepath, SParameters):
+        sp = filepath
+    elif isinstance(filepath, pathlib.Path | str) and is_chunked(filepath):
+        sp = SParameters.from_chunked(filepath)
+    elif isinstance(filepath, pathlib.Path | str):
+        sp = SParameters.from_npz(filepath, xkey=xkey)
+    else:
+        sp = SParameters.from_dict(filepath, xkey=xkey)
 
-    x = jnp.asarray(sp[xkey] * xunits)
+    # make sure x is sorted from low to high
+    sp = sp.sorted()
+    x = jnp.asarray(sp.wavelengths * xunits)
     wl = jnp.asarray(wl_cband)
 
-    # make sure x is sorted from low to high
-    idxs = jnp.argsort(x)
-    x = x[idxs]
-    sp = {k: v[idxs] for k, v in sp.items()}
+    ports = [p.split("@")[0] for p in sp.port_modes]
+    keys = [(port0, port1) for port0 in ports for port1 in ports]
+    s = jnp.asarray(sp.s.reshape(len(x), -1))
+    interp = jax.vmap(jnp.interp, in_axes=(None, None, 1), out_axes=0)
 
     @jax.jit
     def model(wl: Float = wl):
-        S = {}
-        zero = jnp.zeros_like(x)
-
-        for key in sp:
-            if not key.startswith("wav"):
-                port_mode0, port_mode1 = key.split(",")
-                port0, _ = port_mode0.split("@")
-                port1, _ = port_mode1.split("@")
-                S[(port0, port1)] = jnp.interp(wl, x, sp.get(key, zero))
-
-        return S
+        # later modes of the same ports overwrite earlier ones
+        return dict(zip(keys, interp(wl, x, s)))
 
     return model
 
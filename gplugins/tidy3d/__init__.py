@@ -1,28 +1,20 @@
-from gplugins.tidy3d import materials, modes
-from gplugins.tidy3d.component import (
-    Tidy3DComponent,
-    material_name_to_medium,
-    write_sparameters,
-    write_sparameters_batch,
-)
-from gplugins.tidy3d.get_simulation_grating_coupler import (
-    get_simulation_grating_coupler,
-)
-from gplugins.tidy3d.write_sparameters_grating_coupler import (
-    plot_simulation,
-    write_sparameters_grating_coupler,
-    write_sparameters_grating_coupler_batch,
-)
+from gplugins.common.utils.lazy_loader import attach
 
-__all__ = [
-    "Tidy3DComponent",
-    "material_name_to_medium",
-    "modes",
-    "materials",
-    "get_simulation_grating_coupler",
-    "write_sparameters",
-    "write_sparameters_batch",
-    "write_sparameters_grating_coupler",
-    "write_sparameters_grating_coupler_batch",
-    "plot_simulation",
-]
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    submodules=[".materials", ".modes"],
+    submod_attrs={
+        ".component": [
+            "Tidy3DComponent",
+            "material_name_to_medium",
+            "write_sparameters",
+            "write_sparameters_batch",
+        ],
+        ".get_simulation_grating_coupler": ["get_simulation_grating_coupler"],
+        ".write_sparameters_grating_coupler": [
+            "plot_simulation",
+            "write_sparameters_grating_coupler",
+            "write_sparameters_grating_coupler_batch",
+        ],
+    },
+)
@@ -31,6 +31,8 @@ from tidy3d.components.types import Symmetry
 from tidy3d.plugins.smatrix import ComponentModeler, Port
 
 from gplugins.common.base_models.component import LayeredComponentBase
+from gplugins.common.utils.result_store import ResultStore
+from gplugins.common.utils.sparameters import SParameters
 from gplugins.tidy3d.get_results import _executor
 from gplugins.tidy3d.types import (
     Sparameters,
@@ -463,6 +465,7 @@ def write_sparameters(
     plot_epsilon: bool = False,
     filepath: PathType | None = None,
     overwrite: bool = False,
+    store: ResultStore | None = None,
     **kwargs,
 ) -> Sparameters:
     """Writes the S-parameters for a component.
@@ -506,6 +509,8 @@ def write_sparameters(
         plot_mode_port_name: which port name to plot. Defaults to None.
         filepath: Optional file path for the S-parameters. If None, uses hash of simulation.
         overwrite: Whether to overwrite existing S-parameters. Defaults to False.
+        store: Optional result store. If given, results are read from and written to \
+                the store keyed by the simulation hash instead of an npz file.
         kwargs: Additional keyword arguments for the tidy3d Simulation constructor.
 
     """
@@ -596,33 +601,57 @@ def write_sparameters(
         plt.show()
         return sp
 
-    dirpath = pathlib.Path(dirpath)
-    dirpath.mkdir(parents=True, exist_ok=True)
-    filepath = filepath or dirpath / f"{modeler._hash_self()}.npz"
-    filepath = pathlib.Path(filepath)
+    if store is not None:
+        key = modeler._hash_self()
+        if not overwrite and (cached := store.load_arrays(key)) is not None:
+            print(f"Simulation loaded from {store.path(key)!r}")
+            return cached
+        filepath = store.path(key)
+    else:
+        dirpath = pathlib.Path(dirpath)
+        dirpath.mkdir(parents=True, exist_ok=True)
+        filepath = filepath or dirpath / f"{modeler._hash_self()}.npz"
+        filepath = pathlib.Path(filepath)
 
-    if filepath.exists() and not overwrite:
+    if store is None and filepath.exists() and not overwrite:
         print(f"Simulation loaded from {filepath!r}")
         return dict(np.load(filepath))
     else:
         time.sleep(0.2)
         s = modeler.run()
-        for port_in in s.port_in.values:
-            for port_out in s.port_out.values:
-                for mode_index_in in s.mode_index_in.values:
-                    for mode_index_out in s.mode_index_out.values:
-                        sp[f"{port_in}@{mode_index_in},{port_out}@{mode_index_out}"] = (
-                            s.sel(
-                                port_in=port_in,
-                                port_out=port_out,
-                                mode_index_in=mode_index_in,
-                                mode_index_out=mode_index_out,
-                            ).values
-                        )
-
-        frequency = s.f.values
-        sp["wavelengths"] = td.constants.C_0 / frequency
-        np.savez_compressed(filepath, **sp)
+        excited = {
+            f"{port}@{mode_index}"
+            for port in s.port_in.values
+            for mode_index in s.mode_index_in.values
+        }
+        # square matrix over all output ports, inputs that were not run are NaN
+        s = s.reindex(
+            port_in=s.port_out.values,
+            mode_index_in=s.mode_index_out.values,
+            fill_value=np.nan,
+        )
+        dims = ("f", "port_in", "mode_index_in", "port_out", "mode_index_out")
+        port_modes = [
+            f"{port}@{mode_index}"
+            for port in s.port_out.values
+            for mode_index in s.mode_index_out.values
+        ]
+        n = len(port_modes)
+        sp = SParameters(
+            wavelengths=td.constants.C_0 / s.f.values,
+            s=s.transpose(*dims).values.reshape(len(s.f), n, n),
+            port_modes=port_modes,
+        ).to_dict()
+        # only keep the entries of the inputs that were run
+        sp = {
+            k: v
+            for k, v in sp.items()
+            if k == "wavelengths" or k.split(",")[0] in excited
+        }
+        if store is not None:
+            store.save_arrays(key, **sp)
+        else:
+            np.savez_compressed(filepath, **sp)
         print(f"Simulation saved to {filepath!r}")
         return sp
 
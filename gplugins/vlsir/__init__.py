@@ -1,3 +1,6 @@
-from gplugins.vlsir.export_netlist import export_netlist, kdb_vlsir
+from gplugins.common.utils.lazy_loader import attach
 
-__all__ = ["export_netlist", "kdb_vlsir"]
+__getattr__, __dir__, __all__ = attach(
+    __name__,
+    submod_attrs={".export_netlist": ["export_netlist", "kdb_vlsir"]},
+)